@@ -2,9 +2,144 @@
 from __future__ import unicode_literals
 
 from django.contrib import admin
+from django.db.models import (Case, When, IntegerField)
 from django.utils.translation import ugettext_lazy as _
 
+from .autocomplete import (MIN_QUERY_LENGTH, autocomplete_index)
+from .formatters import iter_full_addresses
 from .models import (Country, Province, District, SubDistrict)
+from .paginators import EstimatedCountPaginator
+
+AUTOCOMPLETE_RESULTS = 100
+
+
+class ProvinceListFilter(admin.SimpleListFilter):
+    """ filter the addresses by province id of their sub district. """
+    title = _('Province')
+    parameter_name = 'province'
+    lookup_field = 'sub_district__province_id'
+
+    def lookups(self, request, model_admin):
+        return Province.objects.published().order_by('name').values_list('id', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup_field: self.value()})
+        return queryset
+
+
+class DistrictListFilter(admin.SimpleListFilter):
+    """
+    filter the addresses by district id of their sub district,
+    the districts are only listed after a province is selected.
+    """
+    title = _('District')
+    parameter_name = 'district'
+    lookup_field = 'sub_district__district_id'
+
+    def lookups(self, request, model_admin):
+        queryset = District.objects.published().order_by('name')
+        province_id = request.GET.get(ProvinceListFilter.parameter_name, '')
+        if province_id.isdigit():
+            queryset = queryset.filter(province_id=province_id)
+        elif (self.value() or '').isdigit():
+            # keep the selected district listed, so the filter is still applied.
+            queryset = queryset.filter(pk=self.value())
+        else:
+            return ()
+        return queryset.values_list('id', 'name')
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup_field: self.value()})
+        return queryset
+
+
+class AddressModelAdminMixin(object):
+    """
+    Mixin for the admin of any `AddressModel` subclass, the `full_address`
+    column of the page is formatted in SQL with `with_full_address()`
+    (or with `iter_full_addresses()` for the formatters in python)
+    and the sub district chain is joined, so the changelist runs
+    a constant number of queries for any page size.
+
+    @admin.register(Profile)
+    class ProfileAdmin(AddressModelAdminMixin, admin.ModelAdmin):
+        list_display = ('name', 'full_address')
+        list_filter = AddressModelAdminMixin.address_list_filter
+        full_address_format = 'id'
+        full_address_include_country = True
+    """
+    address_list_filter = (ProvinceListFilter, DistrictListFilter)
+    list_select_related = ('sub_district__district__province__country',)
+    raw_id_fields = ('sub_district',)
+    full_address_format = 'en'
+    full_address_include_country = False
+
+    def load_full_addresses(self, addresses):
+        """
+        function to format the full address of the page rows with one query,
+        instead of annotating the changelist queryset which is also counted.
+
+        :param `addresses` is list of `AddressModel` instances.
+        """
+        queryset = self.model._default_manager.filter(pk__in=[address.pk for address in addresses])
+        if not addresses or not hasattr(queryset, 'with_full_address'):
+            return
+
+        try:
+            full_addresses = dict(queryset.order_by().with_full_address(
+                format_address=self.full_address_format,
+                include_country=self.full_address_include_country,
+            ).values_list('pk', 'full_address'))
+        except ValueError:
+            # the formatters which format the rows in python.
+            queryset = queryset.order_by('pk')
+            full_addresses = dict(zip(queryset.values_list('pk', flat=True), iter_full_addresses(
+                queryset, self.full_address_format, self.full_address_include_country)))
+        for address in addresses:
+            address._full_address = full_addresses.get(address.pk)
+
+    def get_changelist_instance(self, request):
+        changelist = super(AddressModelAdminMixin, self).get_changelist_instance(request)
+        result_list = changelist.result_list
+        # evaluate the page here, the rows stay cached on the queryset.
+        self.load_full_addresses(list(result_list))
+        return changelist
+
+    def full_address(self, address):
+        if getattr(address, '_full_address', None) is not None:
+            return address._full_address
+        return address.get_full_address(format_address=self.full_address_format,
+                                        include_country=self.full_address_include_country)
+    full_address.short_description = _('Full Address')
+
+
+class IndexedAutocompleteMixin(object):
+    """
+    Mixin for the admin of province, district and sub district,
+    to answer the admin autocomplete widgets from the in-process
+    `autocomplete_index` instead of `icontains` over `search_fields`.
+    """
+    autocomplete_type = None
+
+    def get_search_results(self, request, queryset, search_term):
+        # `<app>_<model>_autocomplete` on Django 3.1, `autocomplete` since 3.2.
+        url_name = getattr(getattr(request, 'resolver_match', None), 'url_name', None) or ''
+        is_autocomplete = url_name.endswith('autocomplete')
+        if not is_autocomplete or len(search_term.strip()) < MIN_QUERY_LENGTH:
+            return super(IndexedAutocompleteMixin, self).get_search_results(
+                request, queryset, search_term)
+
+        results = autocomplete_index.search(search_term, limit=AUTOCOMPLETE_RESULTS,
+                                            types=[self.autocomplete_type])
+        ids = [result['id'] for result in results]
+        ranking = Case(*[When(pk=pk, then=position) for position, pk in enumerate(ids)],
+                       output_field=IntegerField())
+        queryset = queryset.filter(pk__in=ids)
+        if ids:
+            queryset = queryset.order_by(ranking)
+        return queryset, False
 
 
 @admin.register(Country)
@@ -16,31 +151,38 @@ class CountryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Province)
-class ProvinceAdmin(admin.ModelAdmin):
+class ProvinceAdmin(IndexedAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name', 'country', 'created_at', 'deleted_at')
     list_filter = ('created_at', 'updated_at', 'deleted_at')
+    list_select_related = ('country',)
     search_fields = ('name', 'country__name')
-    raw_id_fields = ('country',)
+    autocomplete_fields = ('country',)
+    autocomplete_type = 'province'
     fields = ('name', 'country', 'deleted_at')
 
 
 @admin.register(District)
-class DistrictAdmin(admin.ModelAdmin):
+class DistrictAdmin(IndexedAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name', 'province', 'created_at', 'deleted_at')
     list_filter = ('created_at', 'updated_at', 'deleted_at')
+    list_select_related = ('province',)
     search_fields = ('name', 'province__name')
-    raw_id_fields = ('province',)
+    autocomplete_fields = ('province',)
+    autocomplete_type = 'district'
     fields = ('name', 'province', 'deleted_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(SubDistrict)
-class SubDistrictAdmin(admin.ModelAdmin):
+class SubDistrictAdmin(IndexedAutocompleteMixin, admin.ModelAdmin):
     list_display = ('name', 'district', 'province', 'created_at', 'deleted_at')
-    list_filter = ('created_at', 'updated_at', 'deleted_at', 'district__province')
+    list_filter = ('created_at', 'updated_at', 'deleted_at', 'province')
+    list_select_related = ('district', 'province')
     search_fields = ('name', 'district__name')
-    raw_id_fields = ('district',)
-    fields = ('name', 'district', 'postal_code', 'deleted_at')
-
-    def province(self, sub_district):
-        return sub_district.district.province.name
-    province.short_description = _('Province')
+    autocomplete_fields = ('district',)
+    autocomplete_type = 'sub_district'
+    fields = ('name', 'district', 'postal_code', 'latitude', 'longitude', 'path', 'deleted_at')
+    readonly_fields = ('path',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
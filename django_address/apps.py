@@ -8,3 +8,6 @@ class DjangoAddressConfig(AppConfig):
     """
     name = 'django_address'
     verbose_name = _('Django Address')
+
+    def ready(self):
+        from . import signals, cache  # noqa
@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+import heapq
+import bisect
+import unicodedata
+from collections import namedtuple
+
+from .models import (Province, District, SubDistrict)
+from .signals import hierarchy_changed
+from .utils import LazyIndex
+
+NGRAM_SIZE = 3
+MIN_QUERY_LENGTH = 2
+NON_ALPHANUMERIC = re.compile(r'[\W_]+', re.UNICODE)
+
+# ranks of the matches, lower is better.
+RANK_EXACT = 0
+RANK_PREFIX = 1
+RANK_WORD_PREFIX = 2
+RANK_INFIX = 3
+
+# order of the types for the same rank.
+TYPES = ('province', 'district', 'sub_district')
+
+AutocompleteEntry = namedtuple('AutocompleteEntry', [
+    'type', 'id', 'name', 'normalized', 'postal_code',
+    'district_id', 'province_id', 'country_id', 'path',
+])
+
+
+def normalize(text):
+    """
+    function to normalize the text for matching,
+    eg: 'Daerah Istimewa  Yogyakarta!' => 'daerah istimewa yogyakarta'
+
+    :param `text` is string text to normalize.
+    :return string lowercase text without accents and punctuations.
+    """
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return NON_ALPHANUMERIC.sub(' ', text.lower()).strip()
+
+
+def get_ngrams(text):
+    return {text[index:index + NGRAM_SIZE] for index in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class AutocompleteIndex(LazyIndex):
+    """
+    In-process type-ahead index over the names of the published
+    provinces, districts and sub districts, the matches are ranked
+    as exact, prefix, word prefix and then infix (with n-grams).
+
+    >>> autocomplete_index.search('ngag')
+    [{'type': 'sub_district', 'id': 1, 'name': 'Ngaglik', 'postal_code': '55581',
+      'district_id': 1, 'province_id': 1, 'country_id': 1,
+      'path': 'Ngaglik, Sleman, Yogyakarta, Indonesia'}]
+    """
+
+    def get_rows(self):
+        """
+        function to get the rows of the index with three queries,
+        the rows under a deleted parent are excluded as well.
+        """
+        provinces = Province.objects.published().order_by().values_list(
+            'id', 'name', 'country_id', 'country__name')
+        for pk, name, country_id, country in provinces.iterator():
+            yield ('province', pk, name, None, None, None, country_id, (name, country))
+
+        districts = District.objects.published()\
+                                    .filter(province__deleted_at__isnull=True)\
+                                    .order_by().values_list(
+                                        'id', 'name', 'province_id', 'province__name',
+                                        'province__country_id', 'province__country__name')
+        for pk, name, province_id, province, country_id, country in districts.iterator():
+            yield ('district', pk, name, None, None, province_id, country_id,
+                   (name, province, country))
+
+        sub_districts = SubDistrict.objects.published()\
+                                           .filter(district__deleted_at__isnull=True,
+                                                   district__province__deleted_at__isnull=True)\
+                                           .order_by().values_list(
+                                               'id', 'name', 'postal_code',
+                                               'district_id', 'district__name',
+                                               'district__province_id', 'district__province__name',
+                                               'district__province__country_id',
+                                               'district__province__country__name')
+        for (pk, name, postal_code, district_id, district, province_id, province,
+             country_id, country) in sub_districts.iterator():
+            yield ('sub_district', pk, name, postal_code, district_id, province_id, country_id,
+                   (name, district, province, country))
+
+    def build(self):
+        """
+        function to build the index.
+        :return tuple of (entries, {name: [entry index]}, sorted [(word suffix, entry index)],
+                          {ngram: [entry index]})
+        """
+        entries, exact, words, ngrams = [], {}, [], {}
+
+        for (kind, pk, name, postal_code, district_id, province_id,
+             country_id, path) in self.get_rows():
+            normalized = normalize(name)
+            if not normalized:
+                continue
+
+            index = len(entries)
+            entries.append(AutocompleteEntry(kind, pk, name, normalized, postal_code,
+                                             district_id, province_id, country_id,
+                                             ', '.join(filter(None, path))))
+            exact.setdefault(normalized, []).append(index)
+
+            # each word suffix, so 'kota yogyakarta' is found by 'yogya'.
+            words.append((normalized, index))
+            for position, char in enumerate(normalized):
+                if char == ' ':
+                    words.append((normalized[position + 1:], index))
+
+            for ngram in get_ngrams(normalized):
+                ngrams.setdefault(ngram, []).append(index)
+
+        words.sort()
+        return (entries, exact, words, ngrams)
+
+    def match(self, query, types=None):
+        """
+        function to find the matches of a query.
+
+        :param `query` is string text typed by the user.
+        :param `types` is list of the types to include, None for all.
+        :return dict of {entry index: rank}
+        """
+        entries, exact, words, ngrams = self.load()
+        query = normalize(query)
+        matches = {}
+        if not query:
+            return matches
+
+        for index in exact.get(query, ()):
+            matches[index] = RANK_EXACT
+
+        position = bisect.bisect_left(words, (query,))
+        while position < len(words) and words[position][0].startswith(query):
+            word, index = words[position]
+            rank = RANK_PREFIX if word == entries[index].normalized else RANK_WORD_PREFIX
+            if rank < matches.get(index, RANK_INFIX + 1):
+                matches[index] = rank
+            position += 1
+
+        if len(query) >= NGRAM_SIZE:
+            # the rarest n-gram has the fewest candidates to check.
+            postings = [ngrams.get(ngram, ()) for ngram in get_ngrams(query)]
+            for index in min(postings, key=len):
+                if index not in matches and query in entries[index].normalized:
+                    matches[index] = RANK_INFIX
+
+        if types is not None:
+            types = set(types)
+            matches = {index: rank for index, rank in matches.items()
+                       if entries[index].type in types}
+        return matches
+
+    def search(self, query, limit=10, types=None):
+        """
+        function to search the names for type-ahead,
+        the queries shorter than `MIN_QUERY_LENGTH` don't match anything.
+
+        :param `query` is string text typed by the user.
+        :param `limit` is integer maximum number of results.
+        :param `types` is list of the types to include, None for all,
+                       eg: ['province', 'district', 'sub_district']
+        :return list of dict, sorted by the rank.
+        """
+        if len(normalize(query)) < MIN_QUERY_LENGTH:
+            return []
+
+        entries = self.load()[0]
+        matches = self.match(query, types)
+
+        def sort_key(index):
+            entry = entries[index]
+            return (matches[index], TYPES.index(entry.type), len(entry.name), entry.normalized)
+
+        results = []
+        for index in heapq.nsmallest(limit, matches, key=sort_key):
+            entry = entries[index]
+            results.append({'type': entry.type, 'id': entry.id, 'name': entry.name,
+                            'postal_code': entry.postal_code,
+                            'district_id': entry.district_id,
+                            'province_id': entry.province_id,
+                            'country_id': entry.country_id,
+                            'path': entry.path})
+        return results
+
+
+autocomplete_index = AutocompleteIndex()
+hierarchy_changed.connect(autocomplete_index.invalidate,
+                          dispatch_uid='django_address_autocomplete_index')
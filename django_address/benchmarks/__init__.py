@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the hot paths, with the query budgets and the stored baselines.
+They aren't collected by the normal test run, to run them:
+
+    python runtests.py --benchmark
+    python runtests.py --benchmark --save-baselines      # to update the baselines.json
+"""
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import sys
+import json
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+BASELINES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+DEFAULT_TOLERANCE = 1.0
+CALIBRATION_LOOPS = 200000
+# the minimum seconds of each timing, the fast functions are called more times.
+MIN_TIMING = 0.01
+
+
+def get_calibration():
+    """
+    function to time a fixed pure python workload, the benchmarks are stored
+    as multiples of it so the baselines are comparable across machines.
+    :return float seconds, the best of 3 runs.
+    """
+    timings = []
+    for repeat in range(3):
+        started = time.perf_counter()
+        values = {}
+        for index in range(CALIBRATION_LOOPS):
+            values[str(index % 1000)] = values.get(str(index % 997), 0) + index
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def load_baselines(path=BASELINES_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as baselines_file:
+        return json.load(baselines_file)
+
+
+def save_baseline(name, ratio, path=BASELINES_PATH):
+    baselines = load_baselines(path)
+    baselines[name] = float('%.4g' % ratio)
+    with open(path, 'w') as baselines_file:
+        json.dump(baselines, baselines_file, indent=2, sort_keys=True)
+        baselines_file.write('\n')
+
+
+class BenchmarkTestCase(TestCase):
+    """
+    Base class of the benchmarks. Each `benchmark()` asserts the query budget
+    of the measured function, then fails when its time regressed past the
+    stored baseline by more than the tolerance.
+
+    environment:
+        DJANGO_ADDRESS_BENCHMARK_TOLERANCE = 1.0     # fails when 2x slower than the baseline
+        DJANGO_ADDRESS_BENCHMARK_SAVE = 1            # to store the results as the baselines
+    """
+
+    def get_tolerance(self):
+        return float(os.environ.get('DJANGO_ADDRESS_BENCHMARK_TOLERANCE', DEFAULT_TOLERANCE))
+
+    def is_saving(self):
+        return os.environ.get('DJANGO_ADDRESS_BENCHMARK_SAVE', '').lower() in ('1', 'true')
+
+    def get_number(self, function, number=1):
+        """
+        function to raise the number of calls until they take `MIN_TIMING`,
+        so the timings of the fast functions aren't the timer noise.
+        :return integer number of calls per timing.
+        """
+        number = max(1, number)
+        while True:
+            started = time.perf_counter()
+            for call in range(number):
+                function()
+            seconds = time.perf_counter() - started
+            if seconds >= MIN_TIMING:
+                return number
+            number = max(number * 2, int(number * MIN_TIMING * 1.2 / max(seconds, 1e-9)))
+
+    def benchmark(self, name, function, number=1, repeat=5, queries=None):
+        """
+        function to measure `function`, the first call isn't timed
+        and is used to count the queries.
+
+        :param `name` is string name of the baseline.
+        :param `function` is callable without arguments.
+        :param `number` is integer minimum number of calls per timing,
+                        raised until each timing takes `MIN_TIMING`.
+        :param `repeat` is integer number of timings, the best one is kept.
+        :param `queries` is integer maximum number of queries per call, optional.
+        :return float seconds per call.
+        """
+        with CaptureQueriesContext(connection) as context:
+            function()
+        if queries is not None:
+            self.assertLessEqual(len(context), queries,
+                                 '%s made %s queries, the budget is %s'
+                                 % (name, len(context), queries))
+
+        number = self.get_number(function, number)
+        timings = []
+        for index in range(repeat):
+            started = time.perf_counter()
+            for call in range(number):
+                function()
+            timings.append((time.perf_counter() - started) / number)
+        seconds = min(timings)
+        # calibrated next to the timings, so both see the same load of the machine.
+        ratio = seconds / get_calibration()
+
+        baseline = load_baselines().get(name)
+        sys.stderr.write('\n  %-40s %10.3fms %8.3fx %s' % (
+            name, seconds * 1000, ratio,
+            'baseline %.3fx' % baseline if baseline else 'no baseline'))
+
+        if self.is_saving():
+            save_baseline(name, ratio)
+        elif not baseline:
+            # visible in the results, a missing baselines.json isn't a passing benchmark.
+            self.skipTest('%s has no baseline in %s' % (name, BASELINES_PATH))
+        else:
+            limit = baseline * (1 + self.get_tolerance())
+            self.assertLessEqual(ratio, limit,
+                                 '%s regressed: %.3fx of the calibration, the baseline is %.3fx'
+                                 % (name, ratio, baseline))
+        return seconds
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import json
+import shutil
+import tempfile
+
+from django.core.management import call_command
+
+from django_address.models import (Country, SubDistrict)
+from django_address.utils import parse_json_string
+from django_address.serializers import serialize_addresses
+from django_address.tests.models import Profile
+from django_address.benchmarks.base import BenchmarkTestCase
+from django_address.benchmarks.data import (ADDRESSES, get_states, write_synthetic_addresses)
+
+
+class BenchmarkFullAddress(BenchmarkTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            source = write_synthetic_addresses(os.path.join(tmp_dir, 'addresses.json'))
+            call_command('create_address', bulk='true', source=source)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        sub_district_ids = list(SubDistrict.objects.values_list('id', flat=True))
+        Profile.objects.bulk_create([
+            Profile(name='Profile %s' % index, address='Jl. Sudirman', number=index, na=4,
+                    ca=21, village='Sinduarjo',
+                    sub_district_id=sub_district_ids[index % len(sub_district_ids)])
+            for index in range(ADDRESSES)])
+
+    def get_profiles(self):
+        return Profile.objects.select_related('sub_district__district__province__country')
+
+    def test_get_full_address(self):
+        def format_addresses():
+            return [profile.get_full_address(format_address='id', include_country=True)
+                    for profile in self.get_profiles()]
+
+        self.benchmark('get_full_address_%s' % ADDRESSES, format_addresses, queries=1)
+
+    def test_with_full_address(self):
+        def format_addresses():
+            return list(Profile.objects.with_full_address(format_address='id', include_country=True)
+                                       .values_list('full_address', flat=True))
+
+        self.benchmark('with_full_address_%s' % ADDRESSES, format_addresses, queries=1)
+
+    def test_get_full_address_json(self):
+        def serialize():
+            return [profile.get_full_address_json() for profile in self.get_profiles()]
+
+        self.benchmark('get_full_address_json_%s' % ADDRESSES, serialize, queries=1)
+
+    def test_serialize_addresses(self):
+        def serialize():
+            return list(serialize_addresses(Profile.objects.all()))
+
+        self.benchmark('serialize_addresses_%s' % ADDRESSES, serialize, queries=2)
+
+
+class BenchmarkStates(BenchmarkTestCase):
+
+    def test_parse_json_string(self):
+        text = json.dumps(get_states())
+        self.benchmark('parse_json_string_json', lambda: parse_json_string(text, default=[]),
+                       number=20, queries=0)
+
+        # the old rows stored the list with `str()`, parsed by the literal fallback.
+        text = str(get_states())
+        self.benchmark('parse_json_string_literal', lambda: parse_json_string(text, default=[]),
+                       number=5, queries=0)
+
+    def test_country_states(self):
+        country = Country.objects.create(name='Synthetic', states=json.dumps(get_states()))
+        country = Country.objects.get(pk=country.pk)
+
+        def lookup():
+            for index in range(0, 5000, 50):
+                country.has_state('state %s' % index)
+
+        self.benchmark('country_has_state', lookup, number=20, queries=0)
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+
+from django.core.management import call_command
+
+from django_address.models import SubDistrict
+from django_address.benchmarks.base import BenchmarkTestCase
+from django_address.benchmarks.data import (SEED_PROVINCES, SEED_DISTRICTS,
+                                            SEED_SUB_DISTRICTS, write_synthetic_addresses)
+
+SEEDED = SEED_PROVINCES * SEED_DISTRICTS * SEED_SUB_DISTRICTS
+
+
+class BenchmarkCreateAddress(BenchmarkTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.source = write_synthetic_addresses(os.path.join(self.tmp_dir, 'addresses.json'))
+
+    def test_create_address_bulk(self):
+        def seed():
+            call_command('create_address', bulk='true', source=self.source)
+
+        self.benchmark('create_address_bulk', seed, queries=40)
+        self.assertEqual(SubDistrict.objects.published().count(), SEEDED)
+
+    def test_create_address_sync(self):
+        call_command('create_address', sync='true', source=self.source)
+
+        def sync():
+            call_command('create_address', sync='true', force='true', source=self.source)
+
+        self.benchmark('create_address_sync_unchanged', sync, queries=40)
+        self.assertEqual(SubDistrict.objects.published().count(), SEEDED)
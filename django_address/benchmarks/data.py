@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+SEED_COUNTRY = 'Indonesia'
+SEED_PROVINCES = 10
+SEED_DISTRICTS = 10         # per province
+SEED_SUB_DISTRICTS = 20     # per district
+ADDRESSES = 1000
+STATES = 5000
+
+
+def get_synthetic_addresses(country=SEED_COUNTRY, provinces=SEED_PROVINCES,
+                            districts=SEED_DISTRICTS, sub_districts=SEED_SUB_DISTRICTS):
+    """
+    function to generate a synthetic country in the `addresses.json` format.
+    :return dict of {'country': ..., 'provinces': {...}, 'postals': {...}}
+    """
+    data = {'country': country, 'provinces': {}, 'postals': {}}
+    for province in range(provinces):
+        code = '%02d' % (province + 11)
+        data['provinces'][code] = {'province_name': 'Province %s' % code}
+        data['postals'][code] = [
+            {'city': 'District %s-%s' % (code, district),
+             'sub_district': 'Sub District %s-%s-%s' % (code, district, sub_district),
+             'postal_code': '%02d%01d%02d' % (province + 11, district % 10, sub_district)}
+            for district in range(districts) for sub_district in range(sub_districts)
+        ]
+    return data
+
+
+def write_synthetic_addresses(path, **kwargs):
+    with open(path, 'w') as addresses_file:
+        json.dump(get_synthetic_addresses(**kwargs), addresses_file)
+    return path
+
+
+def get_states(total=STATES):
+    return ['State %s' % index for index in range(total)]
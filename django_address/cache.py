@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import (DEFAULT_CACHE_ALIAS, caches)
+
+from .models import SubDistrict
+from .signals import hierarchy_changed
+from .utils import DEFAULT_VERSION_CHECK_INTERVAL
+
+VERSION_KEY = 'django_address:hierarchy:version'
+HIERARCHY_KEY = 'django_address:hierarchy:%(version)s:%(sub_district_id)s'
+
+DEFAULT_TIMEOUT = 60 * 60 * 24
+DEFAULT_LRU_SIZE = 10000
+
+
+def is_hierarchy_cache_enabled():
+    """ return True when `DJANGO_ADDRESS_HIERARCHY_CACHE` setting is enabled. """
+    return bool(getattr(settings, 'DJANGO_ADDRESS_HIERARCHY_CACHE', False))
+
+
+def get_cache():
+    """ return the cache of `DJANGO_ADDRESS_CACHE_ALIAS` setting. """
+    return caches[getattr(settings, 'DJANGO_ADDRESS_CACHE_ALIAS', DEFAULT_CACHE_ALIAS)]
+
+
+def get_hierarchy_version():
+    """
+    function to get the shared version of the geography tables,
+    the version is bumped by every change so all processes see it.
+    :return integer version.
+    """
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # start from the clock, so an evicted key doesn't reuse the old versions.
+        version = int(time.time() * 1000)
+        if not cache.add(VERSION_KEY, version, timeout=None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_hierarchy_version(**kwargs):
+    """
+    function to bump the shared version of the geography tables,
+    connected to `hierarchy_changed` signal.
+    :return integer new version.
+    """
+    cache = get_cache()
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        version = int(time.time() * 1000)
+        cache.set(VERSION_KEY, version, timeout=None)
+
+    hierarchy_cache.clear()
+    return version
+
+
+class HierarchyCache(object):
+    """
+    Cache of the sub districts with their district, province and country,
+    a bounded per-process LRU in front of the Django cache framework.
+    The entries are keyed by the shared hierarchy version, so all
+    processes drop the stale entries after a change, the other
+    processes once they check the version again.
+
+    settings:
+        DJANGO_ADDRESS_HIERARCHY_CACHE = True       # to enable it
+        DJANGO_ADDRESS_CACHE_ALIAS = 'default'
+        DJANGO_ADDRESS_CACHE_TIMEOUT = 86400
+        DJANGO_ADDRESS_CACHE_LRU_SIZE = 10000
+        DJANGO_ADDRESS_VERSION_CHECK_INTERVAL = 30     # seconds
+
+    >>> sub_district = hierarchy_cache.get_sub_district(1)
+    >>> sub_district.district.province.country
+    <Country: Indonesia>
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # {sub_district_id: (version, sub_district)}
+        self.version = None
+        self.checked_at = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'DJANGO_ADDRESS_CACHE_LRU_SIZE', DEFAULT_LRU_SIZE)
+
+    @property
+    def timeout(self):
+        return getattr(settings, 'DJANGO_ADDRESS_CACHE_TIMEOUT', DEFAULT_TIMEOUT)
+
+    def get_version(self):
+        """
+        function to get the shared hierarchy version, read from the cache
+        at most once per `DJANGO_ADDRESS_VERSION_CHECK_INTERVAL` seconds
+        (0 to disable), the local changes clear it immediately.
+        :return integer version.
+        """
+        interval = getattr(settings, 'DJANGO_ADDRESS_VERSION_CHECK_INTERVAL',
+                           DEFAULT_VERSION_CHECK_INTERVAL)
+        now = time.time()
+        version = self.version
+        if version is None or (interval and now - self.checked_at >= interval):
+            version = get_hierarchy_version()
+            self.version, self.checked_at = version, now
+        return version
+
+    def fetch(self, sub_district_id):
+        """ function to fetch the sub district and its ancestors with one query. """
+        return SubDistrict.objects.select_related('district__province__country')\
+                                  .get(pk=sub_district_id)
+
+    def get_sub_district(self, sub_district_id):
+        """
+        function to get a sub district with its ancestors loaded.
+
+        :param `sub_district_id` is integer id of sub district.
+        :return `SubDistrict` instance, shared between the callers.
+        """
+        version = self.get_version()
+
+        with self.lock:
+            entry = self.entries.get(sub_district_id)
+            if entry is not None and entry[0] == version:
+                self.entries.move_to_end(sub_district_id)
+                return entry[1]
+
+        cache = get_cache()
+        key = HIERARCHY_KEY % {'version': version, 'sub_district_id': sub_district_id}
+        sub_district = cache.get(key)
+        if sub_district is None:
+            sub_district = self.fetch(sub_district_id)
+            cache.set(key, sub_district, timeout=self.timeout)
+
+        with self.lock:
+            self.entries[sub_district_id] = (version, sub_district)
+            self.entries.move_to_end(sub_district_id)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return sub_district
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.version = None
+
+
+hierarchy_cache = HierarchyCache()
+hierarchy_changed.connect(bump_hierarchy_version,
+                          dispatch_uid='django_address_hierarchy_version')
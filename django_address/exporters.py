@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import csv
+import sys
+import gzip
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import (Province, SubDistrict)
+
+DEFAULT_CHUNK_SIZE = 2000
+FORMATS = ('csv', 'jsonl', 'fixture')
+
+
+def get_export_columns(model):
+    """
+    function to get the concrete columns of a model,
+    eg: ['id', 'province_id', 'name', ...]
+    """
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def iter_rows(queryset, columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to iterate the rows as tuples, with a server-side
+    cursor where the database supports it.
+    """
+    return queryset.order_by('pk').values_list(*columns).iterator(chunk_size=chunk_size)
+
+
+def open_output(path=None, compress=False, stdout=None):
+    """
+    function to open the text stream to export into.
+
+    :param `path` is string path of the file, None or '-' for stdout.
+    :param `compress` is boolean to write gzip.
+    :param `stdout` is the text stream used for stdout, default `sys.stdout`.
+    :return a text stream, to be closed by the caller.
+    """
+    if not path or path == '-':
+        if compress:
+            binary = getattr(stdout or sys.stdout, 'buffer', None) or sys.stdout.buffer
+            return io.TextIOWrapper(gzip.GzipFile(fileobj=binary, mode='wb'),
+                                    encoding='utf-8', newline='')
+        return stdout or sys.stdout
+
+    if compress:
+        return gzip.open(path, 'wt', encoding='utf-8', newline='')
+    return io.open(path, 'w', encoding='utf-8', newline='')
+
+
+def write_csv(stream, columns, rows):
+    """
+    function to write the rows as csv with a header,
+    the lists and dicts (eg: `Country.states`) are written as json.
+    :return integer number of rows.
+    """
+    encoder = DjangoJSONEncoder()
+    writer = csv.writer(stream)
+    writer.writerow(columns)
+
+    total = 0
+    for row in rows:
+        writer.writerow([encoder.encode(value) if isinstance(value, (list, dict)) else value
+                         for value in row])
+        total += 1
+    return total
+
+
+def write_jsonl(stream, columns, rows):
+    """
+    function to write the rows as one json object per line.
+    :return integer number of rows.
+    """
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    total = 0
+    for row in rows:
+        stream.write(encoder.encode(dict(zip(columns, row))))
+        stream.write('\n')
+        total += 1
+    return total
+
+
+def write_fixture(stream, country, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to write the published provinces, districts and sub districts
+    of a country in the `addresses.json` format of `create_address`,
+    the postal rows are streamed grouped by province.
+
+    :param `stream` is text stream to write into.
+    :param `country` is `Country` instance.
+    :return integer number of postal rows.
+    """
+    dumps = json.dumps
+    stream.write('{"country": %s, "provinces": {' % dumps(country.name))
+
+    provinces = Province.objects.published().filter(country=country)
+    for index, (province_id, name) in enumerate(iter_rows(provinces, ('id', 'name'), chunk_size)):
+        stream.write('%s%s: {"province_name": %s}' % (',' if index else '',
+                                                      dumps(str(province_id)), dumps(name)))
+    stream.write('}, "postals": {')
+
+    sub_districts = SubDistrict.objects.published()\
+                                       .filter(country=country,
+                                               province__deleted_at__isnull=True,
+                                               district__deleted_at__isnull=True)\
+                                       .order_by('province_id', 'district_id', 'id')\
+                                       .values_list('province_id', 'district__name',
+                                                    'name', 'postal_code')
+
+    total = 0
+    current_province_id = None
+    for province_id, district_name, name, postal_code in sub_districts.iterator(chunk_size=chunk_size):
+        if province_id != current_province_id:
+            if current_province_id is not None:
+                stream.write('], ')
+            stream.write('%s: [' % dumps(str(province_id)))
+            current_province_id = province_id
+        else:
+            stream.write(', ')
+
+        stream.write(dumps({'city': district_name, 'sub_district': name,
+                            'postal_code': postal_code}))
+        total += 1
+
+    if current_province_id is not None:
+        stream.write(']')
+    stream.write('}}\n')
+    return total
@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+import threading
+from operator import itemgetter
+
+from django.db.models import (Q, F, Case, When, Value, CharField)
+from django.db.models.functions import (Cast, Coalesce, Concat)
+from django.utils.translation import get_language
+
+# order of the values in a row tuple.
+ROW_FIELDS = ('address', 'number', 'na', 'ca', 'village', 'sub_district',
+              'district', 'province', 'country', 'postal_code')
+
+# paths of the row values from an `AddressModel` queryset.
+ROW_PATHS = ('address', 'number', 'na', 'ca', 'village', 'sub_district__name',
+             'sub_district__district__name', 'sub_district__district__province__name',
+             'sub_district__district__province__country__name', 'sub_district__postal_code')
+
+LABEL_FIELDS = ('number', 'na', 'ca')
+PLACEHOLDER = re.compile(r'%\((\w+)\)s')
+DEFAULT_FORMAT = 'en'
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def compile_template(template, values, fields=ROW_FIELDS):
+    """
+    function to compile a `%(name)s` template into a positional pattern,
+    the `values` are substituted once and the other names are kept
+    as `%s` in the order of the template.
+
+    >>> compile_template('%(address)s, %(na_label)s.%(na)s', {'na_label': 'RT'})
+    ('%s, RT.%s', (0, 2))
+
+    :param `template` is string template.
+    :param `values` is dict of the constant values, eg: the labels.
+    :param `fields` is tuple of the names of the row values.
+    :return tuple of (string pattern, tuple of indexes in `fields`)
+    """
+    indexes = []
+
+    def replace(match):
+        name = match.group(1)
+        if name in values:
+            return str(values[name]).replace('%', '%%')
+        if name not in fields:
+            raise ValueError('Unknown name %r in address template %r' % (name, template))
+        indexes.append(fields.index(name))
+        return '%s'
+
+    return PLACEHOLDER.sub(replace, template), tuple(indexes)
+
+
+def split_template(template, values, fields=ROW_FIELDS):
+    """
+    function to split a `%(name)s` template into its constant parts and
+    the names of the row values, eg: to build the same string in SQL.
+
+    >>> split_template('%(address)s, %(na_label)s.%(na)s', {'na_label': 'RT'})
+    [(True, 'address'), (False, ', RT.'), (True, 'na')]
+
+    :return list of tuple (is name, constant string or name in `fields`),
+            in the order of the template.
+    """
+    parts = []
+    constant = []
+    position = 0
+    for match in PLACEHOLDER.finditer(template):
+        constant.append(template[position:match.start()].replace('%%', '%'))
+        position = match.end()
+        name = match.group(1)
+        if name in values:
+            constant.append(str(values[name]))
+            continue
+        if name not in fields:
+            raise ValueError('Unknown name %r in address template %r' % (name, template))
+        parts.extend([(False, ''.join(constant)), (True, name)])
+        constant = []
+    constant.append(template[position:].replace('%%', '%'))
+    parts.append((False, ''.join(constant)))
+    return [part for part in parts if part[1] != '']
+
+
+def get_getter(indexes):
+    """ function to get the values of indexes as tuple, also for one index. """
+    if len(indexes) == 1:
+        index = indexes[0]
+        return lambda values: (values[index],)
+    return itemgetter(*indexes)
+
+
+class AddressFormatter(object):
+    """
+    Formatter of the full address, the templates are compiled once per
+    model, language and `include_country`, then the addresses are
+    formatted with one `%` operation per row.
+
+    The missing `labels` are taken from the `verbose_name` of the fields,
+    translated to the active language.
+
+    >>> formatter = get_formatter('id')
+    >>> formatter.format(('Jl. Sudirman', 34, 4, 21, 'Sinduarjo', 'Ngaglik',
+    ...                   'Sleman', 'Yogyakarta', 'Indonesia', '55581'),
+    ...                  include_country=True)
+    'Jl. Sudirman No.34, RT.4/RW.21 Sinduarjo, Ngaglik, Sleman, Yogyakarta, Indonesia - 55581'
+    """
+    template = ('%(address)s%(number)s, %(na_label)s.%(na)s/%(ca_label)s.%(ca)s %(village)s, '
+                '%(sub_district)s, %(district)s, %(province)s%(country)s%(postal_code)s')
+    number_template = ' %(number_label)s.%(number)s'
+    country_template = ', %(country)s'
+    postal_code_template = ' - %(postal_code)s'
+    empty = '-'
+
+    def __init__(self, labels=None, template=None, number_template=None,
+                 country_template=None, postal_code_template=None, empty=None):
+        self.labels = dict(labels or {})
+        self.template = template or self.template
+        self.number_template = number_template or self.number_template
+        self.country_template = country_template or self.country_template
+        self.postal_code_template = postal_code_template or self.postal_code_template
+        if empty is not None:
+            self.empty = empty
+
+        self.lock = threading.Lock()
+        self.compiled = {}  # {(model, language, include_country): (...)}
+
+    def get_labels(self, model=None):
+        """
+        function to get the labels of number, na and ca.
+
+        :param `model` is the `AddressModel` subclass for the verbose names.
+        :return dict, eg: {'number_label': 'No', 'na_label': 'RT', 'ca_label': 'RW'}
+        """
+        from .models import AddressModel
+
+        opts = (model or AddressModel)._meta
+        return {'%s_label' % name: self.labels.get(name) or str(opts.get_field(name).verbose_name)
+                for name in LABEL_FIELDS}
+
+    def compile(self, model=None, include_country=False):
+        """
+        function to get the compiled patterns, cached by the model,
+        active language and `include_country`.
+        """
+        key = (model, get_language(), include_country)
+        compiled = self.compiled.get(key)
+        if compiled is not None:
+            return compiled
+
+        labels = self.get_labels(model)
+        pattern, indexes = compile_template(self.template, labels)
+        compiled = (
+            pattern,
+            get_getter(indexes),
+            compile_template(self.number_template, labels, ('number',))[0],
+            compile_template(self.country_template, labels, ('country',))[0] if include_country else '',
+            compile_template(self.postal_code_template, labels, ('postal_code',))[0],
+        )
+        with self.lock:
+            self.compiled[key] = compiled
+        return compiled
+
+    def get_expression(self, model=None, include_country=False):
+        """
+        function to get the SQL expression of the same full address as
+        `format_rows()`, from the templates, labels and `empty` value.
+
+        :param `model` is the `AddressModel` subclass for the verbose names.
+        :param `include_country` is boolean to include the country name.
+        :return `Concat` expression over the joined hierarchy.
+        :raise ValueError when a subclass formats the rows in python.
+        """
+        if type(self).format_rows is not AddressFormatter.format_rows:
+            raise ValueError('%s formats the addresses in python, use iter_full_addresses()'
+                             % type(self).__name__)
+        labels = self.get_labels(model)
+
+        def text(field): return Cast(field, output_field=CharField())
+
+        def empty(field): return Q(**{'%s__isnull' % field: True}) | Q(**{field: 0})
+
+        def concat(template, expressions):
+            parts = [expressions[part] if is_name else Value(part)
+                     for is_name, part in split_template(template, labels, tuple(expressions))]
+            if not parts:
+                return Value('')
+            if len(parts) == 1:
+                return parts[0]
+            return Concat(*parts, output_field=CharField())
+
+        postal_code = 'sub_district__postal_code'
+        country = Value('')
+        if include_country:
+            country = concat(self.country_template,
+                             {'country': F('sub_district__district__province__country__name')})
+
+        expressions = {
+            'address': F('address'),
+            'number': Case(When(empty('number'), then=Value('')),
+                           default=concat(self.number_template, {'number': text('number')}),
+                           output_field=CharField()),
+            'na': Case(When(empty('na'), then=Value(self.empty)), default=text('na'),
+                       output_field=CharField()),
+            'ca': Case(When(empty('ca'), then=Value(self.empty)), default=text('ca'),
+                       output_field=CharField()),
+            'village': Coalesce('village', Value('')),
+            'sub_district': F('sub_district__name'),
+            'district': F('sub_district__district__name'),
+            'province': F('sub_district__district__province__name'),
+            'country': country,
+            'postal_code': Case(When(Q(**{'%s__isnull' % postal_code: True}) |
+                                     Q(**{postal_code: ''}), then=Value('')),
+                                default=concat(self.postal_code_template,
+                                               {'postal_code': F(postal_code)}),
+                                output_field=CharField()),
+        }
+        return concat(self.template, expressions)
+
+    def format_rows(self, rows, include_country=False, model=None):
+        """
+        function to format many addresses.
+
+        :param `rows` is iterable of tuples ordered as `ROW_FIELDS`.
+        :param `include_country` is boolean to include the country name.
+        :param `model` is the `AddressModel` subclass for the verbose names.
+        :return generator of string.
+        """
+        pattern, getter, number_pattern, country_pattern, postal_code_pattern = \
+            self.compile(model, include_country)
+        empty = self.empty
+
+        for (address, number, na, ca, village, sub_district,
+             district, province, country, postal_code) in rows:
+            values = (address,
+                      number_pattern % number if number else '',
+                      na or empty,
+                      ca or empty,
+                      village or '',
+                      sub_district,
+                      district,
+                      province,
+                      country_pattern % country if country_pattern else '',
+                      postal_code_pattern % postal_code if postal_code else '')
+            yield pattern % getter(values)
+
+    def format(self, row, include_country=False, model=None):
+        """
+        function to format one address.
+
+        :param `row` is tuple ordered as `ROW_FIELDS`.
+        :return string of full address.
+        """
+        return next(self.format_rows((row,), include_country, model))
+
+    def clear(self):
+        with self.lock:
+            self.compiled.clear()
+
+
+formatters = {}
+
+
+def register_formatter(name, formatter):
+    """
+    function to register the formatter of a `format_address` name.
+
+    >>> register_formatter('my', AddressFormatter(labels={'number': 'No'}))
+    >>> profile.get_full_address(format_address='my')
+    """
+    formatters[name] = formatter
+    return formatter
+
+
+def get_formatter(format_address=DEFAULT_FORMAT):
+    """
+    function to get the registered formatter,
+    the unknown names use the default formatter.
+    :return `AddressFormatter` instance.
+    """
+    formatter = formatters.get(format_address)
+    if formatter is None:
+        formatter = formatters[DEFAULT_FORMAT]
+    return formatter
+
+
+def iter_full_addresses(addresses, format_address=DEFAULT_FORMAT,
+                        include_country=False, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to format the full addresses of a queryset,
+    the rows are fetched with one query as tuples.
+
+    >>> for full_address in iter_full_addresses(Profile.objects.all(), 'id'):
+    ...     print(full_address)
+
+    :param `addresses` is queryset of `AddressModel` subclass.
+    :return generator of string, in the order of the queryset.
+    """
+    paths = list(ROW_PATHS)
+    if not include_country:
+        # skip the join of the country table.
+        paths[ROW_FIELDS.index('country')] = Value(None, output_field=CharField())
+
+    rows = addresses.values_list(*paths).iterator(chunk_size=chunk_size)
+    return get_formatter(format_address).format_rows(
+        rows, include_country=include_country, model=addresses.model)
+
+
+register_formatter('en', AddressFormatter())
+register_formatter('id', AddressFormatter(labels={'number': 'No', 'na': 'RT', 'ca': 'RW'}))
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django import forms
+from django.urls import reverse
+from django.utils.translation import ugettext_lazy as _
+
+from .models import SubDistrict
+
+# the levels of the chained selects, with their url name of `django_address.urls`.
+LEVELS = (
+    ('country', _('Country'), 'django_address:countries'),
+    ('province', _('Province'), 'django_address:provinces'),
+    ('district', _('District'), 'django_address:districts'),
+    ('sub_district', _('Sub District'), 'django_address:sub_districts'),
+)
+
+
+class ChainedSubDistrictWidget(forms.Widget):
+    """
+    Widget of chained Country -> Province -> District -> SubDistrict selects,
+    each level is loaded on demand from the json urls of `django_address.urls`,
+    only the selected path is rendered with the form.
+
+    :param `country` is integer id of the country to list the provinces of,
+                     None to choose the country too.
+    """
+    template_name = 'django_address/widgets/chained_select.html'
+
+    class Media:
+        js = ('django_address/js/chained_select.js',)
+
+    def __init__(self, attrs=None, country=None):
+        super(ChainedSubDistrictWidget, self).__init__(attrs)
+        self.country = country
+
+    def get_selected(self, value):
+        """
+        function to get the selected path of a sub district, with one query.
+        :return list of tuple (id, name) of each level, or empty list.
+        """
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return []
+        selected = SubDistrict.objects.filter(pk=value).values_list(
+            'district__province__country_id', 'district__province__country__name',
+            'district__province_id', 'district__province__name',
+            'district_id', 'district__name', 'id', 'name').first()
+        if selected is None:
+            return []
+        return list(zip(selected[::2], selected[1::2]))
+
+    def get_levels(self, value):
+        """
+        function to get the context of each select.
+        :return list of dict {'name', 'label', 'url', 'selected'},
+                the `url` has `{id}` to be replaced by the parent id.
+        """
+        selected = self.get_selected(value)
+        levels = []
+        for index, (name, label, url_name) in enumerate(LEVELS):
+            if index == 0:
+                url = reverse(url_name)
+            else:
+                url = reverse(url_name, args=[0]).replace('/0/', '/{id}/')
+            levels.append({'name': name, 'label': label, 'url': url,
+                           'selected': selected[index] if selected else None})
+
+        if self.country is not None:
+            # the provinces of the country are listed without its select.
+            levels = levels[1:]
+            levels[0]['url'] = levels[0]['url'].replace('{id}', str(self.country))
+        return levels
+
+    def get_context(self, name, value, attrs):
+        context = super(ChainedSubDistrictWidget, self).get_context(name, value, attrs)
+        context['widget']['levels'] = self.get_levels(value)
+        return context
+
+    def format_value(self, value):
+        if value is None or value == '':
+            return None
+        return str(value)
+
+
+class SubDistrictChoiceField(forms.ModelChoiceField):
+    """
+    Form field of `AddressModel.sub_district` with the chained selects,
+    the submitted id of a published sub district, in a published district
+    and province, is validated with one lookup by primary key instead of
+    listing every sub district.
+
+    >>> class ProfileForm(forms.ModelForm):
+    ...     class Meta:
+    ...         model = Profile
+    ...         fields = ('name', 'sub_district', 'address')
+    ...         field_classes = {'sub_district': SubDistrictChoiceField}
+    """
+    widget = ChainedSubDistrictWidget
+
+    def __init__(self, queryset=None, country=None, **kwargs):
+        if queryset is None:
+            queryset = SubDistrict.objects.all()
+        # the `field_classes` of a ModelForm give the default manager,
+        # only the sub districts offered by the selects are valid.
+        queryset = queryset.filter(deleted_at__isnull=True,
+                                   district__deleted_at__isnull=True,
+                                   province__deleted_at__isnull=True)
+        if country is not None:
+            kwargs['widget'] = ChainedSubDistrictWidget(country=country)
+        super(SubDistrictChoiceField, self).__init__(queryset, **kwargs)
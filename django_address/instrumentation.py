@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import time
+import logging
+import functools
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('django_address.instrumentation')
+
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+# the backend of the settings, loaded on the first instrumented call.
+backend = None
+backend_loaded = False
+
+# the recorder of the current request, set by `AddressInstrumentationMiddleware`.
+current_recorder = contextvars.ContextVar('django_address_recorder', default=None)
+
+
+class InstrumentationBackend(object):
+    """
+    Interface of the metrics backends, eg: to send them into statsd
+
+    >>> class StatsdBackend(InstrumentationBackend):
+    ...     def timing(self, name, seconds, tags=None):
+    ...         statsd.timing('address.%s' % name, seconds * 1000)
+    ...     def incr(self, name, value=1, tags=None):
+    ...         statsd.incr('address.%s' % name, value)
+
+    settings:
+        DJANGO_ADDRESS_INSTRUMENTATION_BACKEND = 'myapp.metrics.StatsdBackend'
+    """
+
+    def timing(self, name, seconds, tags=None):
+        """ function to record the duration of a section, eg: 'get_full_address' """
+
+    def incr(self, name, value=1, tags=None):
+        """ function to increment a counter, eg: 'get_full_address.queries' """
+
+
+class LoggingBackend(InstrumentationBackend):
+    """ backend to write the metrics into the `django_address.instrumentation` logger. """
+
+    def timing(self, name, seconds, tags=None):
+        logger.debug('%s took %.3fms %s', name, seconds * 1000, tags or '')
+
+    def incr(self, name, value=1, tags=None):
+        logger.debug('%s +%s %s', name, value, tags or '')
+
+
+class MemoryBackend(InstrumentationBackend):
+    """ backend to keep the metrics in memory, eg: for the tests. """
+
+    def __init__(self):
+        self.timings = {}       # {name: [seconds, ...]}
+        self.counters = {}      # {name: value}
+
+    def timing(self, name, seconds, tags=None):
+        self.timings.setdefault(name, []).append(seconds)
+
+    def incr(self, name, value=1, tags=None):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+
+def get_backend():
+    """
+    function to get the instrumentation backend of the settings,
+    :return `InstrumentationBackend` instance or None when it's disabled.
+    """
+    global backend, backend_loaded
+    if not backend_loaded:
+        path = getattr(settings, 'DJANGO_ADDRESS_INSTRUMENTATION_BACKEND', None)
+        backend = import_string(path)() if path else None
+        backend_loaded = True
+    return backend
+
+
+def set_backend(instance):
+    """
+    function to plug a backend instance instead of the settings,
+    eg: set_backend(MemoryBackend()), or set_backend(None) to disable it.
+    """
+    global backend, backend_loaded
+    backend = instance
+    backend_loaded = True
+
+
+def reset_backend(setting=None, **kwargs):
+    """ function to reload the backend from the settings on the next call. """
+    global backend, backend_loaded
+    if setting is None or setting == 'DJANGO_ADDRESS_INSTRUMENTATION_BACKEND':
+        backend = None
+        backend_loaded = False
+
+
+setting_changed.connect(reset_backend, dispatch_uid='django_address_instrumentation')
+
+
+class RequestRecorder(object):
+    """
+    Recorder of the instrumented sections of one request, the queries
+    of the outermost sections are kept to find the N+1 patterns.
+    """
+
+    def __init__(self):
+        self.sections = {}      # {name: [calls, seconds, queries]}
+        self.statements = {}    # {sql: count}
+        self.queries = 0
+        self.depth = 0
+
+    def add_query(self, sql):
+        self.queries += 1
+        self.statements[sql] = self.statements.get(sql, 0) + 1
+
+    def add_section(self, name, seconds, queries):
+        section = self.sections.setdefault(name, [0, 0.0, 0])
+        section[0] += 1
+        section[1] += seconds
+        section[2] += queries
+
+    def get_n_plus_one(self, threshold=None):
+        """
+        function to get the statements repeated at least `threshold` times.
+        :return list of tuple (count, sql), the most repeated first.
+        """
+        if threshold is None:
+            threshold = getattr(settings, 'DJANGO_ADDRESS_N_PLUS_ONE_THRESHOLD',
+                                DEFAULT_N_PLUS_ONE_THRESHOLD)
+        return sorted(((count, sql) for sql, count in self.statements.items()
+                       if count >= threshold), reverse=True)
+
+
+@contextmanager
+def measure(name, tags=None):
+    """
+    context manager to time a section and count its queries,
+    they are sent to the backend and the recorder of the request.
+
+    >>> with measure('create_address.countries'):
+    ...     bulk_load_countries(...)
+    """
+    current_backend = get_backend()
+    recorder = current_recorder.get()
+    # the nested sections don't record the queries twice.
+    outermost = recorder is not None and recorder.depth == 0
+    counter = [0]
+
+    def execute(execute, sql, params, many, context):
+        counter[0] += 1
+        if outermost:
+            recorder.add_query(sql)
+        return execute(sql, params, many, context)
+
+    if recorder is not None:
+        recorder.depth += 1
+    started = time.perf_counter()
+    try:
+        with connection.execute_wrapper(execute):
+            yield
+    finally:
+        seconds = time.perf_counter() - started
+        if recorder is not None:
+            recorder.depth -= 1
+            recorder.add_section(name, seconds, counter[0])
+        if current_backend is not None:
+            current_backend.timing(name, seconds, tags)
+            current_backend.incr('%s.queries' % name, counter[0], tags)
+
+
+def instrumented(name):
+    """
+    decorator to `measure()` every call of a function, it costs two
+    lookups when there's no backend and no recorded request.
+
+    >>> @instrumented('loader.flush_provinces')
+    ... def flush_provinces(self):
+    """
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            current_backend = backend if backend_loaded else get_backend()
+            if current_backend is None and current_recorder.get() is None:
+                return function(*args, **kwargs)
+            with measure(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class AddressInstrumentationMiddleware(object):
+    """
+    Middleware to report the queries made by the instrumented sections
+    of each request, and to warn about the N+1 patterns, eg: the
+    `get_full_address()` of a list without `select_related()`.
+
+    settings:
+        MIDDLEWARE = [..., 'django_address.instrumentation.AddressInstrumentationMiddleware']
+        DJANGO_ADDRESS_N_PLUS_ONE_THRESHOLD = 5
+
+    With `DEBUG = True` the response has the `X-Address-Queries` header.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = RequestRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        self.report(request, response, recorder)
+        return response
+
+    def report(self, request, response, recorder):
+        if not recorder.sections:
+            return
+
+        patterns = recorder.get_n_plus_one()
+        for count, sql in patterns:
+            logger.warning('N+1 queries in %s: %s x %s', request.path, count, sql)
+
+        current_backend = get_backend()
+        if current_backend is not None:
+            current_backend.incr('request.queries', recorder.queries)
+            if patterns:
+                current_backend.incr('request.n_plus_one', len(patterns))
+
+        if settings.DEBUG:
+            response['X-Address-Queries'] = str(recorder.queries)
@@ -0,0 +1,457 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.utils import timezone
+
+from .models import (Country, Province, District, SubDistrict, get_path)
+from .instrumentation import instrumented
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+@instrumented('loader.bulk_load_countries')
+def bulk_load_countries(countries_list, countries_code_list, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    function to write the countries with batched `bulk_create`,
+    the codes are merged in memory instead of one UPDATE per country.
+
+    :param `countries_list` is iterable of dict from `countries.json`.
+    :param `countries_code_list` is iterable of dict from `countries-code.json`.
+    :param `batch_size` is integer size of each insert batch.
+    :return list of created countries.
+    """
+    codes = {}
+    for country_data in countries_code_list:
+        name = country_data.get('name')
+        if name:
+            codes[name.lower()] = country_data
+
+    now = timezone.now()
+    created, batch, seen = [], [], set()
+    for country_data in countries_list:
+        name = country_data.get('country')
+        if not name or name in seen:
+            continue
+        seen.add(name)
+
+        code_data = codes.get(name.lower(), {})
+        batch.append(Country(name=name,
+                             states=country_data.get('states') or [],
+                             code=code_data.get('code'),
+                             phone_code=code_data.get('phone_code'),
+                             currency_code=code_data.get('currency_code'),
+                             deleted_at=now))
+        if len(batch) >= batch_size:
+            created.extend(Country.objects.bulk_create(batch))
+            batch = []
+
+    if batch:
+        created.extend(Country.objects.bulk_create(batch))
+    return created
+
+
+class BulkAddressLoader(object):
+    """
+    Loader to write the provinces, districts and sub districts
+    of one country with batched `bulk_create`.
+
+    Rows are deduplicated in memory and the new ids are resolved
+    in bulk, so the database round trips only grow per batch.
+    The postal rows are expected to be grouped by province, only the
+    rows of current province are kept to deduplicate the sub districts,
+    so the memory stays flat while the rows are streamed.
+
+    >>> loader = BulkAddressLoader(country, batch_size=1000)
+    >>> loader.add_province('34', 'Yogyakarta')
+    >>> loader.add_postal('34', 'Sleman', 'Ngaglik', '55581')
+    >>> loader.flush()
+    """
+
+    def __init__(self, country, batch_size=DEFAULT_BATCH_SIZE):
+        self.country = country
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+
+        self.province_names = {}     # {province_code: province_name}
+        self.province_ids = {}       # {province_name: province_id}
+        self.district_ids = {}       # {(province_id, district_name): district_id}
+        self.sub_district_keys = set()
+        self.current_province_code = None
+
+        self.pending_provinces = []
+        self.pending_districts = set()
+        self.pending_sub_districts = []
+        self.counts = {'provinces': 0, 'districts': 0, 'sub_districts': 0}
+
+    def add_province(self, code, name):
+        """
+        function to queue a province of current country.
+
+        :param `code` is string province code used by the postal rows.
+        :param `name` is string name of province.
+        """
+        self.province_names[code] = name
+        if name not in self.province_ids and name not in self.pending_provinces:
+            self.pending_provinces.append(name)
+
+    def add_postal(self, province_code, district_name, sub_district_name, postal_code):
+        """
+        function to queue a district and sub district of a province.
+
+        :param `province_code` is string province code from `add_province`.
+        :param `district_name` is string name of district (city).
+        :param `sub_district_name` is string name of sub district.
+        :param `postal_code` is string postal code of sub district.
+        """
+        if province_code != self.current_province_code:
+            self.current_province_code = province_code
+            self.sub_district_keys = set()
+
+        key = (province_code, district_name, sub_district_name, postal_code)
+        if key in self.sub_district_keys:
+            return
+        self.sub_district_keys.add(key)
+
+        self.pending_districts.add((province_code, district_name))
+
+        self.pending_sub_districts.append(key)
+        if len(self.pending_sub_districts) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """ function to write all queued rows. """
+        self.flush_provinces()
+        self.flush_districts()
+        self.flush_sub_districts()
+
+    @instrumented('loader.flush_provinces')
+    def flush_provinces(self):
+        if not self.pending_provinces:
+            return
+
+        provinces = [Province(country=self.country, name=name)
+                     for name in self.pending_provinces]
+        created = Province.objects.bulk_create(provinces, batch_size=self.batch_size)
+        self.counts['provinces'] += len(created)
+
+        if all(province.pk for province in created):
+            self.province_ids.update((p.name, p.pk) for p in created)
+        else:
+            queryset = Province.objects.filter(country=self.country,
+                                               name__in=self.pending_provinces)
+            self.province_ids.update(queryset.values_list('name', 'id'))
+        self.pending_provinces = []
+
+    def get_province_id(self, province_code):
+        return self.province_ids.get(self.province_names.get(province_code))
+
+    @instrumented('loader.flush_districts')
+    def flush_districts(self):
+        keys = set()
+        for province_code, district_name in self.pending_districts:
+            key = (self.get_province_id(province_code), district_name)
+            if key not in self.district_ids:
+                keys.add(key)
+        self.pending_districts = set()
+        if not keys:
+            return
+
+        districts = [District(province_id=province_id, name=name)
+                     for province_id, name in keys]
+        created = District.objects.bulk_create(districts, batch_size=self.batch_size)
+        self.counts['districts'] += len(created)
+
+        if all(district.pk for district in created):
+            self.district_ids.update(((d.province_id, d.name), d.pk) for d in created)
+        else:
+            queryset = District.objects.filter(province_id__in={k[0] for k in keys},
+                                               name__in={k[1] for k in keys})
+            self.district_ids.update(((province_id, name), pk) for pk, province_id, name
+                                     in queryset.values_list('id', 'province_id', 'name'))
+
+    @instrumented('loader.flush_sub_districts')
+    def flush_sub_districts(self):
+        if not self.pending_sub_districts:
+            return
+
+        sub_districts = []
+        for province_code, district_name, name, postal_code in self.pending_sub_districts:
+            province_id = self.get_province_id(province_code)
+            district_id = self.district_ids[(province_id, district_name)]
+            path = get_path(name, district_name, self.province_names[province_code],
+                            self.country.name)
+            sub_districts.append(SubDistrict(district_id=district_id, province_id=province_id,
+                                             country_id=self.country.pk, name=name,
+                                             postal_code=postal_code, path=path))
+
+        SubDistrict.objects.bulk_create(sub_districts, batch_size=self.batch_size)
+        self.counts['sub_districts'] += len(sub_districts)
+        self.pending_sub_districts = []
+
+
+def chunked(items, size):
+    items = list(items)
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def set_deleted_at(queryset, ids, deleted_at, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    function to soft-delete (or restore when `deleted_at` is None)
+    the objects with set-based UPDATEs.
+
+    :return integer number of updated rows.
+    """
+    updated = 0
+    for batch_ids in chunked(ids, batch_size):
+        updated += queryset.filter(id__in=batch_ids).update(deleted_at=deleted_at)
+    return updated
+
+
+@instrumented('loader.sync_countries')
+def sync_countries(countries_list, countries_code_list, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    function to sync the countries on their name, only the changed
+    countries are written and the missing countries are soft-deleted.
+
+    :param `countries_list` is iterable of dict from `countries.json`.
+    :param `countries_code_list` is iterable of dict from `countries-code.json`.
+    :param `batch_size` is integer size of each write batch.
+    :return dict of counts.
+    """
+    codes = {}
+    for country_data in countries_code_list:
+        name = country_data.get('name')
+        if name:
+            codes[name.lower()] = country_data
+
+    now = timezone.now()
+    existing = {country.name: country for country in Country.objects.all()}
+    fields = ('states', 'code', 'phone_code', 'currency_code')
+    created, updated, seen = [], [], set()
+
+    for country_data in countries_list:
+        name = country_data.get('country')
+        if not name or name in seen:
+            continue
+        seen.add(name)
+
+        code_data = codes.get(name.lower(), {})
+        values = {'states': country_data.get('states') or [],
+                  'code': code_data.get('code'),
+                  'phone_code': code_data.get('phone_code'),
+                  'currency_code': code_data.get('currency_code')}
+
+        country = existing.get(name)
+        if country is None:
+            created.append(Country(name=name, deleted_at=now, **values))
+        elif any(getattr(country, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(country, field, values[field])
+            updated.append(country)
+
+    Country.objects.bulk_create(created, batch_size=batch_size)
+    Country.objects.bulk_update(updated, fields, batch_size=batch_size)
+
+    deleted_ids = [country.id for name, country in existing.items()
+                   if name not in seen and country.deleted_at is None]
+    deleted = set_deleted_at(Country.objects.all(), deleted_ids, now, batch_size)
+    return {'created': len(created), 'updated': len(updated), 'deleted': deleted}
+
+
+class SyncAddressLoader(object):
+    """
+    Loader to sync the provinces, districts and sub districts of one
+    country on their natural keys, instead of deleting everything:
+
+        province     : (country, name)
+        district     : (province, name)
+        sub district : (district, name, postal_code)
+
+    New rows are inserted, the soft-deleted rows which come back are
+    restored and the rows which are gone from the fixture are soft-deleted,
+    so the `AddressModel` rows pointing at them are kept.
+    The postal rows should be grouped by province, only the sub districts
+    of current province are kept in memory.
+
+    >>> loader = SyncAddressLoader(country, batch_size=1000)
+    >>> loader.add_province('34', 'Yogyakarta')
+    >>> loader.add_postal('34', 'Sleman', 'Ngaglik', '55581')
+    >>> loader.finish()
+    """
+
+    def __init__(self, country, batch_size=DEFAULT_BATCH_SIZE):
+        self.country = country
+        self.batch_size = batch_size or DEFAULT_BATCH_SIZE
+        self.now = timezone.now()
+
+        self.provinces = {}          # {province_name: [province_id, deleted_at]}
+        self.districts = {}          # {(province_id, district_name): [district_id, deleted_at]}
+        self.province_names = {}     # {province_code: province_name}
+        self.seen_provinces = set()
+        self.seen_districts = set()
+        self.synced_province_ids = set()
+
+        self.current_province_id = None
+        self.sub_districts = {}      # {(district_id, name, postal_code): [id, deleted_at]}
+        self.seen_sub_districts = set()
+        self.pending_sub_districts = []
+
+        self.counts = {'created': 0, 'restored': 0, 'deleted': 0}
+
+        queryset = Province.objects.filter(country=country)
+        for pk, name, deleted_at in queryset.values_list('id', 'name', 'deleted_at'):
+            self.provinces.setdefault(name, [pk, deleted_at])
+
+        queryset = District.objects.filter(province__country=country)
+        for pk, province_id, name, deleted_at in queryset.values_list(
+                'id', 'province_id', 'name', 'deleted_at'):
+            self.districts.setdefault((province_id, name), [pk, deleted_at])
+
+    def restore(self, model, entry):
+        if entry[1] is not None:
+            model.objects.filter(id=entry[0]).update(deleted_at=None)
+            entry[1] = None
+            self.counts['restored'] += 1
+
+    def add_province(self, code, name):
+        """
+        function to sync a province of current country.
+
+        :param `code` is string province code used by the postal rows.
+        :param `name` is string name of province.
+        """
+        self.province_names[code] = name
+        self.seen_provinces.add(name)
+
+        entry = self.provinces.get(name)
+        if entry is None:
+            province = Province.objects.create(country=self.country, name=name)
+            self.provinces[name] = [province.id, None]
+            self.counts['created'] += 1
+        else:
+            self.restore(Province, entry)
+
+    def get_district_id(self, province_id, name):
+        key = (province_id, name)
+        self.seen_districts.add(key)
+
+        entry = self.districts.get(key)
+        if entry is None:
+            district = District.objects.create(province_id=province_id, name=name)
+            entry = self.districts[key] = [district.id, None]
+            self.counts['created'] += 1
+        else:
+            self.restore(District, entry)
+        return entry[0]
+
+    def add_postal(self, province_code, district_name, sub_district_name, postal_code):
+        """
+        function to sync a district and sub district of a province.
+
+        :param `province_code` is string province code from `add_province`.
+        :param `district_name` is string name of district (city).
+        :param `sub_district_name` is string name of sub district.
+        :param `postal_code` is string postal code of sub district.
+        """
+        province_id = self.provinces[self.province_names[province_code]][0]
+        if province_id != self.current_province_id:
+            self.start_province(province_id)
+
+        district_id = self.get_district_id(province_id, district_name)
+        key = (district_id, sub_district_name, postal_code)
+        if key in self.seen_sub_districts:
+            return
+        self.seen_sub_districts.add(key)
+
+        entry = self.sub_districts.get(key)
+        if entry is None:
+            path = get_path(sub_district_name, district_name,
+                            self.province_names[province_code], self.country.name)
+            self.pending_sub_districts.append(SubDistrict(district_id=district_id,
+                                                          province_id=province_id,
+                                                          country_id=self.country.pk,
+                                                          name=sub_district_name,
+                                                          postal_code=postal_code,
+                                                          path=path))
+            if len(self.pending_sub_districts) >= self.batch_size:
+                self.flush_sub_districts()
+        elif entry[1] is not None:
+            # restored in bulk when the province is finished.
+            entry[1] = False
+
+    def start_province(self, province_id):
+        self.finish_province()
+        if province_id in self.synced_province_ids:
+            raise ValueError('The postals of a province should be grouped together.')
+
+        self.current_province_id = province_id
+        self.synced_province_ids.add(province_id)
+        queryset = SubDistrict.objects.filter(district__province_id=province_id)
+        for pk, district_id, name, postal_code, deleted_at in queryset.values_list(
+                'id', 'district_id', 'name', 'postal_code', 'deleted_at'):
+            self.sub_districts.setdefault((district_id, name, postal_code), [pk, deleted_at])
+
+    @instrumented('loader.flush_sub_districts')
+    def flush_sub_districts(self):
+        SubDistrict.objects.bulk_create(self.pending_sub_districts, batch_size=self.batch_size)
+        self.counts['created'] += len(self.pending_sub_districts)
+        self.pending_sub_districts = []
+
+    @instrumented('loader.finish_province')
+    def finish_province(self):
+        if self.current_province_id is None:
+            return
+        self.flush_sub_districts()
+
+        restored_ids, deleted_ids = [], []
+        for key, (pk, deleted_at) in self.sub_districts.items():
+            if deleted_at is False:
+                restored_ids.append(pk)
+            elif key not in self.seen_sub_districts and deleted_at is None:
+                deleted_ids.append(pk)
+
+        queryset = SubDistrict.objects.all()
+        self.counts['restored'] += set_deleted_at(queryset, restored_ids, None, self.batch_size)
+        self.counts['deleted'] += set_deleted_at(queryset, deleted_ids, self.now, self.batch_size)
+
+        self.current_province_id = None
+        self.sub_districts = {}
+        self.seen_sub_districts = set()
+
+    @instrumented('loader.finish')
+    def finish(self):
+        """ function to soft-delete everything which is gone from the fixture. """
+        self.finish_province()
+
+        deleted_ids = [pk for key, (pk, deleted_at) in self.districts.items()
+                       if key not in self.seen_districts and deleted_at is None]
+        self.counts['deleted'] += set_deleted_at(District.objects.all(), deleted_ids,
+                                                 self.now, self.batch_size)
+
+        deleted_ids = [pk for name, (pk, deleted_at) in self.provinces.items()
+                       if name not in self.seen_provinces and deleted_at is None]
+        self.counts['deleted'] += set_deleted_at(Province.objects.all(), deleted_ids,
+                                                 self.now, self.batch_size)
+
+        # sub districts of the provinces without any postal rows.
+        queryset = SubDistrict.objects.filter(district__province__country=self.country,
+                                              deleted_at__isnull=True)\
+                                      .exclude(district__province_id__in=self.synced_province_ids)
+        self.counts['deleted'] += queryset.update(deleted_at=self.now)
+
+
+def feed_provinces(loader, provinces):
+    """
+    function to feed the parsed provinces of one country into a loader,
+    it still needs to be flushed / finished.
+
+    :param `loader` is `BulkAddressLoader` or `SyncAddressLoader` instance.
+    :param `provinces` is dict of {province: [(city, sub_district, postal_code), ...]}
+    :return the loader.
+    """
+    for province_name in provinces:
+        loader.add_province(province_name, province_name)
+    for province_name, sub_districts in provinces.items():
+        for district_name, sub_district_name, postal_code in sub_districts:
+            loader.add_postal(province_name, district_name, sub_district_name, postal_code)
+    return loader
@@ -4,12 +4,22 @@ import os
 import sys
 import json
 
+from django.db import transaction
 from django.utils import timezone
-from django.core.management.base import BaseCommand
+from django.core.management.base import (BaseCommand, CommandError)
 from django.utils.translation import ugettext_lazy as _
 
-from django_address.models import (Country, Province,
-                                   District, SubDistrict)
+from django_address.models import (Country, Province, District,
+                                   SubDistrict, FixtureChecksum)
+from django_address.loaders import (DEFAULT_BATCH_SIZE, BulkAddressLoader,
+                                    SyncAddressLoader, bulk_load_countries,
+                                    sync_countries)
+from django_address.utils import get_file_checksum
+from django_address.instrumentation import instrumented
+from django_address.signals import (deferred_hierarchy_changed,
+                                    send_hierarchy_changed)
+from django_address.readers import (iter_addresses, iter_countries,
+                                    iter_countries_code)
 
 MANAGEMENT_DIR = os.path.dirname(os.path.dirname(__file__))
 DJANGO_ADDRESS_PATH = '/'.join(MANAGEMENT_DIR.split('/')[:-1])
@@ -20,6 +30,9 @@ class Command(BaseCommand):
     Command to generate an initial address.
 
     ./manage.py create_address
+    ./manage.py create_address --bulk=true --batch-size=5000
+    ./manage.py create_address --bulk=true --source=/path/to/addresses.json
+    ./manage.py create_address --sync=true
     """
 
     help = _('Command to generate an initial address')
@@ -29,16 +42,61 @@ class Command(BaseCommand):
                             help=_('Language code of country'))
         parser.add_argument('-show-print', '--show-print', default=False,
                             help=_('To show the print or not'))
+        parser.add_argument('-bulk', '--bulk', default=False,
+                            help=_('To load the data with batched inserts or not'))
+        parser.add_argument('-batch-size', '--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help=_('Number of rows per insert batch in bulk mode'))
+        parser.add_argument('-source', '--source', default=None,
+                            help=_('Path of a custom addresses.json to load'))
+        parser.add_argument('-sync', '--sync', default=False,
+                            help=_('To sync only the changes instead of deleting everything'))
+        parser.add_argument('-force', '--force', default=False,
+                            help=_('To sync the fixtures even when they are unchanged'))
         return parser
 
+    def get_countries_paths(self):
+        """
+        function to get the countries and countries code fixture paths.
+        :return tuple of (countries_path, countries_code_path)
+        """
+        countries_path = os.path.join(DJANGO_ADDRESS_PATH, 'fixtures/countries.json')
+        countries_code_path = os.path.join(DJANGO_ADDRESS_PATH, 'fixtures/countries-code.json')
+        return (countries_path, countries_code_path)
+
+    def get_addresses_path(self, language='id', source=None):
+        """
+        function to get the addresses fixture path of a language,
+        exit when the language isn't available.
+
+        :param `language` is string language code / country code.
+        :param `source` is string path of a custom fixture, optional.
+        :return string path of `addresses.json`
+        """
+        if source:
+            if not os.path.exists(source):
+                raise CommandError(_('File "%(source)s" doesn\'t exist!') % {'source': source})
+            return source
+
+        language_path = 'fixtures/languages/%s/addresses.json' % language
+        addresses_path = os.path.join(DJANGO_ADDRESS_PATH, language_path)
+
+        if not os.path.exists(addresses_path):
+            print(_('[!] Language code "%(lang)s" doesn\'t available!') % {'lang': language})
+            print(_('[!] We really opened if you want to contribute and support your language.'))
+            print(_('[i] Please visit: "https://github.com/agusmakmun/django-address-model" to contribute.'))
+            sys.exit(0)
+
+        return addresses_path
+
+    @instrumented('create_address.create_countries')
     def create_countries(self, show_print=False):
         """
         function to sync the countries data.
 
         :param `show_print` is boolean to enable or disable the print out.
         """
-        countries_path = os.path.join(DJANGO_ADDRESS_PATH, 'fixtures/countries.json')
-        countries_code_path = os.path.join(DJANGO_ADDRESS_PATH, 'fixtures/countries-code.json')
+        countries_path, countries_code_path = self.get_countries_paths()
 
         # clear all countries
         Country.objects.all().delete()
@@ -47,7 +105,7 @@ class Command(BaseCommand):
         for country_data in countries_list:
             country, created = Country.objects.get_or_create(
                 name=country_data.get('country'),
-                states=json.dumps(country_data.get('states') or []),
+                states=country_data.get('states') or [],
                 deleted_at=timezone.now()
             )
 
@@ -56,7 +114,7 @@ class Command(BaseCommand):
 
         countries_code_list = json.load(open(countries_code_path))
         for country_data in countries_code_list:
-            countries = Country.objects.filter(name__iexact=country_data.get('name'))\
+            countries = Country.objects.by_name(country_data.get('name'))\
                                        .update(code=country_data.get('code'),
                                                phone_code=country_data.get('phone_code'),
                                                currency_code=country_data.get('currency_code'))
@@ -65,24 +123,18 @@ class Command(BaseCommand):
 
         return countries_list
 
-    def create_addresses(self, language='id', show_print=False):
+    @instrumented('create_address.create_addresses')
+    def create_addresses(self, language='id', show_print=False, source=None):
         """
         function to sync the address with province, district, and sub_district.
 
         :param `language` is string language code / country code.
         :param `show_print` is boolean to enable or disable the print out.
+        :param `source` is string path of a custom fixture, optional.
         """
-        language_path = 'fixtures/languages/%s/addresses.json' % language
-        addresses_path = os.path.join(DJANGO_ADDRESS_PATH, language_path)
-
-        if not os.path.exists(addresses_path):
-            print(_('[!] Language code "%(lang)s" doesn\'t available!') % {'lang': language})
-            print(_('[!] We really opened if you want to contribute and support your language.'))
-            print(_('[i] Please visit: "https://github.com/agusmakmun/django-address-model" to contribute.'))
-            sys.exit(0)
-
+        addresses_path = self.get_addresses_path(language, source)
         addresses_data = json.load(open(addresses_path))
-        country = Country.objects.get(name__iexact=addresses_data.get('country'))
+        country = Country.objects.by_name(addresses_data.get('country')).get()
 
         # clear all address
         SubDistrict.objects.all().delete()
@@ -116,6 +168,172 @@ class Command(BaseCommand):
                     print(_('[+] Created a %(district)s > %(sub_district)s') % {'district': district,
                                                                                 'sub_district': sub_district})
 
+    @instrumented('create_address.bulk_create_countries')
+    def bulk_create_countries(self, batch_size=DEFAULT_BATCH_SIZE, show_print=False):
+        """
+        function to load the countries data with batched inserts.
+
+        :param `batch_size` is integer size of each insert batch.
+        :param `show_print` is boolean to enable or disable the print out.
+        """
+        countries_path, countries_code_path = self.get_countries_paths()
+
+        # clear all countries
+        Country.objects.all().delete()
+
+        countries = bulk_load_countries(iter_countries(countries_path),
+                                        iter_countries_code(countries_code_path),
+                                        batch_size)
+
+        if show_print:
+            print(_('[+] Created %(total)s countries') % {'total': len(countries)})
+
+        return countries
+
+    def feed_addresses(self, addresses_path, loader_class, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        function to stream the records of `addresses.json` into a loader.
+
+        :param `addresses_path` is string path of the fixture.
+        :param `loader_class` is class of `BulkAddressLoader` or `SyncAddressLoader`.
+        :param `batch_size` is integer size of each write batch.
+        :return the loader, it still needs to be flushed / finished.
+        """
+        loader = None
+        provinces = []
+        for kind, province_code, data in iter_addresses(addresses_path):
+            if kind == 'country':
+                country = Country.objects.by_name(data).get()
+                loader = loader_class(country, batch_size=batch_size)
+                for code, province_name in provinces:
+                    loader.add_province(code, province_name)
+
+            elif kind == 'province':
+                if loader is None:
+                    provinces.append((province_code, data.get('province_name')))
+                else:
+                    loader.add_province(province_code, data.get('province_name'))
+
+            elif kind == 'postal':
+                if loader is None or province_code not in loader.province_names:
+                    raise CommandError(_('The "country" and "provinces" should be defined '
+                                         'before the "postals" in %(path)s') % {'path': addresses_path})
+                try:
+                    loader.add_postal(province_code, data.get('city'),
+                                      data.get('sub_district'), data.get('postal_code'))
+                except ValueError as error:
+                    raise CommandError(error)
+
+        if loader is None:
+            raise CommandError(_('The "country" isn\'t defined in %(path)s') % {'path': addresses_path})
+        return loader
+
+    @instrumented('create_address.bulk_create_addresses')
+    def bulk_create_addresses(self, language='id', batch_size=DEFAULT_BATCH_SIZE,
+                              show_print=False, source=None):
+        """
+        function to load the province, district, and sub_district
+        with batched inserts, the fixture is streamed record by record.
+
+        :param `language` is string language code / country code.
+        :param `batch_size` is integer size of each insert batch.
+        :param `show_print` is boolean to enable or disable the print out.
+        :param `source` is string path of a custom fixture, optional.
+        """
+        addresses_path = self.get_addresses_path(language, source)
+
+        # clear all address
+        SubDistrict.objects.all().delete()
+        District.objects.all().delete()
+        Province.objects.all().delete()
+
+        loader = self.feed_addresses(addresses_path, BulkAddressLoader, batch_size)
+        loader.flush()
+
+        if show_print:
+            print(_('[+] Created %(provinces)s provinces, %(districts)s districts '
+                    'and %(sub_districts)s sub districts') % loader.counts)
+        return loader
+
+    def is_fixture_changed(self, name, checksum):
+        """
+        function to check the stored checksum of a fixture.
+
+        :param `name` is string name of the fixture.
+        :param `checksum` is string checksum of the fixture files.
+        :return boolean True when the fixture is new or changed.
+        """
+        return not FixtureChecksum.objects.filter(name=name, checksum=checksum).exists()
+
+    def save_fixture_checksum(self, name, checksum):
+        FixtureChecksum.objects.update_or_create(name=name, defaults={'checksum': checksum})
+
+    def clear_fixture_checksums(self):
+        """
+        function to forget the synced fixtures, once the tables are replaced
+        they don't match any of them, so the next sync can't skip them.
+        """
+        FixtureChecksum.objects.all().delete()
+
+    @instrumented('create_address.sync_countries')
+    def sync_countries(self, batch_size=DEFAULT_BATCH_SIZE, show_print=False, force=False):
+        """
+        function to sync the countries data without deleting them,
+        the unchanged fixtures are skipped.
+
+        :param `batch_size` is integer size of each write batch.
+        :param `show_print` is boolean to enable or disable the print out.
+        :param `force` is boolean to sync even when the fixtures are unchanged.
+        """
+        countries_path, countries_code_path = self.get_countries_paths()
+        checksum = get_file_checksum(countries_path, countries_code_path)
+
+        if not force and not self.is_fixture_changed('countries', checksum):
+            if show_print:
+                print(_('[i] Countries are up to date'))
+            return None
+
+        counts = sync_countries(iter_countries(countries_path),
+                                iter_countries_code(countries_code_path),
+                                batch_size)
+        self.save_fixture_checksum('countries', checksum)
+
+        if show_print:
+            print(_('[*] Synced countries: %(created)s created, %(updated)s updated '
+                    'and %(deleted)s deleted') % counts)
+        return counts
+
+    @instrumented('create_address.sync_addresses')
+    def sync_addresses(self, language='id', batch_size=DEFAULT_BATCH_SIZE,
+                       show_print=False, source=None, force=False):
+        """
+        function to sync the province, district, and sub_district on their
+        natural keys without deleting them, the unchanged fixture is skipped.
+
+        :param `language` is string language code / country code.
+        :param `batch_size` is integer size of each write batch.
+        :param `show_print` is boolean to enable or disable the print out.
+        :param `source` is string path of a custom fixture, optional.
+        :param `force` is boolean to sync even when the fixture is unchanged.
+        """
+        addresses_path = self.get_addresses_path(language, source)
+        checksum_name = 'addresses:%s' % (source or language)
+        checksum = get_file_checksum(addresses_path)
+
+        if not force and not self.is_fixture_changed(checksum_name, checksum):
+            if show_print:
+                print(_('[i] Addresses are up to date'))
+            return None
+
+        loader = self.feed_addresses(addresses_path, SyncAddressLoader, batch_size)
+        loader.finish()
+        self.save_fixture_checksum(checksum_name, checksum)
+
+        if show_print:
+            print(_('[*] Synced addresses: %(created)s created, %(restored)s restored '
+                    'and %(deleted)s deleted') % loader.counts)
+        return loader
+
     def handle(self, *args, **kwargs):
         # to
         language = kwargs.get('language')
@@ -125,5 +343,36 @@ class Command(BaseCommand):
         show_print = kwargs.get('show_print')
         show_print = True if str(show_print).lower() == 'true' else False
 
-        self.create_countries(show_print)
-        self.create_addresses(language, show_print)
+        # to load with batched inserts or not
+        bulk = kwargs.get('bulk')
+        bulk = True if str(bulk).lower() == 'true' else False
+        source = kwargs.get('source')
+
+        # to sync only the changes or not
+        sync = kwargs.get('sync')
+        sync = True if str(sync).lower() == 'true' else False
+        force = kwargs.get('force')
+        force = True if str(force).lower() == 'true' else False
+
+        with deferred_hierarchy_changed():
+            if sync:
+                batch_size = kwargs.get('batch_size') or DEFAULT_BATCH_SIZE
+                with transaction.atomic():
+                    self.sync_countries(batch_size, show_print, force)
+                    self.sync_addresses(language, batch_size, show_print, source, force)
+
+            elif bulk:
+                batch_size = kwargs.get('batch_size') or DEFAULT_BATCH_SIZE
+                with transaction.atomic():
+                    self.clear_fixture_checksums()
+                    self.bulk_create_countries(batch_size, show_print)
+                    self.bulk_create_addresses(language, batch_size, show_print, source)
+
+            else:
+                with transaction.atomic():
+                    self.clear_fixture_checksums()
+                    self.create_countries(show_print)
+                    self.create_addresses(language, show_print, source)
+
+            # the bulk writes don't send `post_save`.
+            send_hierarchy_changed()
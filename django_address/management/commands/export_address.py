@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+from django.apps import apps
+from django.core.management.base import (BaseCommand, CommandError)
+from django.utils.translation import ugettext_lazy as _
+
+from django_address.models import (Country, Province, District,
+                                   SubDistrict, AddressModel)
+from django_address.exporters import (DEFAULT_CHUNK_SIZE, FORMATS, get_export_columns,
+                                      iter_rows, open_output, write_csv,
+                                      write_jsonl, write_fixture)
+
+# {name: (model, lookup of the country name)}
+GEOGRAPHY_MODELS = {
+    'country': (Country, 'name'),
+    'province': (Province, 'country__name'),
+    'district': (District, 'province__country__name'),
+    'sub_district': (SubDistrict, 'country__name'),
+}
+
+
+class Command(BaseCommand):
+    """
+    Command to export the address data, streamed with a constant memory.
+
+    ./manage.py export_address --model=sub_district --format=csv --output=sub_districts.csv
+    ./manage.py export_address --model=app.Profile --format=jsonl --gzip=true --output=profiles.jsonl.gz
+    ./manage.py export_address --format=fixture --country=Indonesia --output=addresses.json
+    """
+
+    help = _('Command to export the address data')
+
+    def add_arguments(self, parser):
+        parser.add_argument('-model', '--model', default='sub_district',
+                            help=_('One of country, province, district, sub_district '
+                                   'or "app_label.ModelName" of an AddressModel'))
+        parser.add_argument('-format', '--format', default='csv',
+                            help=_('One of csv, jsonl or fixture (addresses.json)'))
+        parser.add_argument('-output', '--output', default='-',
+                            help=_('Path of the output file, "-" for stdout'))
+        parser.add_argument('-gzip', '--gzip', default=False,
+                            help=_('To compress the output with gzip or not'))
+        parser.add_argument('-country', '--country', default=None,
+                            help=_('Name of the country to export'))
+        parser.add_argument('-published', '--published', default=False,
+                            help=_('To export the not-deleted rows only'))
+        parser.add_argument('-chunk-size', '--chunk-size', type=int,
+                            default=DEFAULT_CHUNK_SIZE,
+                            help=_('Number of rows fetched per round trip'))
+        return parser
+
+    def get_queryset(self, model_name, country=None, published=False):
+        """
+        function to get the queryset of the exported model.
+
+        :param `model_name` is string name of geography model or "app_label.ModelName".
+        :param `country` is string name of country to filter, optional.
+        :param `published` is boolean to exclude the deleted rows.
+        :return queryset.
+        """
+        if model_name in GEOGRAPHY_MODELS:
+            model, country_lookup = GEOGRAPHY_MODELS[model_name]
+        else:
+            try:
+                model = apps.get_model(model_name)
+            except (LookupError, ValueError):
+                raise CommandError(_('Unknown model "%(model)s"') % {'model': model_name})
+            if not issubclass(model, AddressModel):
+                raise CommandError(_('"%(model)s" isn\'t an AddressModel') % {'model': model_name})
+            country_lookup = 'sub_district__country__name'
+
+        queryset = model._default_manager.all()
+        if country:
+            queryset = queryset.filter(**{country_lookup: country})
+        if published and hasattr(model, 'deleted_at'):
+            queryset = queryset.filter(deleted_at__isnull=True)
+        return queryset
+
+    def export(self, stream, model_name='sub_district', export_format='csv', country=None,
+               published=False, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        function to write the rows into a text stream.
+        :return integer number of exported rows.
+        """
+        if export_format == 'fixture':
+            if not country:
+                raise CommandError(_('The fixture format needs the --country'))
+            try:
+                country = Country.objects.by_name(country).get()
+            except Country.DoesNotExist:
+                raise CommandError(_('Country "%(country)s" doesn\'t exist!') % {'country': country})
+            return write_fixture(stream, country, chunk_size)
+
+        queryset = self.get_queryset(model_name, country, published)
+        columns = get_export_columns(queryset.model)
+        rows = iter_rows(queryset, columns, chunk_size)
+        if export_format == 'jsonl':
+            return write_jsonl(stream, columns, rows)
+        return write_csv(stream, columns, rows)
+
+    def handle(self, *args, **kwargs):
+        export_format = str(kwargs.get('format') or 'csv').lower()
+        if export_format not in FORMATS:
+            raise CommandError(_('Unknown format "%(format)s", use one of %(formats)s')
+                               % {'format': export_format, 'formats': ', '.join(FORMATS)})
+
+        output = kwargs.get('output') or '-'
+        compress = kwargs.get('gzip')
+        compress = True if str(compress).lower() == 'true' else False
+        published = kwargs.get('published')
+        published = True if str(published).lower() == 'true' else False
+        chunk_size = kwargs.get('chunk_size') or DEFAULT_CHUNK_SIZE
+
+        # write the chunks to stdout as they are, without the line endings.
+        self.stdout.ending = ''
+        stream = open_output(output, compress, stdout=self.stdout)
+        try:
+            total = self.export(stream, kwargs.get('model'), export_format,
+                                kwargs.get('country'), published, chunk_size)
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        if output != '-':
+            self.stderr.write(_('[+] Exported %(total)s rows into %(output)s')
+                              % {'total': total, 'output': output})
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import transaction
+from django.core.management.base import (BaseCommand, CommandError)
+from django.utils.translation import ugettext_lazy as _
+
+from django_address.models import (Country, Province)
+from django_address.loaders import (DEFAULT_BATCH_SIZE, BulkAddressLoader,
+                                    SyncAddressLoader, feed_provinces)
+from django_address.signals import (deferred_hierarchy_changed,
+                                    send_hierarchy_changed)
+from django_address.sources import (get_source_format, merge_sources, parse_source)
+
+
+class Command(BaseCommand):
+    """
+    Command to import the addresses of many countries from flat csv / jsonl sources,
+    the sources are parsed in a process pool and written by one writer.
+    Each row is a sub district, with the columns:
+
+        country,province,city,sub_district,postal_code
+
+    The countries are synced, the rows which are gone from the sources are
+    soft-deleted. With `--replace=true` their provinces are deleted and
+    inserted again, which cascades to every `AddressModel` row of them.
+
+    ./manage.py import_address id.csv my.jsonl.gz --workers=4
+    ./manage.py import_address id.csv my.jsonl.gz --replace=true
+    """
+
+    help = _('Command to import the addresses of many countries from csv / jsonl sources')
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='+',
+                            help=_('Paths of the csv / jsonl sources, optionally gzipped'))
+        parser.add_argument('-workers', '--workers', type=int, default=0,
+                            help=_('Number of parser processes, default the number of cpus'))
+        parser.add_argument('-show-print', '--show-print', default=False,
+                            help=_('To show the print or not'))
+        parser.add_argument('-batch-size', '--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help=_('Number of rows per insert batch'))
+        parser.add_argument('-replace', '--replace', default=False,
+                            help=_('To delete and insert the countries again instead of syncing, '
+                                   'it deletes their addresses too'))
+        return parser
+
+    def parse_sources(self, paths, workers=0):
+        """
+        function to parse the sources, in a process pool for many sources.
+
+        :param `paths` is list of string paths.
+        :param `workers` is integer number of processes, 0 for the number of cpus.
+        :return list of `parse_source()` results, in the order of `paths`.
+        """
+        for path in paths:
+            if not os.path.exists(path):
+                raise CommandError(_('File "%(source)s" doesn\'t exist!') % {'source': path})
+            try:
+                get_source_format(path)
+            except ValueError as error:
+                raise CommandError(error)
+
+        workers = min(workers or os.cpu_count() or 1, len(paths))
+        try:
+            if workers <= 1:
+                return [parse_source(path) for path in paths]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                return list(executor.map(parse_source, paths))
+        except ValueError as error:
+            raise CommandError(error)
+
+    def write_addresses(self, countries, replace=False, batch_size=DEFAULT_BATCH_SIZE,
+                        show_print=False):
+        """
+        function to write the parsed countries, one country after another.
+
+        :param `countries` is dict from `merge_sources()`.
+        :param `replace` is boolean to delete and insert the countries instead of syncing,
+                         the delete cascades to their `AddressModel` rows.
+        :param `batch_size` is integer size of each write batch.
+        :param `show_print` is boolean to enable or disable the print out.
+        :return dict of {country: loader counts}
+        """
+        objects = {}
+        for name in countries:
+            objects[name] = Country.objects.by_name(name).first()
+        missing = [name for name, country in objects.items() if country is None]
+        if missing:
+            raise CommandError(_('Countries %(countries)s don\'t exist, run `create_address` first')
+                               % {'countries': ', '.join(missing)})
+
+        counts = {}
+        for name, provinces in countries.items():
+            country = objects[name]
+            if replace:
+                Province.objects.filter(country=country).delete()
+                loader = feed_provinces(BulkAddressLoader(country, batch_size), provinces)
+                loader.flush()
+            else:
+                loader = feed_provinces(SyncAddressLoader(country, batch_size), provinces)
+                loader.finish()
+
+            counts[name] = loader.counts
+            if show_print:
+                print(_('[+] Imported %(country)s: %(counts)s') % {'country': country,
+                                                                   'counts': loader.counts})
+        return counts
+
+    def handle(self, *args, **kwargs):
+        # to enable the print or not
+        show_print = kwargs.get('show_print')
+        show_print = True if str(show_print).lower() == 'true' else False
+
+        replace = kwargs.get('replace')
+        replace = True if str(replace).lower() == 'true' else False
+        batch_size = kwargs.get('batch_size') or DEFAULT_BATCH_SIZE
+
+        results = self.parse_sources(kwargs.get('sources'), kwargs.get('workers') or 0)
+        for result in results:
+            if show_print:
+                print(_('[i] Parsed %(rows)s rows from %(path)s') % result)
+            for error in result['errors']:
+                self.stderr.write(_('[!] Skipped %(error)s') % {'error': error})
+
+        with deferred_hierarchy_changed():
+            with transaction.atomic():
+                self.write_addresses(merge_sources(results), replace, batch_size, show_print)
+
+            # the bulk writes don't send `post_save`.
+            send_hierarchy_changed()
@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from django.utils.translation import ugettext_lazy as _
+
+from django_address.models import SubDistrict
+from django_address.loaders import (DEFAULT_BATCH_SIZE, chunked)
+from django_address.signals import send_hierarchy_changed
+
+
+class Command(BaseCommand):
+    """
+    Command to repair the denormalized `province`, `country` and `path`
+    of the sub districts, eg: after raw sql writes or `loaddata`.
+
+    ./manage.py repair_address
+    ./manage.py repair_address --full=true
+    """
+
+    help = _('Command to repair the denormalized hierarchy of the sub districts')
+
+    def add_arguments(self, parser):
+        parser.add_argument('-show-print', '--show-print', default=False,
+                            help=_('To show the print or not'))
+        parser.add_argument('-full', '--full', default=False,
+                            help=_('To update every sub district instead of the stale ones'))
+        parser.add_argument('-batch-size', '--batch-size', type=int,
+                            default=DEFAULT_BATCH_SIZE,
+                            help=_('Number of sub districts per UPDATE'))
+        return parser
+
+    def repair_sub_districts(self, full=False, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        function to update the denormalized columns with set-based UPDATEs.
+
+        :param `full` is boolean to update all sub districts with one UPDATE.
+        :param `batch_size` is integer number of the stale sub districts per UPDATE.
+        :return integer number of updated sub districts.
+        """
+        if full:
+            return SubDistrict.objects.refresh_hierarchy()
+
+        stale_ids = list(SubDistrict.objects.stale_hierarchy().values_list('id', flat=True))
+        updated = 0
+        for ids in chunked(stale_ids, batch_size or DEFAULT_BATCH_SIZE):
+            updated += SubDistrict.objects.refresh_hierarchy(id__in=ids)
+        return updated
+
+    def handle(self, *args, **kwargs):
+        # to enable the print or not
+        show_print = kwargs.get('show_print')
+        show_print = True if str(show_print).lower() == 'true' else False
+
+        full = kwargs.get('full')
+        full = True if str(full).lower() == 'true' else False
+
+        with transaction.atomic():
+            updated = self.repair_sub_districts(full, kwargs.get('batch_size'))
+
+        if updated:
+            send_hierarchy_changed()
+
+        if show_print:
+            print(_('[*] Repaired %(total)s sub districts') % {'total': updated})
+        return None
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from django.core.management.base import (BaseCommand, CommandError)
+from django.utils.translation import ugettext_lazy as _
+
+from django_address.snapshots import (get_snapshot_path, write_snapshot)
+
+
+class Command(BaseCommand):
+    """
+    Command to write the binary snapshot of the published geography tree,
+    which the workers memory-map with `django_address.snapshots.get_snapshot()`.
+
+    ./manage.py snapshot_address
+    ./manage.py snapshot_address --output=/var/lib/address.snapshot
+    """
+
+    help = _('Command to write the binary snapshot of the geography tree')
+
+    def add_arguments(self, parser):
+        parser.add_argument('-output', '--output', default=None,
+                            help=_('Path of the snapshot, default the DJANGO_ADDRESS_SNAPSHOT_PATH'))
+        return parser
+
+    def handle(self, *args, **kwargs):
+        output = kwargs.get('output') or get_snapshot_path()
+        if not output:
+            raise CommandError(_('Use the --output or the DJANGO_ADDRESS_SNAPSHOT_PATH setting'))
+
+        directory = os.path.dirname(os.path.abspath(output))
+        if not os.path.isdir(directory):
+            raise CommandError(_('Directory "%(directory)s" doesn\'t exist!')
+                               % {'directory': directory})
+
+        total = write_snapshot(output)
+        self.stdout.write(_('[+] Written %(total)s nodes into %(output)s')
+                          % {'total': total, 'output': output})
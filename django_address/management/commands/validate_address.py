@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+
+import os
+import csv
+import time
+
+from django.core.management.base import (BaseCommand, CommandError)
+from django.utils.translation import ugettext_lazy as _
+
+from django_address.exporters import open_output
+from django_address.sources import (COLUMN_ALIASES, get_source_format,
+                                    iter_source_rows, normalize)
+from django_address.validation import address_validator
+
+ERROR_COLUMNS = ('line', 'field', 'code', 'message', 'suggestion')
+
+
+class Command(BaseCommand):
+    """
+    Command to validate the addresses of csv / jsonl sources against the
+    published hierarchy, the errors are written as csv with the suggestions.
+    Each row has the columns:
+
+        postal_code,sub_district,city,province
+
+    ./manage.py validate_address customers.csv --output=errors.csv
+    ./manage.py validate_address customers.jsonl.gz
+    """
+
+    help = _('Command to validate the addresses of csv / jsonl sources')
+
+    def add_arguments(self, parser):
+        parser.add_argument('sources', nargs='+',
+                            help=_('Paths of the csv / jsonl sources, optionally gzipped'))
+        parser.add_argument('-output', '--output', default='-',
+                            help=_('Path of the errors csv file, "-" for stdout'))
+        return parser
+
+    def iter_rows(self, path):
+        """
+        function to iterate the rows of a source as the validator tuples.
+        :return generator of tuple (line number, (postal_code, sub_district, district, province))
+        """
+        for line, row in iter_source_rows(path):
+            values = {}
+            for key, value in row.items():
+                key = normalize(key)
+                if key:
+                    key = key.lower()
+                    values[COLUMN_ALIASES.get(key, key)] = value
+            yield line, (values.get('postal_code'), values.get('sub_district'),
+                         values.get('city'), values.get('province'))
+
+    def validate(self, stream, paths):
+        """
+        function to write the errors of the sources into a text stream.
+        :return tuple of (number of rows, number of invalid rows)
+        """
+        writer = csv.writer(stream)
+        writer.writerow(('source',) + ERROR_COLUMNS)
+
+        total = invalid = 0
+        for path in paths:
+            # the errors are yielded before the next row is read,
+            # so the current line is the one of the errors.
+            current = {'line': None, 'rows': 0}
+
+            def iter_rows(path=path, current=current):
+                for line, row in self.iter_rows(path):
+                    current['line'] = line
+                    current['rows'] += 1
+                    yield row
+
+            for index, errors in address_validator.validate_many(iter_rows()):
+                invalid += 1
+                for error in errors:
+                    writer.writerow((path, current['line'], error.field, error.code,
+                                     error.message, error.suggestion or ''))
+            total += current['rows']
+        return total, invalid
+
+    def handle(self, *args, **kwargs):
+        paths = kwargs.get('sources') or []
+        for path in paths:
+            if not os.path.exists(path):
+                raise CommandError(_('File "%(source)s" doesn\'t exist!') % {'source': path})
+            try:
+                get_source_format(path)
+            except ValueError as error:
+                raise CommandError(error)
+
+        output = kwargs.get('output') or '-'
+        self.stdout.ending = ''
+        stream = open_output(output, stdout=self.stdout)
+        started = time.time()
+        try:
+            total, invalid = self.validate(stream, paths)
+        except ValueError as error:
+            raise CommandError(error)
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        self.stderr.write(_('[+] Validated %(total)s rows, %(invalid)s invalid in %(seconds).1fs')
+                          % {'total': total, 'invalid': invalid,
+                             'seconds': time.time() - started})
@@ -0,0 +1,30 @@
+# Generated by Django 3.1.14 on 2026-10-17 20:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_address', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FixtureChecksum',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True,
+                                        serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, null=True)),
+                ('deleted_at', models.DateTimeField(blank=True, null=True)),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Name')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Checksum')),
+            ],
+            options={
+                'ordering': ('-id',),
+                'verbose_name_plural': 'Fixture Checksums',
+                'verbose_name': 'Fixture Checksum',
+            },
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 3.1.14 on 2026-10-17 20:50
+
+from django.db import migrations, models
+
+LOWER_NAME_INDEXES = (
+    # (index name, table name)
+    ('da_country_name_lower_idx', 'django_address_country'),
+)
+
+
+def create_lower_name_indexes(apps, schema_editor):
+    """ functional indexes for the case-insensitive name lookups. """
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    quote_name = schema_editor.quote_name
+    for index_name, table_name in LOWER_NAME_INDEXES:
+        schema_editor.execute('CREATE INDEX %s ON %s (LOWER(%s))' % (
+            quote_name(index_name), quote_name(table_name), quote_name('name')))
+
+
+def drop_lower_name_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor not in ('postgresql', 'sqlite'):
+        return
+    for index_name, table_name in LOWER_NAME_INDEXES:
+        schema_editor.execute('DROP INDEX IF EXISTS %s' % schema_editor.quote_name(index_name))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_address', '0002_fixturechecksum'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='country',
+            index=models.Index(fields=['name'], name='da_country_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='province',
+            index=models.Index(fields=['country', 'name'], name='da_province_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='province',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True),
+                               fields=['country'], name='da_province_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='district',
+            index=models.Index(fields=['province', 'name'], name='da_district_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='district',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True),
+                               fields=['province'], name='da_district_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subdistrict',
+            index=models.Index(fields=['district', 'name'], name='da_subdistrict_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subdistrict',
+            index=models.Index(fields=['postal_code'], name='da_subdistrict_postal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='subdistrict',
+            index=models.Index(condition=models.Q(deleted_at__isnull=True),
+                               fields=['district'], name='da_subdistrict_published_idx'),
+        ),
+        migrations.RunPython(create_lower_name_indexes, drop_lower_name_indexes),
+    ]
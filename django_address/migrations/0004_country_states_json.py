@@ -0,0 +1,58 @@
+# Generated by Django 3.1.14 on 2026-10-17 21:30
+
+import ast
+import json
+
+from django.db import migrations, models
+
+
+def parse_states(text):
+    """ same parsing as `utils.parse_json_string`, at the time of this migration. """
+    if not text:
+        return None
+    try:
+        states = json.loads(text)
+    except ValueError:
+        try:
+            states = ast.literal_eval(text)
+        except Exception:
+            return None
+    return states if isinstance(states, list) else None
+
+
+def states_to_json(apps, schema_editor):
+    """ rewrite the `states` text as valid json before the column type is changed. """
+    Country = apps.get_model('django_address', 'Country')
+    for pk, states in Country.objects.values_list('id', 'states').iterator():
+        value = parse_states(states)
+        value = json.dumps(value) if value is not None else None
+        if value != states:
+            Country.objects.filter(pk=pk).update(states=value)
+
+
+def recreate_lower_name_index(apps, schema_editor):
+    """ SQLite rebuilds the table to alter the column, without the raw sql indexes of 0003. """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    quote_name = schema_editor.quote_name
+    schema_editor.execute('CREATE INDEX IF NOT EXISTS %s ON %s (LOWER(%s))' % (
+        quote_name('da_country_name_lower_idx'), quote_name('django_address_country'),
+        quote_name('name')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_address', '0003_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(states_to_json, recreate_lower_name_index),
+        migrations.AlterField(
+            model_name='country',
+            name='states',
+            field=models.JSONField(blank=True, help_text='List of states', null=True,
+                                   verbose_name='States'),
+        ),
+        migrations.RunPython(recreate_lower_name_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 3.1.14 on 2026-10-17 21:04
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery, TextField, Value
+from django.db.models.functions import Concat
+import django.db.models.deletion
+
+
+def populate_hierarchy(apps, schema_editor):
+    """ fill the denormalized columns with one UPDATE over the districts. """
+    District = apps.get_model('django_address', 'District')
+    SubDistrict = apps.get_model('django_address', 'SubDistrict')
+
+    districts = District.objects.filter(pk=OuterRef('district_id')).order_by()
+    suffix = districts.annotate(suffix=Concat(
+        Value(', '), 'name', Value(', '), 'province__name',
+        Value(', '), 'province__country__name', output_field=TextField()))
+    SubDistrict.objects.update(
+        province=Subquery(districts.values('province_id')[:1]),
+        country=Subquery(districts.values('province__country_id')[:1]),
+        path=Concat(F('name'), Subquery(suffix.values('suffix')[:1]), output_field=TextField()))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_address', '0004_country_states_json'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subdistrict',
+            name='country',
+            field=models.ForeignKey(blank=True, editable=False, null=True,
+                                    on_delete=django.db.models.deletion.CASCADE,
+                                    related_name='sub_districts', to='django_address.country',
+                                    verbose_name='Country'),
+        ),
+        migrations.AddField(
+            model_name='subdistrict',
+            name='path',
+            field=models.TextField(blank=True, default='', editable=False, verbose_name='Path'),
+        ),
+        migrations.AddField(
+            model_name='subdistrict',
+            name='province',
+            field=models.ForeignKey(blank=True, editable=False, null=True,
+                                    on_delete=django.db.models.deletion.CASCADE,
+                                    related_name='sub_districts', to='django_address.province',
+                                    verbose_name='Province'),
+        ),
+        migrations.RunPython(populate_hierarchy, migrations.RunPython.noop),
+    ]
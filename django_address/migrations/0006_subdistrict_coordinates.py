@@ -0,0 +1,30 @@
+# Generated by Django 3.1.14 on 2026-10-17 21:08
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_address', '0005_subdistrict_hierarchy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subdistrict',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True,
+                                    validators=[django.core.validators.MinValueValidator(-90),
+                                                django.core.validators.MaxValueValidator(90)],
+                                    verbose_name='Latitude'),
+        ),
+        migrations.AddField(
+            model_name='subdistrict',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True,
+                                    validators=[django.core.validators.MinValueValidator(-180),
+                                                django.core.validators.MaxValueValidator(180)],
+                                    verbose_name='Longitude'),
+        ),
+    ]
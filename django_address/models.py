@@ -1,12 +1,20 @@
 # -*- coding: utf-8 -*-
 from __future__ import unicode_literals
 
+import asyncio
+
+from asgiref.sync import sync_to_async
 from django.db import models
+from django.db.models import (Q, F, Value, TextField, OuterRef, Subquery)
+from django.db.models.functions import (Concat, Lower)
 from django.conf import settings
+from django.core.validators import (MinValueValidator, MaxValueValidator)
 from django.forms.models import model_to_dict
 from django.utils.translation import ugettext_lazy as _
 
 from .utils import parse_json_string
+from .formatters import get_formatter
+from .instrumentation import instrumented
 
 
 class TimeStampedModel(models.Model):
@@ -35,6 +43,7 @@ class DefaultManager(models.Manager):
 
     >>> ModelName.objects.published()
     >>> ModelName.objects.deleted()
+    >>> await ModelName.objects.apublished(name__startswith='A')
     """
 
     def published(self):
@@ -45,10 +54,31 @@ class DefaultManager(models.Manager):
         """ return queryset for deleted objects only. """
         return self.filter(deleted_at__isnull=False)
 
+    async def apublished(self, *args, **kwargs):
+        """ return list of not-deleted objects, filtered by the arguments, in one awaited query. """
+        queryset = self.published().filter(*args, **kwargs)
+        return await sync_to_async(list, thread_sensitive=True)(queryset)
+
+    async def adeleted(self, *args, **kwargs):
+        """ return list of deleted objects, filtered by the arguments, in one awaited query. """
+        queryset = self.deleted().filter(*args, **kwargs)
+        return await sync_to_async(list, thread_sensitive=True)(queryset)
+
+    def by_name(self, name):
+        """
+        return queryset filtered by case-insensitive `name`,
+        compared with LOWER() to use the functional name index.
+        """
+        return self.annotate(name_lower=Lower('name'))\
+                   .filter(name_lower=Lower(Value(name)))
+
+
+PUBLISHED = Q(deleted_at__isnull=True)
+
 
 class Country(TimeStampedModel):
     name = models.CharField(_('Name'), max_length=200)
-    states = models.TextField(_('States'), null=True, blank=True,
+    states = models.JSONField(_('States'), null=True, blank=True,
                               help_text=_('List of states'))
     code = models.CharField(_('Code'), max_length=10, null=True, blank=True)
     phone_code = models.CharField(_('Phone Code'), max_length=10,
@@ -61,15 +91,36 @@ class Country(TimeStampedModel):
     def __str__(self):
         return self.name
 
+    @instrumented('country.get_states')
     def get_states(self):
         """
-        function to parse the `states` list string into list.
+        function to get the `states` as list, the parsed list
+        is cached on the instance until `states` is assigned again.
         :return list of states
         """
-        return parse_json_string(self.states, default=[])
+        cache = self.__dict__.get('_states_cache')
+        if cache is None or cache[0] is not self.states:
+            # old rows may still hold the list as a string.
+            cache = self._states_cache = (self.states, parse_json_string(self.states, default=[]))
+        return cache[1]
+
+    def has_state(self, name):
+        """
+        function to check a state name (case-insensitive) with a precomputed set.
+        :return boolean
+        """
+        states = self.get_states()
+        cache = self.__dict__.get('_state_names')
+        if cache is None or cache[0] is not states:
+            names = frozenset(str(state).casefold() for state in states)
+            cache = self._state_names = (states, names)
+        return str(name).casefold() in cache[1]
 
     class Meta:
         ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['name'], name='da_country_name_idx'),
+        ]
         verbose_name = _('Country')
         verbose_name_plural = _('Countries')
 
@@ -96,6 +147,11 @@ class Province(TimeStampedModel):
 
     class Meta:
         ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['country', 'name'], name='da_province_name_idx'),
+            models.Index(fields=['country'], name='da_province_published_idx',
+                         condition=PUBLISHED),
+        ]
         verbose_name = _('Province')
         verbose_name_plural = _('Provinces')
 
@@ -122,10 +178,72 @@ class District(TimeStampedModel):
 
     class Meta:
         ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['province', 'name'], name='da_district_name_idx'),
+            models.Index(fields=['province'], name='da_district_published_idx',
+                         condition=PUBLISHED),
+        ]
         verbose_name = _('District')
         verbose_name_plural = _('Districts')
 
 
+PATH_SEPARATOR = ', '
+
+
+def get_path(*names):
+    """
+    function to join the names of a sub district and its ancestors.
+
+    >>> get_path('Ngaglik', 'Sleman', 'Yogyakarta', 'Indonesia')
+    'Ngaglik, Sleman, Yogyakarta, Indonesia'
+    """
+    return PATH_SEPARATOR.join(names)
+
+
+class SubDistrictManager(DefaultManager):
+    """
+    Manager of `SubDistrict`, to maintain the denormalized
+    `province`, `country` and `path` columns.
+
+    >>> SubDistrict.objects.refresh_hierarchy(district_id=1)
+    >>> SubDistrict.objects.stale_hierarchy().count()
+    """
+
+    def get_hierarchy_expressions(self):
+        """ return dict of the expected values, computed over the `district_id`. """
+        districts = District.objects.filter(pk=OuterRef('district_id')).order_by()
+        suffix = districts.annotate(suffix=Concat(
+            Value(PATH_SEPARATOR), 'name', Value(PATH_SEPARATOR), 'province__name',
+            Value(PATH_SEPARATOR), 'province__country__name', output_field=TextField()))
+        return {
+            'province': Subquery(districts.values('province_id')[:1]),
+            'country': Subquery(districts.values('province__country_id')[:1]),
+            'path': Concat(F('name'), Subquery(suffix.values('suffix')[:1]),
+                           output_field=TextField()),
+        }
+
+    def refresh_hierarchy(self, **filters):
+        """
+        function to update the denormalized columns with one UPDATE.
+
+        :param `filters` is the lookups of the sub districts to update.
+        :return integer number of updated rows.
+        """
+        return self.filter(**filters).update(**self.get_hierarchy_expressions())
+
+    def stale_hierarchy(self):
+        """ return queryset of the sub districts with inconsistent denormalized columns. """
+        expressions = self.get_hierarchy_expressions()
+        return self.annotate(expected_province=expressions['province'],
+                             expected_country=expressions['country'],
+                             expected_path=expressions['path'])\
+                   .filter(Q(province__isnull=True) |
+                           Q(country__isnull=True) |
+                           ~Q(province_id=F('expected_province')) |
+                           ~Q(country_id=F('expected_country')) |
+                           ~Q(path=F('expected_path')))
+
+
 class SubDistrict(TimeStampedModel):
     district = models.ForeignKey(District, related_name='sub_districts',
                                  on_delete=models.CASCADE,
@@ -133,18 +251,108 @@ class SubDistrict(TimeStampedModel):
     name = models.CharField(_('Name'), max_length=200)
     postal_code = models.CharField(_('Postal Code'), max_length=10,
                                    null=True, blank=True)
-
-    objects = DefaultManager()
+    latitude = models.FloatField(_('Latitude'), null=True, blank=True,
+                                 validators=[MinValueValidator(-90), MaxValueValidator(90)])
+    longitude = models.FloatField(_('Longitude'), null=True, blank=True,
+                                  validators=[MinValueValidator(-180), MaxValueValidator(180)])
+
+    # denormalized from the district, maintained by the signals.
+    province = models.ForeignKey(Province, related_name='sub_districts',
+                                 on_delete=models.CASCADE, null=True, blank=True,
+                                 editable=False, verbose_name=_('Province'))
+    country = models.ForeignKey(Country, related_name='sub_districts',
+                                on_delete=models.CASCADE, null=True, blank=True,
+                                editable=False, verbose_name=_('Country'))
+    path = models.TextField(_('Path'), blank=True, default='', editable=False)
+
+    objects = SubDistrictManager()
 
     def __str__(self):
         return self.name
 
+    def set_hierarchy(self):
+        """
+        function to set the denormalized `province`, `country` and `path`
+        from the district, without a query when the loaded ancestors agree
+        with the foreign keys, otherwise with one joined query.
+        """
+        district = self._state.fields_cache.get('district')
+        province = district and district._state.fields_cache.get('province')
+        country = province and province._state.fields_cache.get('country')
+
+        if district is not None and district.pk == self.district_id and \
+                province is not None and province.pk == district.province_id and \
+                country is not None and country.pk == province.country_id:
+            self.province_id = province.pk
+            self.country_id = country.pk
+            self.path = get_path(self.name, district.name, province.name, country.name)
+            return
+
+        row = District.objects.filter(pk=self.district_id)\
+                              .values_list('province_id', 'province__country_id', 'name',
+                                           'province__name', 'province__country__name')\
+                              .first()
+        if row is not None:
+            self.province_id, self.country_id = row[0], row[1]
+            self.path = get_path(self.name, *row[2:])
+
     class Meta:
         ordering = ('-id',)
+        indexes = [
+            models.Index(fields=['district', 'name'], name='da_subdistrict_name_idx'),
+            models.Index(fields=['postal_code'], name='da_subdistrict_postal_idx'),
+            models.Index(fields=['district'], name='da_subdistrict_published_idx',
+                         condition=PUBLISHED),
+        ]
         verbose_name = _('Sub District')
         verbose_name_plural = _('Sub Districts')
 
 
+class FixtureChecksum(TimeStampedModel):
+    """
+    store the checksum of the last synced fixture,
+    to skip the unchanged fixture on the next sync.
+    """
+    name = models.CharField(_('Name'), max_length=255, unique=True)
+    checksum = models.CharField(_('Checksum'), max_length=64)
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        ordering = ('-id',)
+        verbose_name = _('Fixture Checksum')
+        verbose_name_plural = _('Fixture Checksums')
+
+
+class AddressQuerySet(models.QuerySet):
+    """
+    QuerySet for the `AddressModel` subclasses, for example usage:
+
+    >>> queryset = Profile.objects.with_full_address(format_address='id')
+    >>> queryset.values_list('name', 'full_address')
+    """
+
+    def with_full_address(self, format_address='en', include_country=False, name='full_address'):
+        """
+        annotate the same string as `AddressModel.get_full_address()`,
+        formatted in SQL over the joined hierarchy, so a page of addresses
+        renders in one query. It's built from the templates and labels
+        of the registered `format_address`.
+
+        :param `format_address` is string format of address, eg: 'en', 'id'
+        :param `include_country` is boolean to include the country name.
+        :param `name` is string name of the annotation.
+        :raise ValueError when the formatter formats the rows in python,
+               `iter_full_addresses()` formats them instead.
+        """
+        expression = get_formatter(format_address).get_expression(self.model, include_country)
+        return self.annotate(**{name: expression})
+
+
+AddressManager = models.Manager.from_queryset(AddressQuerySet)
+
+
 class AddressModel(models.Model):
     """
     address class without any extending from another class.
@@ -156,6 +364,8 @@ class AddressModel(models.Model):
     [i] orm example:
         >>> profile.get_full_address(format_address='id', include_country=True)
         'Jl. Sudirman No.34, RT.4/RW.21 Sinduarjo, Ngaglik, Sleman, Yogyakarta, Indonesia - 55581'
+        >>> Profile.objects.with_full_address(format_address='id').first().full_address
+        'Jl. Sudirman No.34, RT.4/RW.21 Sinduarjo, Ngaglik, Sleman, Yogyakarta - 55581'
         >>> profile.get_full_address_json()
         {
           "address": "Jl. Sudirman",
@@ -203,6 +413,80 @@ class AddressModel(models.Model):
     ca = models.IntegerField(_('CA'), null=True, blank=True,
                              help_text=_('Citizens Association'))  # rw
 
+    objects = AddressManager()
+
+    def get_sub_district(self):
+        """
+        function to get the sub district with its ancestors,
+        from the hierarchy cache when `DJANGO_ADDRESS_HIERARCHY_CACHE` is enabled.
+        :return `SubDistrict` instance.
+        """
+        from .cache import (hierarchy_cache, is_hierarchy_cache_enabled)
+
+        if is_hierarchy_cache_enabled():
+            return hierarchy_cache.get_sub_district(self.sub_district_id)
+        return self.sub_district
+
+    def get_loaded_hierarchy(self, include_country=True):
+        """
+        function to get the hierarchy when it's already loaded on this instance,
+        eg: by `select_related('sub_district__district__province__country')`
+        :return tuple of (sub_district, district, province, country or None) or None.
+        """
+        if not type(self).sub_district.is_cached(self):
+            return None
+        sub_district = self.sub_district
+        if sub_district is None or not SubDistrict.district.is_cached(sub_district):
+            return None
+        district = sub_district.district
+        if not District.province.is_cached(district):
+            return None
+        province = district.province
+        if not include_country:
+            return (sub_district, district, province, None)
+        if not Province.country.is_cached(province):
+            return None
+        return (sub_district, district, province, province.country)
+
+    @instrumented('address.get_hierarchy')
+    def get_hierarchy(self, include_country=True):
+        """
+        function to get the sub district with its ancestors, the foreign
+        keys traversed by the full address. When they aren't loaded yet,
+        they are fetched with one query (or from the hierarchy cache).
+
+        :param `include_country` is boolean to get the country too.
+        :return tuple of (sub_district, district, province, country or None)
+        """
+        hierarchy = self.get_loaded_hierarchy(include_country)
+        if hierarchy is not None:
+            return hierarchy
+
+        from .cache import is_hierarchy_cache_enabled
+
+        if is_hierarchy_cache_enabled():
+            sub_district = self.get_sub_district()
+        else:
+            sub_district = SubDistrict.objects.select_related('district__province__country')\
+                                              .get(pk=self.sub_district_id)
+            self.sub_district = sub_district
+        district = sub_district.district
+        province = district.province
+        country = province.country if include_country else None
+        return (sub_district, district, province, country)
+
+    async def aget_hierarchy(self, include_country=True):
+        """
+        function to get the hierarchy in an async context,
+        without a thread hop when it's already loaded.
+        :return tuple of (sub_district, district, province, country or None)
+        """
+        hierarchy = self.get_loaded_hierarchy(include_country)
+        if hierarchy is not None:
+            return hierarchy
+        return await sync_to_async(self.get_hierarchy, thread_sensitive=True)(include_country)
+
+    @instrumented('address.get_full_address')
     def get_full_address(self, format_address='en', include_country=False):
         """
         function to get the complete address for this current model.
@@ -210,39 +494,33 @@ class AddressModel(models.Model):
         >>> object.get_full_address(format_address='id', include_country=True)
         'Jl. Sudirman No.34, RT.4/RW.21 Sinduarjo, Ngaglik, Sleman, Yogyakarta, Indonesia - 55581'
         """
-        def verbose_name(f): return self._meta.get_field(f).verbose_name
-
-        na = self.na or '-'
-        ca = self.ca or '-'
-        na_label = 'RT' if format_address == 'id' else verbose_name('na')
-        ca_label = 'RW' if format_address == 'id' else verbose_name('ca')
-        number_label = 'No' if self.number and format_address == 'id' else verbose_name('number')
-        number = ' %s.%s' % (number_label, self.number) if self.number else ''
-        village = self.village or ''
+        return self.format_full_address(self.get_hierarchy(include_country),
+                                        format_address, include_country)
 
-        address_pattern = '%(address)s%(number)s, %(na_label)s.%(na)s/%(ca_label)s.%(ca)s %(village)s'.strip()
-        address = address_pattern % {'address': self.address, 'number': number,
-                                     'na_label': na_label, 'na': na,
-                                     'ca_label': ca_label, 'ca': ca,
-                                     'village': village}
+    async def aget_full_address(self, format_address='en', include_country=False):
+        """
+        function to get the complete address in an async context,
+        the hierarchy is fetched with one awaited query.
 
-        sub_district = self.sub_district
-        postal_code = sub_district.postal_code
-        district = sub_district.district
-        province = district.province
+        >>> await object.aget_full_address(format_address='id', include_country=True)
+        """
+        hierarchy = await self.aget_hierarchy(include_country)
+        return self.format_full_address(hierarchy, format_address, include_country)
 
-        address_pattern = '%(address)s, %(sub_district)s, %(district)s, %(province)s'
-        address = address_pattern % {'address': address, 'sub_district': sub_district,
-                                     'district': district, 'province': province}
+    def format_full_address(self, hierarchy, format_address='en', include_country=False):
+        """
+        function to format the complete address of a loaded hierarchy, without any query.
+        :param `hierarchy` is tuple of (sub_district, district, province, country or None)
+        """
+        sub_district, district, province, country = hierarchy
+        country = country.name if include_country else None
 
-        if include_country:
-            address = '%(address)s, %(country)s' % {'address': address,
-                                                    'country': province.country}
-        if postal_code:
-            address = '%(address)s - %(postal_code)s' % {'address': address,
-                                                         'postal_code': postal_code}
-        return address
+        row = (self.address, self.number, self.na, self.ca, self.village, sub_district.name,
+               district.name, province.name, country, sub_district.postal_code)
+        return get_formatter(format_address).format(row, include_country=include_country,
+                                                    model=type(self))
 
+    @instrumented('address.get_full_address_json')
     def get_full_address_json(self):
         """
         function to get the json formated for complete address.
@@ -283,11 +561,27 @@ class AddressModel(models.Model):
           }
         }
         """
-        sub_district_data = model_to_dict(self.sub_district)
-        district_data = model_to_dict(self.sub_district.district)
-        province_data = model_to_dict(self.sub_district.district.province)
-        country_data = model_to_dict(self.sub_district.district.province.country)
-        country_data.update({'states': self.sub_district.district.province.country.get_states()})
+        return self.format_full_address_json(self.get_hierarchy())
+
+    async def aget_full_address_json(self):
+        """
+        function to get the json of the complete address in an async context,
+        the hierarchy is fetched with one awaited query.
+        """
+        return self.format_full_address_json(await self.aget_hierarchy())
+
+    def format_full_address_json(self, hierarchy):
+        """
+        function to get the json of a loaded hierarchy, without any query.
+        :param `hierarchy` is tuple of (sub_district, district, province, country)
+        """
+        sub_district, district, province, country = hierarchy
+
+        sub_district_data = model_to_dict(sub_district)
+        district_data = model_to_dict(district)
+        province_data = model_to_dict(province)
+        country_data = model_to_dict(country)
+        country_data.update({'states': country.get_states()})
 
         address = {'address': self.address, 'village': self.village,
                    'number': self.number, 'na': self.na, 'ca': self.ca}
@@ -301,3 +595,52 @@ class AddressModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+HIERARCHY_RELATED = 'sub_district__district__province__country'
+
+
+async def aload_hierarchies(addresses):
+    """
+    function to load the hierarchies of many addresses with one awaited query,
+    the addresses of the same sub district share its instance.
+
+    :param `addresses` is list of `AddressModel` instances, or a queryset.
+    :return list of `AddressModel` instances.
+    """
+    if isinstance(addresses, models.QuerySet):
+        queryset = addresses.select_related(HIERARCHY_RELATED)
+        return await sync_to_async(list, thread_sensitive=True)(queryset)
+
+    addresses = list(addresses)
+    missing = {address.sub_district_id for address in addresses
+               if address.get_loaded_hierarchy() is None}
+    if missing:
+        queryset = SubDistrict.objects.select_related('district__province__country')
+        sub_districts = await sync_to_async(queryset.in_bulk, thread_sensitive=True)(missing)
+        for address in addresses:
+            if address.sub_district_id in sub_districts and address.get_loaded_hierarchy() is None:
+                address.sub_district = sub_districts[address.sub_district_id]
+    return addresses
+
+
+async def aget_full_addresses(addresses, format_address='en', include_country=False):
+    """
+    function to get the complete addresses of many addresses concurrently,
+    with one awaited query for all their hierarchies.
+
+    >>> await aget_full_addresses(Profile.objects.filter(name__startswith='A'))
+    ['Jl. Sudirman No.34, RT.4/RW.21 Sinduarjo, Ngaglik, Sleman, Yogyakarta - 55581', ...]
+    """
+    addresses = await aload_hierarchies(addresses)
+    return await asyncio.gather(*[address.aget_full_address(format_address, include_country)
+                                  for address in addresses])
+
+
+async def aget_full_addresses_json(addresses):
+    """
+    function to get the json of many addresses concurrently,
+    with one awaited query for all their hierarchies.
+    """
+    addresses = await aload_hierarchies(addresses)
+    return await asyncio.gather(*[address.aget_full_address_json() for address in addresses])
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import connections
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+ESTIMATED_COUNT_THRESHOLD = 10000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which uses the planner estimate of the table size on
+    PostgreSQL, instead of `COUNT(*)` over the whole big table.
+    The filtered querysets, small tables and other databases are
+    still counted exactly.
+
+    class SubDistrictAdmin(admin.ModelAdmin):
+        paginator = EstimatedCountPaginator
+    """
+    threshold = ESTIMATED_COUNT_THRESHOLD
+
+    def get_estimated_count(self):
+        """ return integer estimated rows of the table, or None. """
+        queryset = self.object_list
+        if not hasattr(queryset, 'query') or queryset.query.where:
+            return None
+
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
+
+    @cached_property
+    def count(self):
+        estimated = self.get_estimated_count()
+        if estimated is not None and estimated >= self.threshold:
+            return estimated
+        return super(EstimatedCountPaginator, self).count
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import re
+from collections import namedtuple
+
+from .models import SubDistrict
+from .signals import hierarchy_changed
+from .utils import LazyIndex
+from .autocomplete import normalize
+
+# the administrative prefixes which are dropped to compare the names.
+PLACE_PREFIXES = ('kelurahan', 'kel', 'desa', 'ds', 'kecamatan', 'kec', 'kabupaten', 'kab',
+                  'kota', 'kotamadya', 'provinsi', 'propinsi', 'prov')
+MAX_NAME_WORDS = 4
+
+POSTAL_CODE = re.compile(r'(?:^|[\s,-])(\d{5})\s*$')
+NA_CA = re.compile(r'\b(?:RT|NA)\s*\.?\s*(\d+|-)\s*[/,]?\s*(?:RW|CA)\s*\.?\s*(\d+|-)(?!\w)',
+                   re.IGNORECASE)
+# the trailing number of the street, but not the kilometer, eg: 'Jl. Kaliurang KM 10'
+NUMBER = re.compile(r'\s*(?:\bNo\b|\bNomor\b|\bNumber\b|#)\s*\.?\s*(\d+)\b'
+                    r'|(?<!\bkm)(?<!\bkm\.)\s+(\d+)\s*$', re.IGNORECASE)
+
+# weights of the confidence, the sum is 1.0
+WEIGHT_SUB_DISTRICT = 0.40
+WEIGHT_DISTRICT = 0.25
+WEIGHT_DISTRICT_FAR = 0.15
+WEIGHT_PROVINCE = 0.15
+WEIGHT_COUNTRY = 0.05
+WEIGHT_POSTAL_CODE = 0.15
+PENALTY_POSTAL_CODE = 0.10
+
+
+class ParsedAddress(namedtuple('ParsedAddress', [
+        'address', 'number', 'na', 'ca', 'village',
+        'sub_district_id', 'postal_code', 'confidence'])):
+    """ result of `AddressParser.parse()`, the confidence is between 0 and 1. """
+    __slots__ = ()
+
+    def get_model_fields(self):
+        """
+        function to get the values of the `AddressModel` fields,
+        eg: Profile.objects.create(name='Agus', **parsed.get_model_fields())
+        """
+        return {'address': self.address, 'number': self.number, 'na': self.na,
+                'ca': self.ca, 'village': self.village,
+                'sub_district_id': self.sub_district_id}
+
+
+def get_variants(name):
+    """
+    function to get the normalized forms of a place name,
+    with and without the administrative prefix.
+
+    >>> get_variants('Kec. Ngaglik')
+    frozenset({'kec ngaglik', 'ngaglik'})
+    """
+    normalized = normalize(name)
+    variants = {normalized}
+    words = normalized.split(' ', 1)
+    if len(words) == 2 and words[0] in PLACE_PREFIXES:
+        variants.add(words[1])
+    variants.discard('')
+    return frozenset(variants)
+
+
+def to_integer(value):
+    return int(value) if value and value.isdigit() else None
+
+
+class AddressParser(LazyIndex):
+    """
+    Parser of the free-text addresses into the `AddressModel` fields,
+    the reverse of `get_full_address()`. The place names are matched
+    against an in-process index of the published sub districts with
+    their district, province and country, built with one query.
+
+    >>> address_parser.parse('Jl. Karto Dimejo 35, RT 3/RW 34, Sinduarjo, Ngaglik, Sleman')
+    ParsedAddress(address='Jl. Karto Dimejo', number=35, na=3, ca=34, village='Sinduarjo',
+                  sub_district_id=1, postal_code=None, confidence=0.65)
+    >>> address_parser.parse_many(texts)
+    [ParsedAddress(...), ...]
+    """
+
+    def get_queryset(self):
+        return SubDistrict.objects.published()\
+                                  .filter(district__deleted_at__isnull=True,
+                                          province__deleted_at__isnull=True)
+
+    def build(self):
+        """
+        function to load the index with one query.
+        :return tuple of (entries, {name variant: [entry index]},
+                          {postal code: [entry index]}, set of all name variants)
+        """
+        entries = []
+        by_name = {}
+        by_postal_code = {}
+        names = set()
+        queryset = self.get_queryset().order_by('id').values_list(
+            'id', 'name', 'postal_code', 'district__name', 'province__name', 'country__name')
+
+        for pk, name, postal_code, district, province, country in queryset.iterator():
+            index = len(entries)
+            variants = [get_variants(value or '') for value in (name, district, province, country)]
+            postal_code = (postal_code or '').strip() or None
+            entries.append((pk, postal_code) + tuple(variants))
+
+            for variant in variants[0]:
+                by_name.setdefault(variant, []).append(index)
+            if postal_code:
+                by_postal_code.setdefault(postal_code, []).append(index)
+            for item in variants:
+                names.update(item)
+        return (entries, by_name, by_postal_code, names)
+
+    def split(self, text):
+        """
+        function to split the parts of the address, which don't need the index.
+        :return tuple of (segments, number, na, ca, postal_code)
+        """
+        text = ' '.join(str(text or '').split())
+
+        postal_code = None
+        match = POSTAL_CODE.search(text)
+        if match:
+            postal_code = match.group(1)
+            text = text[:match.start()].rstrip(' ,-')
+
+        na = ca = None
+        match = NA_CA.search(text)
+        if match:
+            na, ca = to_integer(match.group(1)), to_integer(match.group(2))
+            text = '%s, %s' % (text[:match.start()], text[match.end():])
+
+        segments = [segment.strip(' .-') for segment in text.split(',')]
+        segments = [segment for segment in segments if segment]
+
+        number = None
+        if segments:
+            match = NUMBER.search(segments[0])
+            if match:
+                number = int(match.group(1) or match.group(2))
+                street = segments[0][:match.start()] + segments[0][match.end():]
+                segments[0] = ' '.join(street.split()).strip(' ,')
+        return (segments, number, na, ca, postal_code)
+
+    def split_words(self, segment, names):
+        """
+        function to split the known place names from the end of a segment
+        without commas, eg: 'Jl. Kaliurang Ngaglik Sleman'
+        :return tuple of (the leading text, [place names])
+        """
+        words = segment.split()
+        places = []
+        end = len(words)
+        while end > 1:
+            for size in range(min(MAX_NAME_WORDS, end - 1), 0, -1):
+                candidate = ' '.join(words[end - size:end])
+                if get_variants(candidate) & names:
+                    places.insert(0, candidate)
+                    end -= size
+                    break
+            else:
+                break
+        return ' '.join(words[:end]), places
+
+    def match(self, data, places, postal_code):
+        """
+        function to find the best sub district of the place segments.
+
+        :param `places` is list of frozenset name variants, in the order of the text.
+        :param `postal_code` is string postal code or None.
+        :return tuple of (entry index or None, index of sub district place or None, confidence)
+        """
+        entries, by_name, by_postal_code, names = data
+
+        candidates = {}
+        for place_index, variants in enumerate(places):
+            for variant in variants:
+                for index in by_name.get(variant, ()):
+                    candidates.setdefault((index, place_index), None)
+        if not candidates and postal_code:
+            for index in by_postal_code.get(postal_code, ()):
+                candidates[(index, -1)] = None
+
+        scored = []
+        for index, place_index in candidates:
+            pk, entry_postal_code, name, district, province, country = entries[index]
+            score = WEIGHT_SUB_DISTRICT if place_index >= 0 else 0.0
+            position = place_index + 1
+
+            for variants, weight in ((district, WEIGHT_DISTRICT), (province, WEIGHT_PROVINCE),
+                                     (country, WEIGHT_COUNTRY)):
+                for offset in range(position, len(places)):
+                    if variants & places[offset]:
+                        if weight == WEIGHT_DISTRICT and offset != place_index + 1:
+                            weight = WEIGHT_DISTRICT_FAR
+                        score += weight
+                        position = offset + 1
+                        break
+
+            if postal_code:
+                if postal_code == entry_postal_code:
+                    score += WEIGHT_POSTAL_CODE
+                else:
+                    score -= PENALTY_POSTAL_CODE
+            scored.append((round(score, 6), -pk, index, place_index))
+
+        if not scored:
+            return (None, None, 0.0)
+
+        scored.sort(reverse=True)
+        score, pk, index, place_index = scored[0]
+        ties = len({item[2] for item in scored if item[0] == score})
+        confidence = max(0.0, min(1.0, score)) / ties
+        return (index, place_index if place_index >= 0 else None, round(confidence, 4))
+
+    def parse_with(self, data, text, memo=None):
+        entries, by_name, by_postal_code, names = data
+        segments, number, na, ca, postal_code = self.split(text)
+        if not segments:
+            return ParsedAddress(None, number, na, ca, None, None, postal_code, 0.0)
+
+        if len(segments) == 1:
+            street, places = self.split_words(segments[0], names)
+            segments = [street] + places
+
+        # the first segment is the street, or a place name when there's no street,
+        # eg: 'Ngaglik, Sleman'. The place is only taken when it matches better.
+        starts = [1]
+        if get_variants(segments[0]) & names:
+            starts.append(0)
+
+        best = None
+        for start in starts:
+            places = [get_variants(segment) for segment in segments[start:]]
+            key = (tuple(places), postal_code)
+            result = memo.get(key) if memo is not None else None
+            if result is None:
+                result = self.match(data, places, postal_code)
+                if memo is not None:
+                    memo[key] = result
+            if best is None or result[2] > best[1][2]:
+                best = (start, result)
+        start, (index, place_index, confidence) = best
+
+        village = None
+        address_segments = segments[:start]
+        if place_index is not None and place_index >= 1:
+            # the place before the sub district is the village.
+            village = segments[start + place_index - 1]
+            address_segments = segments[:start + place_index - 1]
+
+        sub_district_id = entries[index][0] if index is not None else None
+        if postal_code is None and index is not None:
+            postal_code = entries[index][1]
+        return ParsedAddress(', '.join(address_segments) or None, number, na, ca, village,
+                             sub_district_id, postal_code, confidence)
+
+    def parse(self, text):
+        """
+        function to parse one address.
+
+        :param `text` is string address, eg: 'Jl. Sudirman No.34, RT.4/RW.21 Sinduarjo, Ngaglik, Sleman'
+        :return `ParsedAddress`.
+        """
+        return self.parse_with(self.load(), text)
+
+    def parse_many(self, texts):
+        """
+        function to parse many addresses against the same index,
+        the repeated place names are matched once.
+
+        :param `texts` is iterable of string addresses.
+        :return list of `ParsedAddress`.
+        """
+        data = self.load()
+        memo = {}
+        return [self.parse_with(data, text, memo) for text in texts]
+
+
+address_parser = AddressParser()
+hierarchy_changed.connect(address_parser.invalidate,
+                          dispatch_uid='django_address_address_parser')
+
+
+def parse_address(text):
+    """ function to parse one address with the shared `address_parser`. """
+    return address_parser.parse(text)
+
+
+def parse_addresses(texts):
+    """ function to parse many addresses with the shared `address_parser`. """
+    return address_parser.parse_many(texts)
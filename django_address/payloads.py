@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+import hashlib
+
+from .models import (Country, Province, District, SubDistrict)
+from .signals import hierarchy_changed
+from .utils import LazyIndex
+
+# the kinds of the payloads, by the level of their items.
+KINDS = ('countries', 'provinces', 'districts', 'sub_districts')
+
+
+class HierarchyPayloads(LazyIndex):
+    """
+    Precomputed json payloads of the cascading lookups, eg: the districts
+    of a province. The children are grouped with one query per level, each
+    payload is encoded once, and its strong ETag is the hash of the encoded
+    payload, so it's the same in all the processes whatever their cache.
+
+    >>> hierarchy_payloads.get('districts', 1)
+    ('9f86d081884c7d65...', b'{"results": [{"id": 1, "name": "Sleman"}, ...]}')
+    """
+
+    def build(self):
+        """
+        function to group the published children by their parent,
+        the countries are all included.
+        :return dict of {'version': ..., 'groups': {kind: {parent id: [dict]}}, 'payloads': {}}
+        """
+        countries = list(Country.objects.order_by('name', 'id').values('id', 'name', 'code'))
+        groups = {
+            'countries': {None: countries},
+            'provinces': {country['id']: [] for country in countries},
+            'districts': {},
+            'sub_districts': {},
+        }
+
+        provinces = Province.objects.published().order_by('name', 'id')\
+                                    .values_list('id', 'country_id', 'name')
+        for pk, country_id, name in provinces:
+            groups['districts'][pk] = []
+            if country_id in groups['provinces']:
+                groups['provinces'][country_id].append({'id': pk, 'name': name})
+
+        districts = District.objects.published().filter(province__deleted_at__isnull=True)\
+                                    .order_by('name', 'id').values_list('id', 'province_id', 'name')
+        for pk, province_id, name in districts:
+            groups['sub_districts'][pk] = []
+            if province_id in groups['districts']:
+                groups['districts'][province_id].append({'id': pk, 'name': name})
+
+        sub_districts = SubDistrict.objects.published()\
+                                           .filter(district__deleted_at__isnull=True,
+                                                   province__deleted_at__isnull=True)\
+                                           .order_by('name', 'id')\
+                                           .values_list('id', 'district_id', 'name', 'postal_code')
+        for pk, district_id, name, postal_code in sub_districts.iterator():
+            if district_id in groups['sub_districts']:
+                groups['sub_districts'][district_id].append(
+                    {'id': pk, 'name': name, 'postal_code': postal_code})
+
+        return {'version': self.version, 'groups': groups, 'payloads': {}}
+
+    def get(self, kind, parent_id=None):
+        """
+        function to get the payload of the children of a parent.
+
+        :param `kind` is string one of `KINDS`.
+        :param `parent_id` is integer id of the parent, None for the countries.
+        :return tuple of (etag, json bytes), or None when the parent doesn't exist.
+        """
+        data = self.load()
+        key = (kind, parent_id)
+        payload = data['payloads'].get(key)
+        if payload is None:
+            results = data['groups'].get(kind, {}).get(parent_id)
+            if results is None:
+                return None
+            body = json.dumps({'results': results}, ensure_ascii=False).encode('utf-8')
+            etag = hashlib.sha256(body).hexdigest()
+            payload = data['payloads'][key] = (etag, body)
+        return payload
+
+
+hierarchy_payloads = HierarchyPayloads()
+hierarchy_changed.connect(hierarchy_payloads.invalidate,
+                          dispatch_uid='django_address_hierarchy_payloads')
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import bisect
+from collections import namedtuple
+
+from .models import SubDistrict
+from .signals import hierarchy_changed
+from .utils import LazyIndex
+
+PostalCodeEntry = namedtuple('PostalCodeEntry', [
+    'postal_code',
+    'sub_district_id', 'sub_district',
+    'district_id', 'district',
+    'province_id', 'province',
+    'country_id', 'country',
+])
+
+
+class PostalCodeIndex(LazyIndex):
+    """
+    In-process index of the published sub districts by their postal code,
+    built with one query on the first lookup and rebuilt lazily after
+    the geography tables are changed.
+
+    >>> postal_code_index.get('55581')
+    (PostalCodeEntry(postal_code='55581', sub_district_id=1, sub_district='Ngaglik',
+                     district_id=1, district='Sleman', province_id=1,
+                     province='Yogyakarta', country_id=1, country='Indonesia'),)
+    >>> postal_code_index.startswith('555')
+    [PostalCodeEntry(postal_code='55511', ...), ...]
+    """
+
+    def get_queryset(self):
+        return SubDistrict.objects.published()\
+                                  .exclude(postal_code__isnull=True)\
+                                  .exclude(postal_code='')
+
+    def build(self):
+        """
+        function to load the index with one query.
+        :return tuple of ({postal_code: (PostalCodeEntry, ...)}, sorted postal codes)
+        """
+        entries = {}
+        queryset = self.get_queryset().order_by().values_list(
+            'postal_code', 'id', 'name',
+            'district_id', 'district__name',
+            'district__province_id', 'district__province__name',
+            'district__province__country_id', 'district__province__country__name')
+
+        for row in queryset.iterator():
+            postal_code = row[0].strip()
+            entry = PostalCodeEntry(postal_code, *row[1:])
+            entries.setdefault(postal_code, []).append(entry)
+
+        entries = {code: tuple(items) for code, items in entries.items()}
+        return (entries, sorted(entries))
+
+    def get(self, postal_code):
+        """
+        function to get the sub districts of a postal code.
+
+        :param `postal_code` is string postal code, eg: '55581'
+        :return tuple of `PostalCodeEntry`, empty when not found.
+        """
+        entries, codes = self.load()
+        return entries.get(str(postal_code).strip(), ())
+
+    def startswith(self, prefix, limit=None):
+        """
+        function to get the sub districts of all postal codes
+        starting with the `prefix`, sorted by the postal code.
+
+        :param `prefix` is string prefix of postal code, eg: '555'
+        :param `limit` is integer maximum number of entries, optional.
+        :return list of `PostalCodeEntry`.
+        """
+        entries, codes = self.load()
+        prefix = str(prefix).strip()
+        output = []
+
+        index = bisect.bisect_left(codes, prefix)
+        while index < len(codes) and codes[index].startswith(prefix):
+            output.extend(entries[codes[index]])
+            if limit is not None and len(output) >= limit:
+                return output[:limit]
+            index += 1
+        return output
+
+    def __contains__(self, postal_code):
+        entries, codes = self.load()
+        return str(postal_code).strip() in entries
+
+
+postal_code_index = PostalCodeIndex()
+hierarchy_changed.connect(postal_code_index.invalidate,
+                          dispatch_uid='django_address_postal_code_index')
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import re
+import json
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+NON_WHITESPACE = re.compile(r'[^ \t\n\r]')
+
+
+class JSONStreamReader(object):
+    """
+    Incremental reader to walk a big json document without loading
+    the whole file into memory, only the current value is decoded.
+
+    >>> reader = JSONStreamReader(open('addresses.json'))
+    >>> for key in reader.iter_keys():
+    ...     if key == 'postals':
+    ...         for province_code in reader.iter_keys():
+    ...             for postal in reader.iter_array():
+    ...                 print(province_code, postal)
+    ...     else:
+    ...         reader.read_value()
+    """
+
+    def __init__(self, fileobj, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.fileobj = fileobj
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """ function to read the next chunk, return False at the end of file. """
+        if self.eof:
+            return False
+
+        if self.pos >= self.chunk_size:
+            # drop the consumed part to keep the buffer small.
+            self.buffer = self.buffer[self.pos:]
+            self.pos = 0
+
+        chunk = self.fileobj.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer += chunk
+        return True
+
+    def peek(self):
+        """ function to get the next non-whitespace character or None. """
+        while True:
+            match = NON_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self.fill():
+                return None
+
+    def expect(self, chars):
+        char = self.peek()
+        if char is None or char not in chars:
+            raise ValueError('Expecting one of %r at position %s, got %r'
+                             % (chars, self.pos, char))
+        self.pos += 1
+        return char
+
+    def read_value(self):
+        """ function to decode the next json value completely. """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except ValueError:
+                if self.fill():
+                    continue
+                raise
+
+            # numbers and literals may be cut at the end of the buffer.
+            if end == len(self.buffer) and self.fill():
+                continue
+
+            self.pos = end
+            return value
+
+    def iter_keys(self):
+        """
+        function to iterate the keys of current json object,
+        the value of each key should be consumed before the next one.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+
+        while True:
+            key = self.read_value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def iter_array(self):
+        """ function to iterate the decoded values of current json array. """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+
+        while True:
+            yield self.read_value()
+            if self.expect(',]') == ']':
+                return
+
+
+def open_stream(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    return JSONStreamReader(io.open(path, encoding='utf-8'), chunk_size=chunk_size)
+
+
+def iter_countries(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to iterate the countries of `countries.json` one by one.
+
+    :param `path` is string path of the fixture.
+    :return generator of dict, eg: {'country': 'Indonesia', 'states': [...]}
+    """
+    reader = open_stream(path, chunk_size)
+    with reader.fileobj:
+        for key in reader.iter_keys():
+            if key != 'countries':
+                reader.read_value()
+                continue
+            for country_data in reader.iter_array():
+                yield country_data
+
+
+def iter_countries_code(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to iterate the countries of `countries-code.json` one by one.
+
+    :param `path` is string path of the fixture.
+    :return generator of dict, eg: {'name': 'Indonesia', 'code': 'ID', ...}
+    """
+    reader = open_stream(path, chunk_size)
+    with reader.fileobj:
+        for country_data in reader.iter_array():
+            yield country_data
+
+
+def iter_addresses(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to iterate the records of `addresses.json` in file order.
+
+    :param `path` is string path of the fixture.
+    :return generator of tuple (kind, province_code, data), eg:
+        ('country', None, 'Indonesia')
+        ('province', '34', {'province_name': 'Yogyakarta'})
+        ('postal', '34', {'city': 'Sleman', 'sub_district': 'Ngaglik',
+                          'postal_code': '55581'})
+    """
+    reader = open_stream(path, chunk_size)
+    with reader.fileobj:
+        for key in reader.iter_keys():
+            if key == 'country':
+                yield ('country', None, reader.read_value())
+            elif key == 'provinces':
+                for province_code in reader.iter_keys():
+                    yield ('province', province_code, reader.read_value())
+            elif key == 'postals':
+                for province_code in reader.iter_keys():
+                    for postal_data in reader.iter_array():
+                        yield ('postal', province_code, postal_data)
+            else:
+                reader.read_value()
@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+from itertools import (chain, islice)
+
+from django.db.models import QuerySet
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import (Country, Province, District, SubDistrict)
+from .utils import parse_json_string
+
+ADDRESS_FIELDS = ('address', 'village', 'number', 'na', 'ca')
+
+# (key, model, path from the sub district)
+HIERARCHY_LEVELS = (
+    ('sub_district', SubDistrict, ''),
+    ('district', District, 'district__'),
+    ('province', Province, 'district__province__'),
+    ('country', Country, 'district__province__country__'),
+)
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def get_dict_fields(model):
+    """
+    function to get the field names included by `model_to_dict()`,
+    :return list of field names.
+    """
+    opts = model._meta
+    return [field.name for field in chain(opts.concrete_fields, opts.private_fields)
+            if getattr(field, 'editable', False)]
+
+
+class AddressSerializer(object):
+    """
+    Serializer to output the same data as `AddressModel.get_full_address_json()`
+    for many addresses, the hierarchy is fetched with one `values()` query
+    and each distinct sub district, district, province and country is
+    serialized once, the nested dicts are shared between the addresses.
+
+    >>> serializer = AddressSerializer()
+    >>> for data in serializer.serialize(Profile.objects.all()):
+    ...     print(data['sub_district']['name'])
+    >>> response = StreamingHttpResponse(serializer.iter_json(Profile.objects.all()),
+    ...                                  content_type='application/json')
+    """
+
+    def __init__(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.encoder = DjangoJSONEncoder()
+        self.levels = [(key, get_dict_fields(model), path)
+                       for key, model, path in HIERARCHY_LEVELS]
+
+        self.nodes = {key: {} for key, model, path in HIERARCHY_LEVELS}
+        self.hierarchies = {}    # {sub_district_id: {'sub_district': {...}, ...}}
+        self.fragments = {}      # {sub_district_id: encoded json of the hierarchy}
+
+    def get_columns(self, prefix=''):
+        return [prefix + path + name for key, fields, path in self.levels for name in fields]
+
+    def add_hierarchy(self, row, prefix=''):
+        """
+        function to build the hierarchy dicts of a sub district from a values() row.
+
+        :param `row` is dict of the `get_columns(prefix)` values.
+        :param `prefix` is string path to the sub district.
+        :return dict of the hierarchy.
+        """
+        sub_district_id = row[prefix + 'id']
+        hierarchy = self.hierarchies.get(sub_district_id)
+        if hierarchy is not None:
+            return hierarchy
+
+        hierarchy = {}
+        for key, fields, path in self.levels:
+            nodes = self.nodes[key]
+            pk = row[prefix + path + 'id']
+            node = nodes.get(pk)
+            if node is None:
+                node = nodes[pk] = {name: row[prefix + path + name] for name in fields}
+                if key == 'country':
+                    node['states'] = parse_json_string(node.get('states'), default=[])
+            hierarchy[key] = node
+
+        self.hierarchies[sub_district_id] = hierarchy
+        return hierarchy
+
+    def load_hierarchies(self, sub_district_ids):
+        """ function to fetch the missing hierarchies with one query. """
+        missing_ids = {pk for pk in sub_district_ids if pk not in self.hierarchies}
+        if missing_ids:
+            queryset = SubDistrict.objects.filter(id__in=missing_ids).order_by()
+            for row in queryset.values(*self.get_columns()):
+                self.add_hierarchy(row)
+
+    def iter_rows(self, addresses):
+        """
+        function to iterate the addresses with their hierarchy.
+
+        :param `addresses` is queryset or iterable of `AddressModel` instances.
+        :return generator of tuple (address dict, hierarchy dict)
+        """
+        if isinstance(addresses, QuerySet):
+            prefix = 'sub_district__'
+            columns = list(ADDRESS_FIELDS) + self.get_columns(prefix)
+            for row in addresses.values(*columns).iterator(chunk_size=self.chunk_size):
+                address = {name: row[name] for name in ADDRESS_FIELDS}
+                yield address, self.add_hierarchy(row, prefix)
+            return
+
+        addresses = iter(addresses)
+        while True:
+            chunk = list(islice(addresses, self.chunk_size))
+            if not chunk:
+                return
+            self.load_hierarchies(instance.sub_district_id for instance in chunk)
+            for instance in chunk:
+                address = {name: getattr(instance, name) for name in ADDRESS_FIELDS}
+                yield address, self.hierarchies[instance.sub_district_id]
+
+    def serialize(self, addresses):
+        """
+        function to serialize the addresses into dicts.
+
+        :param `addresses` is queryset or iterable of `AddressModel` instances.
+        :return generator of dict, same as `get_full_address_json()`
+        """
+        for address, hierarchy in self.iter_rows(addresses):
+            address.update(hierarchy)
+            yield address
+
+    def get_fragment(self, hierarchy):
+        sub_district_id = hierarchy['sub_district']['id']
+        fragment = self.fragments.get(sub_district_id)
+        if fragment is None:
+            fragment = self.encoder.encode(hierarchy)[1:-1]
+            self.fragments[sub_district_id] = fragment
+        return fragment
+
+    def iter_json(self, addresses):
+        """
+        function to stream the addresses as a json array.
+
+        :param `addresses` is queryset or iterable of `AddressModel` instances.
+        :return generator of bytes.
+        """
+        buffer = ['[']
+        for index, (address, hierarchy) in enumerate(self.iter_rows(addresses)):
+            if index:
+                buffer.append(',')
+            buffer.append(self.encoder.encode(address)[:-1])
+            buffer.append(', ')
+            buffer.append(self.get_fragment(hierarchy))
+            buffer.append('}')
+
+            if len(buffer) >= self.chunk_size:
+                yield ''.join(buffer).encode('utf-8')
+                buffer = []
+
+        buffer.append(']')
+        yield ''.join(buffer).encode('utf-8')
+
+
+def serialize_addresses(addresses, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to serialize many addresses into dicts,
+    :return generator of dict, same as `get_full_address_json()`
+    """
+    return AddressSerializer(chunk_size=chunk_size).serialize(addresses)
+
+
+def iter_addresses_json(addresses, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    function to stream many addresses as json array bytes.
+    :return generator of bytes.
+    """
+    return AddressSerializer(chunk_size=chunk_size).iter_json(addresses)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import threading
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.dispatch import Signal
+from django.db.models.signals import (pre_save, post_save, post_delete)
+
+from .models import (Country, Province, District, SubDistrict)
+
+# sent when a change of the geography tables is committed,
+# the in-process indexes and caches connect to it to drop their data.
+hierarchy_changed = Signal()
+
+GEOGRAPHY_MODELS = (Country, Province, District, SubDistrict)
+
+_deferred = threading.local()
+
+
+def send_hierarchy_changed(sender=None, using=None):
+    """
+    function to notify the geography changes manually,
+    eg: after the bulk writes which don't send `post_save`.
+    The signal is sent once the current transaction is committed,
+    so no process can rebuild its data from the rows before the commit,
+    and nothing is sent when it's rolled back.
+    """
+    if getattr(_deferred, 'depth', 0):
+        _deferred.pending = True
+        _deferred.using = using
+        return
+    transaction.on_commit(lambda: hierarchy_changed.send(sender=sender), using=using)
+
+
+@contextmanager
+def deferred_hierarchy_changed():
+    """
+    context manager to send `hierarchy_changed` only once at the end,
+    eg: for the bulk loads which save or delete many rows.
+
+    >>> with deferred_hierarchy_changed():
+    ...     SubDistrict.objects.all().delete()
+    """
+    _deferred.depth = getattr(_deferred, 'depth', 0) + 1
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+        if not _deferred.depth and getattr(_deferred, 'pending', False):
+            _deferred.pending = False
+            transaction.on_commit(lambda: hierarchy_changed.send(sender=None),
+                                  using=getattr(_deferred, 'using', None))
+
+
+def geography_changed(sender, **kwargs):
+    if not kwargs.get('raw'):
+        send_hierarchy_changed(sender, using=kwargs.get('using'))
+
+
+for model in GEOGRAPHY_MODELS:
+    post_save.connect(geography_changed, sender=model,
+                      dispatch_uid='django_address_%s_saved' % model._meta.model_name)
+    post_delete.connect(geography_changed, sender=model,
+                        dispatch_uid='django_address_%s_deleted' % model._meta.model_name)
+
+
+# the fields of each parent model copied into the sub districts,
+# and the lookup of their sub districts.
+HIERARCHY_FIELDS = {
+    Country: (('name',), 'district__province__country_id'),
+    Province: (('name', 'country_id'), 'district__province_id'),
+    District: (('name', 'province_id'), 'district_id'),
+}
+
+
+def set_sub_district_hierarchy(sender, instance, raw=False, **kwargs):
+    if not raw:
+        instance.set_hierarchy()
+
+
+def check_parent_changed(sender, instance, raw=False, **kwargs):
+    """ compare the copied fields with the stored row, before it's saved. """
+    if raw or instance.pk is None:
+        instance._hierarchy_changed = False
+        return
+
+    fields = HIERARCHY_FIELDS[sender][0]
+    stored = sender._default_manager.filter(pk=instance.pk).values_list(*fields).first()
+    instance._hierarchy_changed = stored is not None and \
+        stored != tuple(getattr(instance, field) for field in fields)
+
+
+def refresh_sub_districts(sender, instance, created=False, raw=False, **kwargs):
+    """ update the denormalized columns of the sub districts with one UPDATE. """
+    if raw or created or not getattr(instance, '_hierarchy_changed', False):
+        return
+
+    instance._hierarchy_changed = False
+    lookup = HIERARCHY_FIELDS[sender][1]
+    SubDistrict.objects.refresh_hierarchy(**{lookup: instance.pk})
+
+
+pre_save.connect(set_sub_district_hierarchy, sender=SubDistrict,
+                 dispatch_uid='django_address_subdistrict_hierarchy')
+
+for model in HIERARCHY_FIELDS:
+    pre_save.connect(check_parent_changed, sender=model,
+                     dispatch_uid='django_address_%s_check_hierarchy' % model._meta.model_name)
+    post_save.connect(refresh_sub_districts, sender=model,
+                      dispatch_uid='django_address_%s_refresh_hierarchy' % model._meta.model_name)
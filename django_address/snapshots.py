@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import mmap
+import time
+import array
+import bisect
+import struct
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+from .autocomplete import normalize
+
+# the snapshot is a binary file of parallel arrays, one item per node,
+# the nodes are ordered by level and then by their parent index:
+#
+#   ids, parents, names, keys (normalized names), postal_codes, child_starts,
+#   id_order, name_order, postal_order, string_offsets, string_data
+#
+# the names and postal codes are indexes of the interned utf-8 strings.
+# The workers memory-map it read-only, so all of them share one copy.
+
+MAGIC = b'DJADDRSN'
+FORMAT_VERSION = 1
+BYTE_ORDER = 0x01020304
+LEVELS = ('country', 'province', 'district', 'sub_district')
+SECTIONS = (
+    ('ids', 'q'),
+    ('parents', 'i'),
+    ('names', 'I'),
+    ('keys', 'I'),
+    ('postal_codes', 'I'),
+    ('child_starts', 'I'),
+    ('id_order', 'I'),
+    ('name_order', 'I'),
+    ('postal_order', 'I'),
+    ('string_offsets', 'I'),
+    ('string_data', 'B'),
+)
+HEADER = struct.Struct('=8sIIqd%dI' % (len(LEVELS) + 1))
+SECTION = struct.Struct('=QQ')
+ALIGNMENT = 8
+
+SnapshotNode = namedtuple('SnapshotNode', ['index', 'level', 'id', 'name', 'postal_code', 'parent'])
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def get_snapshot_rows():
+    """
+    function to load the published geography tree with one query per level,
+    the countries are all included.
+
+    :return list of levels, each level is list of tuple (id, parent id, name, postal code)
+    """
+    from .models import (Country, Province, District, SubDistrict)
+
+    provinces = Province.objects.published()
+    districts = District.objects.published().filter(province__deleted_at__isnull=True)
+    sub_districts = SubDistrict.objects.published()\
+                                       .filter(district__deleted_at__isnull=True,
+                                               province__deleted_at__isnull=True)
+    return [
+        [(pk, None, name, None) for pk, name in Country.objects.values_list('id', 'name')],
+        [(pk, parent, name, None) for pk, parent, name
+         in provinces.values_list('id', 'country_id', 'name')],
+        [(pk, parent, name, None) for pk, parent, name
+         in districts.values_list('id', 'province_id', 'name')],
+        list(sub_districts.values_list('id', 'district_id', 'name', 'postal_code').iterator()),
+    ]
+
+
+def build_snapshot(levels):
+    """
+    function to build the arrays of a snapshot.
+
+    :param `levels` is the result of `get_snapshot_rows()`.
+    :return tuple of ([starts of the levels], {section name: array})
+    """
+    strings = {'': 0}
+    string_list = ['']
+
+    def intern(value):
+        value = value or ''
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(string_list)
+            string_list.append(value)
+        return index
+
+    arrays = {name: array.array(typecode) for name, typecode in SECTIONS}
+    level_starts = [0]
+    indexes = {}        # {pk: node index} of the previous level
+    for rows in levels:
+        nodes = []
+        for pk, parent, name, postal_code in rows:
+            if len(level_starts) == 1:
+                parent = -1
+            else:
+                parent = indexes.get(parent)
+                if parent is None:
+                    continue    # the orphans of a deleted parent.
+            nodes.append((parent, normalize(name), pk, name, (postal_code or '').strip()))
+        nodes.sort()
+
+        indexes = {}
+        for parent, key, pk, name, postal_code in nodes:
+            indexes[pk] = len(arrays['ids'])
+            arrays['ids'].append(pk)
+            arrays['parents'].append(parent)
+            arrays['names'].append(intern(name))
+            arrays['keys'].append(intern(key))
+            arrays['postal_codes'].append(intern(postal_code))
+        arrays['id_order'].extend(index for pk, index in sorted(indexes.items()))
+        level_starts.append(len(arrays['ids']))
+
+    # the parents are ordered, so the children of a node are one range.
+    total = len(arrays['ids'])
+    counts = [0] * (total + 1)
+    for parent in arrays['parents']:
+        if parent >= 0:
+            counts[parent] += 1
+    start = level_starts[1]
+    for index in range(total + 1):
+        arrays['child_starts'].append(start)
+        start += counts[index]
+
+    encoded = [value.encode('utf-8') for value in string_list]
+    arrays['name_order'].extend(sorted(range(total), key=lambda index: (
+        encoded[arrays['keys'][index]], index)))
+    arrays['postal_order'].extend(sorted(
+        (index for index in range(total) if arrays['postal_codes'][index]),
+        key=lambda index: (encoded[arrays['postal_codes'][index]], index)))
+
+    offset = 0
+    for value in encoded:
+        arrays['string_offsets'].append(offset)
+        offset += len(value)
+    arrays['string_offsets'].append(offset)
+    arrays['string_data'].frombytes(b''.join(encoded))
+    return level_starts, arrays
+
+
+def write_snapshot(path, version=None):
+    """
+    function to write the snapshot of the published geography tree,
+    into a temporary file which then replaces `path` atomically.
+
+    :param `path` is string path of the snapshot file.
+    :param `version` is integer hierarchy version, default the current one.
+    :return integer number of nodes.
+    """
+    if version is None:
+        from .cache import get_hierarchy_version
+        version = get_hierarchy_version()
+
+    level_starts, arrays = build_snapshot(get_snapshot_rows())
+    header_size = HEADER.size + SECTION.size * len(SECTIONS)
+
+    sections = []
+    offset = header_size
+    for name, typecode in SECTIONS:
+        offset += -offset % ALIGNMENT
+        sections.append((offset, len(arrays[name])))
+        offset += len(arrays[name]) * arrays[name].itemsize
+
+    temporary_path = '%s.%s.tmp' % (path, os.getpid())
+    with open(temporary_path, 'wb') as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, FORMAT_VERSION, BYTE_ORDER, version,
+                                        time.time(), *level_starts))
+        for section in sections:
+            snapshot_file.write(SECTION.pack(*section))
+        for (name, typecode), (offset, length) in zip(SECTIONS, sections):
+            snapshot_file.write(b'\0' * (offset - snapshot_file.tell()))
+            arrays[name].tofile(snapshot_file)
+    os.replace(temporary_path, path)
+    return level_starts[-1]
+
+
+class GeographySnapshot(object):
+    """
+    Read-only view of a snapshot file, memory-mapped so the processes
+    share the pages. The lookups are binary searches over the arrays,
+    without the ORM.
+
+    >>> snapshot = GeographySnapshot('/var/lib/address.snapshot')
+    >>> node = snapshot.get('sub_district', 1)
+    SnapshotNode(index=52, level='sub_district', id=1, name='Ngaglik', postal_code='55581', parent=40)
+    >>> snapshot.get_ancestors(node.index)
+    [SnapshotNode(..., name='Sleman', ...), SnapshotNode(..., name='Yogyakarta', ...), ...]
+    >>> snapshot.find('ngaglik', level='sub_district')
+    >>> snapshot.find_postal_code('55581')
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as snapshot_file:
+            self.mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self.load()
+        except Exception:
+            self.close()
+            raise
+
+    def load(self):
+        if len(self.mmap) < HEADER.size:
+            raise SnapshotError('"%s" isn\'t a snapshot' % self.path)
+        header = HEADER.unpack_from(self.mmap, 0)
+        magic, format_version, byte_order, self.version, self.created_at = header[:5]
+        if magic != MAGIC:
+            raise SnapshotError('"%s" isn\'t a snapshot' % self.path)
+        if format_version != FORMAT_VERSION or byte_order != BYTE_ORDER:
+            raise SnapshotError('"%s" was written by another version or platform' % self.path)
+        self.level_starts = list(header[5:])
+
+        self.view = memoryview(self.mmap)
+        self.sections = {}
+        for position, (name, typecode) in enumerate(SECTIONS):
+            offset, length = SECTION.unpack_from(self.mmap, HEADER.size + position * SECTION.size)
+            size = length * array.array(typecode).itemsize
+            self.sections[name] = self.view[offset:offset + size].cast(typecode)
+            setattr(self, name, self.sections[name])
+
+    def close(self):
+        """ function to release the views and the mapping. """
+        for section in getattr(self, 'sections', {}).values():
+            section.release()
+        self.sections = {}
+        if getattr(self, 'view', None) is not None:
+            self.view.release()
+            self.view = None
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.level_starts[-1]
+
+    def get_string(self, index):
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return bytes(self.string_data[start:end]).decode('utf-8')
+
+    def get_level(self, index):
+        return LEVELS[bisect.bisect_right(self.level_starts, index) - 1]
+
+    def get_level_range(self, level):
+        position = LEVELS.index(level)
+        return self.level_starts[position], self.level_starts[position + 1]
+
+    def get_node(self, index):
+        """ function to get the node at `index`. """
+        parent = self.parents[index]
+        return SnapshotNode(index, self.get_level(index), self.ids[index],
+                            self.get_string(self.names[index]),
+                            self.get_string(self.postal_codes[index]) or None,
+                            parent if parent >= 0 else None)
+
+    def get_index(self, level, pk):
+        """
+        function to get the node index of a row.
+
+        :param `level` is string one of `LEVELS`.
+        :param `pk` is integer id of the row.
+        :return integer index or None.
+        """
+        start, stop = self.get_level_range(level)
+        ids, id_order = self.ids, self.id_order
+        end = stop
+        while start < end:
+            middle = (start + end) // 2
+            if ids[id_order[middle]] < pk:
+                start = middle + 1
+            else:
+                end = middle
+        if start < stop and ids[id_order[start]] == pk:
+            return id_order[start]
+        return None
+
+    def get(self, level, pk):
+        """ function to get the node of a row, or None. """
+        index = self.get_index(level, pk)
+        return self.get_node(index) if index is not None else None
+
+    def get_parent(self, index):
+        parent = self.parents[index]
+        return self.get_node(parent) if parent >= 0 else None
+
+    def get_ancestors(self, index):
+        """ function to get the parents of a node, from the nearest to the country. """
+        ancestors = []
+        parent = self.parents[index]
+        while parent >= 0:
+            ancestors.append(self.get_node(parent))
+            parent = self.parents[parent]
+        return ancestors
+
+    def get_children(self, index):
+        """ function to get the children of a node, ordered by name. """
+        return [self.get_node(child) for child in
+                range(self.child_starts[index], self.child_starts[index + 1])]
+
+    def get_bytes(self, index):
+        start, end = self.string_offsets[index], self.string_offsets[index + 1]
+        return self.string_data[start:end].tobytes()
+
+    def search_order(self, order, strings, value, prefix=False):
+        """
+        function to get the node indexes of `order` whose string is `value`,
+        or starts with it when `prefix` is True.
+        """
+        value = value.encode('utf-8')
+        start, end = 0, len(order)
+        while start < end:
+            middle = (start + end) // 2
+            if self.get_bytes(strings[order[middle]]) < value:
+                start = middle + 1
+            else:
+                end = middle
+
+        indexes = []
+        for position in range(start, len(order)):
+            current = self.get_bytes(strings[order[position]])
+            if current != value and not (prefix and current.startswith(value)):
+                break
+            indexes.append(order[position])
+        return indexes
+
+    def filter_level(self, indexes, level=None, limit=None):
+        if level is not None:
+            start, end = self.get_level_range(level)
+            indexes = [index for index in indexes if start <= index < end]
+        return [self.get_node(index) for index in indexes[:limit]]
+
+    def find(self, name, level=None, limit=None):
+        """
+        function to get the nodes with the name, compared normalized.
+
+        :param `name` is string name, eg: 'Ngaglik'
+        :param `level` is string one of `LEVELS`, optional.
+        :return list of `SnapshotNode`.
+        """
+        return self.filter_level(self.search_order(self.name_order, self.keys, normalize(name)),
+                                 level, limit)
+
+    def search(self, prefix, level=None, limit=None):
+        """ function to get the nodes whose normalized name starts with `prefix`. """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        return self.filter_level(self.search_order(self.name_order, self.keys, prefix,
+                                                   prefix=True), level, limit)
+
+    def find_postal_code(self, postal_code):
+        """ function to get the sub district nodes of a postal code. """
+        return self.filter_level(self.search_order(self.postal_order, self.postal_codes,
+                                                   str(postal_code or '').strip()))
+
+
+snapshots = {}
+snapshots_lock = threading.Lock()
+
+
+def get_snapshot_path():
+    return getattr(settings, 'DJANGO_ADDRESS_SNAPSHOT_PATH', None)
+
+
+def get_snapshot(path=None):
+    """
+    function to get the shared snapshot of this process, it's re-opened
+    when the file was replaced, eg: by `./manage.py snapshot_address`
+
+    settings:
+        DJANGO_ADDRESS_SNAPSHOT_PATH = '/var/lib/address.snapshot'
+
+    :param `path` is string path, default the `DJANGO_ADDRESS_SNAPSHOT_PATH`.
+    :return `GeographySnapshot`.
+    """
+    path = path or get_snapshot_path()
+    if not path:
+        raise SnapshotError('The DJANGO_ADDRESS_SNAPSHOT_PATH setting is required')
+
+    stat = os.stat(path)
+    key = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    current = snapshots.get(path)
+    if current is None or current[0] != key:
+        with snapshots_lock:
+            current = snapshots.get(path)
+            if current is None or current[0] != key:
+                # the old mapping is left to the garbage collector,
+                # other threads may still be reading it.
+                current = snapshots[path] = (key, GeographySnapshot(path))
+    return current[1]
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import csv
+import gzip
+import json
+from collections import OrderedDict
+
+# this module doesn't import the models, so the parsing
+# can run in the worker processes of `import_address`.
+
+REQUIRED_COLUMNS = ('country', 'province', 'city', 'sub_district')
+COLUMN_ALIASES = {'district': 'city', 'postal': 'postal_code', 'zip': 'postal_code'}
+
+
+def normalize(value):
+    """ function to strip and collapse the whitespaces, return None for empty. """
+    if value is None:
+        return None
+    value = ' '.join(str(value).split())
+    return value or None
+
+
+def get_source_format(path):
+    """
+    function to get the format of a source from its extension,
+    :return string 'csv' or 'jsonl'
+    """
+    name = path.lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    if name.endswith('.jsonl') or name.endswith('.ndjson'):
+        return 'jsonl'
+    if name.endswith('.csv'):
+        return 'csv'
+    raise ValueError('Unknown format of "%s", use .csv or .jsonl' % path)
+
+
+def open_source(path):
+    if path.lower().endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return io.open(path, encoding='utf-8', newline='')
+
+
+def iter_source_rows(path):
+    """
+    function to iterate the flat rows of a csv or jsonl source,
+    one row per sub district, eg:
+
+        country,province,city,sub_district,postal_code
+        Indonesia,Yogyakarta,Sleman,Ngaglik,55581
+
+    :param `path` is string path of the source, optionally gzipped.
+    :return generator of tuple (line number, dict of row)
+    :raise ValueError when a jsonl line isn't a json object.
+    """
+    source_format = get_source_format(path)
+    with open_source(path) as source_file:
+        if source_format == 'csv':
+            for line, row in enumerate(csv.DictReader(source_file), start=2):
+                yield line, row
+        else:
+            for line, text in enumerate(source_file, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    row = json.loads(text)
+                except ValueError as error:
+                    raise ValueError('%s:%s invalid json, %s' % (path, line, error))
+                if not isinstance(row, dict):
+                    raise ValueError('%s:%s isn\'t a json object' % (path, line))
+                yield line, row
+
+
+def parse_source(path):
+    """
+    function to parse and normalize a source into the sub districts
+    grouped by country and province, the duplicated rows are dropped.
+
+    :param `path` is string path of the source.
+    :return dict, eg:
+        {'path': 'id.csv', 'rows': 2, 'errors': [],
+         'countries': {'Indonesia': {'Yogyakarta': [('Sleman', 'Ngaglik', '55581')]}}}
+    """
+    countries = OrderedDict()
+    errors = []
+    total = 0
+
+    for line, row in iter_source_rows(path):
+        total += 1
+        values = {}
+        for key, value in row.items():
+            key = normalize(key)
+            if key:
+                key = key.lower()
+                values[COLUMN_ALIASES.get(key, key)] = normalize(value)
+
+        missing = [column for column in REQUIRED_COLUMNS if not values.get(column)]
+        if missing:
+            errors.append('%s:%s missing %s' % (path, line, ', '.join(missing)))
+            continue
+
+        provinces = countries.setdefault(values['country'], OrderedDict())
+        sub_districts = provinces.setdefault(values['province'], OrderedDict())
+        sub_districts[(values['city'], values['sub_district'], values.get('postal_code'))] = None
+
+    return {
+        'path': path,
+        'rows': total,
+        'errors': errors,
+        'countries': OrderedDict(
+            (country, OrderedDict((province, list(sub_districts))
+                                  for province, sub_districts in provinces.items()))
+            for country, provinces in countries.items()),
+    }
+
+
+def merge_sources(results):
+    """
+    function to merge the parsed sources, a country or province
+    may be spread over several sources. The countries are compared
+    case-insensitively like `Country.objects.by_name()`, with the name
+    of their first source.
+
+    :param `results` is iterable of `parse_source()` results.
+    :return dict of {country: {province: [(city, sub_district, postal_code), ...]}}
+    """
+    countries = OrderedDict()
+    names = {}
+    for result in results:
+        for country, provinces in result['countries'].items():
+            country = names.setdefault(country.strip().lower(), country)
+            merged = countries.setdefault(country, OrderedDict())
+            for province, sub_districts in provinces.items():
+                merged.setdefault(province, OrderedDict()).update(
+                    (key, None) for key in sub_districts)
+
+    return OrderedDict(
+        (country, OrderedDict((province, list(sub_districts))
+                              for province, sub_districts in provinces.items()))
+        for country, provinces in countries.items())
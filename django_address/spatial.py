@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import math
+import heapq
+from collections import namedtuple
+
+from django.conf import settings
+
+from .models import SubDistrict
+from .signals import hierarchy_changed
+from .utils import LazyIndex
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+DEFAULT_CELL_SIZE = 0.1     # degrees, about 11km
+# the empty rings searched before jumping to the nearest populated ring.
+EMPTY_RINGS = 8
+
+SpatialEntry = namedtuple('SpatialEntry', [
+    'sub_district_id', 'sub_district', 'postal_code',
+    'latitude', 'longitude',
+    'district_id', 'province_id', 'country_id',
+])
+
+
+def haversine(latitude1, longitude1, latitude2, longitude2):
+    """
+    function to get the great-circle distance between two points.
+    :return float distance in km.
+    """
+    latitude1, longitude1, latitude2, longitude2 = map(
+        math.radians, (latitude1, longitude1, latitude2, longitude2))
+    a = math.sin((latitude2 - latitude1) / 2) ** 2 + \
+        math.cos(latitude1) * math.cos(latitude2) * math.sin((longitude2 - longitude1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex(LazyIndex):
+    """
+    In-process grid index of the published sub districts by their
+    coordinates, for the nearest-neighbour and radius queries without
+    any GIS extension. The cells are searched ring by ring around the
+    point, until no farther cell can hold a closer sub district.
+
+    settings:
+        DJANGO_ADDRESS_SPATIAL_CELL_SIZE = 0.1     # degrees
+
+    >>> spatial_index.nearest(-7.7, 110.4, k=1)
+    [(SpatialEntry(sub_district_id=1, sub_district='Ngaglik', postal_code='55581', ...), 1.2)]
+    >>> spatial_index.radius(-7.7, 110.4, 5)
+    [(SpatialEntry(...), 1.2), (SpatialEntry(...), 3.9)]
+    """
+
+    def get_cell_size(self):
+        return float(getattr(settings, 'DJANGO_ADDRESS_SPATIAL_CELL_SIZE', DEFAULT_CELL_SIZE))
+
+    def get_queryset(self):
+        return SubDistrict.objects.published()\
+                                  .filter(latitude__isnull=False, longitude__isnull=False)
+
+    def build(self):
+        """
+        function to load the index with one query.
+        :return tuple of ({(row, column): [(lat radians, lon radians, cos lat, entry)]},
+                          cell size, number of columns)
+        """
+        cell_size = self.get_cell_size()
+        # the columns are narrowed to wrap exactly around the 360 degrees.
+        columns = int(math.ceil(360.0 / cell_size))
+        column_size = 360.0 / columns
+        cells = {}
+        queryset = self.get_queryset().order_by().values_list(
+            'id', 'name', 'postal_code', 'latitude', 'longitude',
+            'district_id', 'province_id', 'country_id')
+
+        for row in queryset.iterator():
+            entry = SpatialEntry(*row)
+            key = (int(math.floor(entry.latitude / cell_size)),
+                   int(math.floor(entry.longitude / column_size)) % columns)
+            latitude = math.radians(entry.latitude)
+            cells.setdefault(key, []).append((latitude, math.radians(entry.longitude),
+                                              math.cos(latitude), entry))
+        return (cells, cell_size, columns)
+
+    def search(self, latitude, longitude, k=None, max_distance=None):
+        """
+        function to find the sub districts around a point, sorted by distance.
+        The search stops when no farther cell can hold a closer sub district,
+        when every populated cell was visited, or when the rings cover the
+        whole grid. Far from the data the empty rings are skipped, and once
+        the iterated ring cells would outnumber the populated cells, the
+        populated cells left are scanned directly instead.
+
+        :param `latitude` is float latitude in degrees.
+        :param `longitude` is float longitude in degrees.
+        :param `k` is integer maximum number of results, None for all.
+        :param `max_distance` is float maximum distance in km, optional.
+        :return list of tuple (`SpatialEntry`, distance in km)
+        """
+        cells, cell_size, columns = self.load()
+        if not cells or (k is not None and k <= 0):
+            return []
+
+        latitude, longitude = float(latitude), float(longitude)
+        row = int(math.floor(latitude / cell_size))
+        column = int(math.floor(longitude / (360.0 / columns)))
+
+        point_latitude = math.radians(latitude)
+        point_longitude = math.radians(longitude)
+        point_cos = math.cos(point_latitude)
+        asin, sin, sqrt = math.asin, math.sin, math.sqrt
+        diameter = 2 * EARTH_RADIUS_KM
+
+        heap = []       # [(-distance, sub_district_id, entry)]
+        visited = set()
+
+        def scan(items):
+            for item_latitude, item_longitude, item_cos, entry in items:
+                a = sin((item_latitude - point_latitude) / 2) ** 2 + \
+                    point_cos * item_cos * sin((item_longitude - point_longitude) / 2) ** 2
+                distance = diameter * asin(min(1.0, sqrt(a)))
+                if max_distance is not None and distance > max_distance:
+                    continue
+                item = (-distance, -entry.sub_district_id, entry)
+                if k is None or len(heap) < k:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+
+        rows = (int(math.floor(-90.0 / cell_size)), int(math.floor(90.0 / cell_size)))
+        ring = 0
+        iterated = 0    # the ring cells iterated, populated or not.
+        while len(visited) < len(cells):
+            if ring == EMPTY_RINGS and not visited:
+                ring = max(ring, self.get_nearest_ring(cells, row, column, columns))
+            if ring:
+                bound = self.get_lower_bound(latitude, longitude, row, column, ring - 1,
+                                             cell_size, columns)
+                if bound is None:
+                    # the previous rings cover the whole grid.
+                    break
+                if max_distance is not None and bound > max_distance:
+                    break
+                if k is not None and len(heap) >= k and -heap[0][0] <= bound:
+                    break
+
+            # the rings cost more than a scan of the populated cells, these are scanned directly.
+            if ring and iterated + 8 * ring > len(cells):
+                for key, items in cells.items():
+                    if key not in visited:
+                        scan(items)
+                break
+
+            for key in self.iter_ring(row, column, ring, columns, rows):
+                iterated += 1
+                if key in visited or key not in cells:
+                    continue
+                visited.add(key)
+                scan(cells[key])
+            ring += 1
+
+        return [(entry, -distance) for distance, pk, entry in sorted(heap, reverse=True)]
+
+    def iter_ring(self, row, column, ring, columns, rows=None):
+        """
+        function to iterate the cell keys at the chebyshev distance `ring`,
+        within the tuple of (first, last) `rows` when it's given.
+        """
+        if not ring:
+            yield (row, column % columns)
+            return
+        first, last = rows or (row - ring, row + ring)
+        # the columns wrap around, each of them is only yielded once per row.
+        offsets = range(-ring, ring + 1) if 2 * ring + 1 < columns else range(columns)
+        for edge in (row - ring, row + ring):
+            if first <= edge <= last:
+                for offset in offsets:
+                    yield (edge, (column + offset) % columns)
+        for offset in range(max(-ring + 1, first - row), min(ring, last - row + 1)):
+            yield (row + offset, (column - ring) % columns)
+            yield (row + offset, (column + ring) % columns)
+
+    def get_nearest_ring(self, cells, row, column, columns):
+        """ function to get the chebyshev distance of the nearest populated cell. """
+        column = column % columns
+        nearest = None
+        for item_row, item_column in cells:
+            distance = abs(item_column - column)
+            distance = max(abs(item_row - row), min(distance, columns - distance))
+            if nearest is None or distance < nearest:
+                nearest = distance
+        return nearest
+
+    def get_lower_bound(self, latitude, longitude, row, column, ring, cell_size, columns):
+        """
+        function to get the minimum great-circle distance in km from the point
+        to any point outside the cells within the chebyshev distance `ring`.
+        :return float distance, or None when these cells cover the whole grid.
+        """
+        bounds = []
+        south, north = (row - ring) * cell_size, (row + ring + 1) * cell_size
+        if south > -90.0:
+            bounds.append((latitude - south) * KM_PER_DEGREE)
+        if north < 90.0:
+            bounds.append((north - latitude) * KM_PER_DEGREE)
+
+        if 2 * ring + 1 < columns:
+            column_size = 360.0 / columns
+            west, east = (column - ring) * column_size, (column + ring + 1) * column_size
+            delta = min(longitude - west, east - longitude)
+            if delta < 90.0:
+                # the distance to the nearest meridian at `delta` degrees.
+                bounds.append(EARTH_RADIUS_KM * math.asin(min(
+                    1.0, math.cos(math.radians(latitude)) * math.sin(math.radians(delta)))))
+            else:
+                # beyond 90 degrees the nearest point of these meridians is a pole.
+                bounds.append((90.0 - abs(latitude)) * KM_PER_DEGREE)
+        return min(bounds) if bounds else None
+
+    def nearest(self, latitude, longitude, k=1, max_distance=None):
+        """
+        function to get the `k` nearest sub districts of a point.
+        :return list of tuple (`SpatialEntry`, distance in km)
+        """
+        return self.search(latitude, longitude, k=k, max_distance=max_distance)
+
+    def radius(self, latitude, longitude, radius, limit=None):
+        """
+        function to get the sub districts within `radius` km of a point.
+        :return list of tuple (`SpatialEntry`, distance in km)
+        """
+        return self.search(latitude, longitude, k=limit, max_distance=radius)
+
+
+spatial_index = SpatialIndex()
+hierarchy_changed.connect(spatial_index.invalidate,
+                          dispatch_uid='django_address_spatial_index')
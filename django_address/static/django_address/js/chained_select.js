@@ -0,0 +1,73 @@
+/*
+ * Chained selects of `ChainedSubDistrictWidget`, each select is filled
+ * from the json url of its level, with the value of the previous select
+ * in place of `{id}`. The selected path is rendered by the form, the rest
+ * of its options are loaded on the first focus.
+ */
+(function () {
+    'use strict';
+
+    function clear(select) {
+        while (select.options.length > 1) {
+            select.remove(1);
+        }
+        select.value = '';
+        delete select.dataset.loaded;
+    }
+
+    function load(select, parentId) {
+        var url = select.dataset.url.replace('{id}', parentId || '');
+        var value = select.value;
+        select.dataset.loaded = 'true';
+        return fetch(url, {credentials: 'same-origin'}).then(function (response) {
+            if (!response.ok) {
+                throw new Error(response.status);
+            }
+            return response.json();
+        }).then(function (payload) {
+            clear(select);
+            select.dataset.loaded = 'true';
+            payload.results.forEach(function (result) {
+                select.add(new Option(result.name, result.id));
+            });
+            select.value = value;
+        }).catch(function () {
+            delete select.dataset.loaded;
+        });
+    }
+
+    function init(container) {
+        var selects = Array.prototype.slice.call(container.querySelectorAll('select[data-url]'));
+
+        selects.forEach(function (select, index) {
+            var previous = selects[index - 1];
+            var next = selects[index + 1];
+
+            select.addEventListener('focus', function () {
+                if (select.dataset.loaded) {
+                    return;
+                }
+                if (!previous) {
+                    load(select);
+                } else if (previous.value) {
+                    load(select, previous.value);
+                }
+            });
+
+            select.addEventListener('change', function () {
+                selects.slice(index + 1).forEach(clear);
+                if (next && select.value) {
+                    load(next, select.value);
+                }
+            });
+        });
+
+        if (selects.length && !selects[0].value) {
+            load(selects[0]);
+        }
+    }
+
+    document.addEventListener('DOMContentLoaded', function () {
+        Array.prototype.forEach.call(document.querySelectorAll('[data-chained-select]'), init);
+    });
+})();
@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.contrib import admin
+from django_address.admin import AddressModelAdminMixin
+
+from django_address.tests.models import Profile
+
+
+@admin.register(Profile)
+class ProfileAdmin(AddressModelAdminMixin, admin.ModelAdmin):
+    list_display = ('name', 'sub_district', 'full_address')
+    list_filter = AddressModelAdminMixin.address_list_filter
+    full_address_format = 'id'
+    full_address_include_country = True
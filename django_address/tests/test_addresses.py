@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import json
+
+from asgiref.sync import sync_to_async
+from django.db import (DatabaseError, transaction)
+from django.utils import timezone
+from django.test import (TestCase, override_settings)
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from django_address.models import (Country, Province, District, SubDistrict,
+                                   aget_full_addresses, aget_full_addresses_json)
+from django_address.cache import (VERSION_KEY, get_cache, get_hierarchy_version,
+                                  hierarchy_cache)
+from django_address.formatters import (AddressFormatter, formatters, get_formatter,
+                                       iter_full_addresses, register_formatter)
+from django_address.serializers import (serialize_addresses, iter_addresses_json)
+from django_address.tests.models import Profile
+from django_address.tests.utils import run_on_commit
+
+
+class TestAddressModel(TestCase):
+
+    def setUp(self):
+        country = Country.objects.create(name='Indonesia', states=['Aceh', 'Yogyakarta'],
+                                         code='ID', phone_code='+62', currency_code='IDR')
+        province = Province.objects.create(country=country, name='Yogyakarta')
+        district = District.objects.create(province=province, name='Sleman')
+        self.ngaglik = SubDistrict.objects.create(district=district, name='Ngaglik',
+                                                  postal_code='55581')
+        self.depok = SubDistrict.objects.create(district=district, name='Depok')
+
+        Profile.objects.create(name='Agus', address='Jl. Karto Dimejo', number=35, na=3,
+                               ca=34, village='Sinduarjo', sub_district=self.ngaglik)
+        Profile.objects.create(name='Budi', address='Jl. Kaliurang', number=0, na=None,
+                               ca=0, village=None, sub_district=self.ngaglik)
+        Profile.objects.create(name='Citra', address='Jl. Seturan', number=None, na=1,
+                               ca=None, village='Caturtunggal', sub_district=self.depok)
+
+    def test_get_full_address(self):
+        profile = Profile.objects.get(name='Agus')
+        self.assertEqual(profile.get_full_address(format_address='id', include_country=True),
+                         'Jl. Karto Dimejo No.35, RT.3/RW.34 Sinduarjo, Ngaglik, Sleman, '
+                         'Yogyakarta, Indonesia - 55581')
+
+    def test_get_hierarchy(self):
+        profile = Profile.objects.get(name='Agus')
+        self.assertIsNone(profile.get_loaded_hierarchy())
+        with self.assertNumQueries(1):
+            sub_district, district, province, country = profile.get_hierarchy()
+        self.assertEqual((sub_district.name, district.name, province.name, country.name),
+                         ('Ngaglik', 'Sleman', 'Yogyakarta', 'Indonesia'))
+        with self.assertNumQueries(0):
+            profile.get_full_address(include_country=True)
+            profile.get_full_address_json()
+
+        profile = Profile.objects.select_related('sub_district__district__province').get(name='Agus')
+        self.assertIsNotNone(profile.get_loaded_hierarchy(include_country=False))
+        self.assertIsNone(profile.get_loaded_hierarchy())
+
+    async def test_aget_full_address(self):
+        addresses = await aget_full_addresses(Profile.objects.filter(name='Agus'))
+        self.assertEqual(addresses, ['Jl. Karto Dimejo Number.35, NA.3/CA.34 Sinduarjo, '
+                                     'Ngaglik, Sleman, Yogyakarta - 55581'])
+
+        # the hierarchies are loaded by one query, shared by the same sub district.
+        profiles = await sync_to_async(list)(Profile.objects.order_by('name'))
+        addresses = await aget_full_addresses(profiles, format_address='id',
+                                              include_country=True)
+        self.assertTrue(all(profile.get_loaded_hierarchy() for profile in profiles))
+        self.assertIs(profiles[0].sub_district, profiles[1].sub_district)
+        self.assertEqual(addresses, await sync_to_async(lambda: [
+            profile.get_full_address(format_address='id', include_country=True)
+            for profile in Profile.objects.order_by('name')])())
+
+        profile = await sync_to_async(Profile.objects.get)(name='Citra')
+        self.assertEqual(await profile.aget_full_address(),
+                         await sync_to_async(profile.get_full_address)())
+        data = await profile.aget_full_address_json()
+        self.assertEqual(data['country']['states'], ['Aceh', 'Yogyakarta'])
+        self.assertEqual(await aget_full_addresses_json([profile]), [data])
+
+    async def test_manager_async(self):
+        await sync_to_async(SubDistrict.objects.filter(pk=self.depok.pk).update)(
+            deleted_at=timezone.now())
+        published = await SubDistrict.objects.apublished()
+        self.assertEqual([sub_district.name for sub_district in published], ['Ngaglik'])
+        deleted = await SubDistrict.objects.adeleted(name__startswith='D')
+        self.assertEqual([sub_district.name for sub_district in deleted], ['Depok'])
+        self.assertEqual(await Province.objects.apublished(name='Aceh'), [])
+
+    def test_with_full_address(self):
+        for format_address in ('id', 'en'):
+            for include_country in (True, False):
+                queryset = Profile.objects.with_full_address(format_address=format_address,
+                                                             include_country=include_country)
+                with self.assertNumQueries(1):
+                    rows = [(profile.full_address, profile) for profile in queryset]
+
+                self.assertEqual(len(rows), 3)
+                for full_address, profile in rows:
+                    self.assertEqual(full_address, profile.get_full_address(
+                        format_address=format_address, include_country=include_country))
+
+    def test_iter_full_addresses(self):
+        profile = Profile.objects.get(name='Budi')
+        self.assertEqual(profile.get_full_address(),
+                         'Jl. Kaliurang, NA.-/CA.- , Ngaglik, Sleman, Yogyakarta - 55581')
+
+        for format_address in ('id', 'en'):
+            for include_country in (True, False):
+                expected = [profile.get_full_address(format_address=format_address,
+                                                     include_country=include_country)
+                            for profile in Profile.objects.all()]
+                with self.assertNumQueries(1):
+                    self.assertEqual(list(iter_full_addresses(
+                        Profile.objects.all(), format_address, include_country)), expected)
+
+    def test_register_formatter(self):
+        formatter = register_formatter('test', AddressFormatter(
+            labels={'number': '#'}, empty='',
+            template='%(number)s %(address)s, %(village)s, %(district)s%(postal_code)s',
+            number_template='%(number_label)s%(number)s',
+            postal_code_template=' %(postal_code)s'))
+        self.addCleanup(formatters.pop, 'test')
+
+        self.assertIs(get_formatter('test'), formatter)
+        self.assertIs(get_formatter('unknown'), get_formatter('en'))
+        profile = Profile.objects.get(name='Agus')
+        self.assertEqual(profile.get_full_address(format_address='test'),
+                         '#35 Jl. Karto Dimejo, Sinduarjo, Sleman 55581')
+
+        with self.assertRaises(ValueError):
+            AddressFormatter(template='%(address)s %(street)s').compile()
+
+        # the same string in SQL, from the templates of the formatter.
+        register_formatter('custom', AddressFormatter(
+            labels={'na': 'RT'}, empty='?',
+            template='%(sub_district)s (%(postal_code)s) / %(province)s%(country)s: '
+                     '%(address)s%(number)s %(na_label)s %(na)s %(ca)s%% %(village)s',
+            number_template=' [%(number)s]', country_template=' in %(country)s',
+            postal_code_template='ZIP %(postal_code)s'))
+        self.addCleanup(formatters.pop, 'custom')
+        for format_address in ('test', 'custom'):
+            for include_country in (True, False):
+                for profile in Profile.objects.with_full_address(format_address=format_address,
+                                                                 include_country=include_country):
+                    self.assertEqual(profile.full_address, profile.get_full_address(
+                        format_address=format_address, include_country=include_country))
+        self.assertEqual(Profile.objects.with_full_address('custom').get(name='Agus').full_address,
+                         'Ngaglik (ZIP 55581) / Yogyakarta: Jl. Karto Dimejo [35] RT 3 34% Sinduarjo')
+
+        class PythonFormatter(AddressFormatter):
+            def format_rows(self, rows, include_country=False, model=None):
+                for row in rows:
+                    yield row[0].upper()
+
+        register_formatter('python', PythonFormatter())
+        self.addCleanup(formatters.pop, 'python')
+        with self.assertRaises(ValueError):
+            Profile.objects.with_full_address('python')
+
+    def test_serialize_addresses(self):
+        expected = [profile.get_full_address_json() for profile in Profile.objects.all()]
+
+        with self.assertNumQueries(1):
+            self.assertEqual(list(serialize_addresses(Profile.objects.all())), expected)
+
+        profiles = list(Profile.objects.all())
+        with self.assertNumQueries(1):
+            self.assertEqual(list(serialize_addresses(profiles)), expected)
+
+        output = b''.join(iter_addresses_json(Profile.objects.all(), chunk_size=2))
+        self.assertEqual(json.loads(output.decode('utf-8')),
+                         json.loads(json.dumps(expected, cls=DjangoJSONEncoder)))
+
+    @override_settings(DJANGO_ADDRESS_HIERARCHY_CACHE=True)
+    def test_hierarchy_cache(self):
+        profile = Profile.objects.get(name='Agus')
+        expected = profile.get_full_address(include_country=True)
+        expected_json = profile.get_full_address_json()
+
+        profile = Profile.objects.get(name='Agus')
+        with self.assertNumQueries(0):
+            self.assertEqual(profile.get_full_address(include_country=True), expected)
+            self.assertEqual(profile.get_full_address_json(), expected_json)
+
+        # the other processes only share the django cache.
+        hierarchy_cache.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(profile.get_full_address(include_country=True), expected)
+
+        district = self.ngaglik.district
+        district.name = 'Kabupaten Sleman'
+        district.save()
+        run_on_commit()
+        with self.assertNumQueries(1):
+            self.assertIn('Ngaglik, Kabupaten Sleman, Yogyakarta', profile.get_full_address())
+
+    @override_settings(DJANGO_ADDRESS_HIERARCHY_CACHE=True)
+    def test_hierarchy_cache_lru_hit(self):
+        profile = Profile.objects.get(name='Agus')
+        expected = profile.get_full_address()
+
+        # the warm entries don't call the cache backend.
+        with mock.patch('django_address.cache.get_cache') as patched_get_cache:
+            with self.assertNumQueries(0):
+                self.assertEqual(profile.get_full_address(), expected)
+        patched_get_cache.assert_not_called()
+
+        # the version is read again after the interval.
+        with override_settings(DJANGO_ADDRESS_VERSION_CHECK_INTERVAL=0.000001):
+            version = hierarchy_cache.version
+            get_cache().set(VERSION_KEY, version + 1)
+            with self.assertNumQueries(1):
+                hierarchy_cache.get_sub_district(profile.sub_district_id)
+            self.assertEqual(hierarchy_cache.version, version + 1)
+
+    def test_hierarchy_version_on_commit(self):
+        run_on_commit()
+        version = get_hierarchy_version()
+        with self.assertRaises(DatabaseError):
+            with transaction.atomic():
+                self.depok.name = 'Depok Baru'
+                self.depok.save()
+                raise DatabaseError
+        run_on_commit()
+        self.assertEqual(get_hierarchy_version(), version)
+
+        # bumped once the change is committed.
+        self.depok.save()
+        self.assertEqual(get_hierarchy_version(), version)
+        run_on_commit()
+        self.assertGreater(get_hierarchy_version(), version)
+
+    @override_settings(DJANGO_ADDRESS_HIERARCHY_CACHE=True, DJANGO_ADDRESS_CACHE_LRU_SIZE=1)
+    def test_hierarchy_cache_lru_size(self):
+        for profile in Profile.objects.all():
+            profile.get_full_address()
+        self.assertEqual(len(hierarchy_cache.entries), 1)
@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import connection
+from django.urls import reverse
+from django.test import (TestCase, override_settings)
+from django.contrib.auth import get_user_model
+from django.test.utils import CaptureQueriesContext
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from django_address.formatters import (AddressFormatter, formatters, register_formatter)
+from django_address.models import (Country, Province, District, SubDistrict)
+from django_address.paginators import EstimatedCountPaginator
+from django_address.signals import send_hierarchy_changed
+from django_address.tests.admin import ProfileAdmin
+from django_address.tests.models import Profile
+
+
+@override_settings(ROOT_URLCONF='django_address.tests.urls')
+class TestGeographyAdmin(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.country = Country.objects.create(name='Indonesia', code='ID')
+        cls.province = Province.objects.create(country=cls.country, name='Yogyakarta')
+        cls.district = District.objects.create(province=cls.province, name='Sleman')
+        cls.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        send_hierarchy_changed()
+
+    def add_sub_districts(self, count):
+        SubDistrict.objects.bulk_create([
+            SubDistrict(district=self.district, name='Sub District %s' % index,
+                        postal_code='55%03d' % index)
+            for index in range(SubDistrict.objects.count(), SubDistrict.objects.count() + count)
+        ])
+
+    def get_changelist_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_sub_district_changelist_queries(self):
+        url = reverse('admin:django_address_subdistrict_changelist')
+        self.add_sub_districts(3)
+        queries = self.get_changelist_queries(url)
+
+        self.add_sub_districts(30)
+        self.assertEqual(self.get_changelist_queries(url), queries)
+
+    def test_autocomplete_uses_index(self):
+        self.add_sub_districts(3)
+        SubDistrict.objects.create(district=self.district, name='Ngaglik', postal_code='55581')
+        send_hierarchy_changed()
+
+        url = reverse('admin:django_address_district_autocomplete')
+        response = self.client.get(url, {'term': 'slem'})
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([result['text'] for result in results], ['Sleman'])
+
+    def test_estimated_count_paginator(self):
+        self.add_sub_districts(5)
+        paginator = EstimatedCountPaginator(SubDistrict.objects.order_by('pk'), 2)
+        # the estimate is only used on postgresql, other databases count exactly.
+        self.assertEqual(paginator.count, 5)
+        self.assertEqual(paginator.num_pages, 3)
+
+
+@override_settings(ROOT_URLCONF='django_address.tests.urls')
+class TestAddressModelAdmin(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        country = Country.objects.create(name='Indonesia', code='ID')
+        cls.yogyakarta = Province.objects.create(country=country, name='Yogyakarta')
+        cls.sleman = District.objects.create(province=cls.yogyakarta, name='Sleman')
+        cls.ngaglik = SubDistrict.objects.create(district=cls.sleman, name='Ngaglik',
+                                                 postal_code='55581')
+        jakarta = Province.objects.create(country=country, name='DKI Jakarta')
+        cls.menteng = SubDistrict.objects.create(
+            district=District.objects.create(province=jakarta, name='Jakarta Pusat'),
+            name='Menteng', postal_code='10310')
+        cls.user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.url = reverse('admin:tests_profile_changelist')
+
+    def add_profiles(self, count, sub_district):
+        Profile.objects.bulk_create([
+            Profile(name='Profile %s' % index, address='Jl. Kaliurang', number=index,
+                    na=1, ca=2, sub_district=sub_district)
+            for index in range(count)
+        ])
+
+    def get_changelist_queries(self, params=None):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response, len(context.captured_queries)
+
+    def test_changelist_queries(self):
+        self.add_profiles(2, self.ngaglik)
+        response, queries = self.get_changelist_queries()
+        profile = Profile.objects.order_by('-id').first()
+        self.assertContains(response, profile.get_full_address(format_address='id',
+                                                               include_country=True))
+
+        self.add_profiles(40, self.menteng)
+        self.assertEqual(self.get_changelist_queries()[1], queries)
+
+    def test_changelist_python_formatter(self):
+        class UpperFormatter(AddressFormatter):
+            def format_rows(self, rows, include_country=False, model=None):
+                for row in super(UpperFormatter, self).format_rows(rows, include_country, model):
+                    yield row.upper()
+
+        register_formatter('upper', UpperFormatter())
+        self.addCleanup(formatters.pop, 'upper')
+        self.add_profiles(2, self.ngaglik)
+        with mock.patch.object(ProfileAdmin, 'full_address_format', 'upper'):
+            response, queries = self.get_changelist_queries()
+            self.add_profiles(40, self.menteng)
+            self.assertEqual(self.get_changelist_queries()[1], queries)
+        self.assertContains(response, 'JL. KALIURANG NUMBER.1, NA.1/CA.2')
+
+    def test_hierarchy_list_filters(self):
+        self.add_profiles(2, self.ngaglik)
+        self.add_profiles(3, self.menteng)
+
+        response = self.get_changelist_queries({'province': self.yogyakarta.pk})[0]
+        self.assertEqual(response.context['cl'].result_count, 2)
+        self.assertContains(response, '?district=%s' % self.sleman.pk)
+
+        response = self.get_changelist_queries({'district': self.sleman.pk})[0]
+        self.assertEqual(response.context['cl'].result_count, 2)
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+from django_address.models import (Country, Province,
+                                   District, SubDistrict)
+from django_address.autocomplete import (autocomplete_index, normalize)
+from django_address.tests.utils import run_on_commit
+
+
+@override_settings(ROOT_URLCONF='django_address.tests.urls')
+class TestAutocomplete(TestCase):
+
+    def setUp(self):
+        country = Country.objects.create(name='Indonesia')
+        province = Province.objects.create(country=country, name='Yogyakarta')
+        self.sleman = District.objects.create(province=province, name='Sleman')
+        self.kota = District.objects.create(province=province, name='Kota Yogyakarta')
+        self.ngaglik = SubDistrict.objects.create(district=self.sleman, name='Ngaglik',
+                                                  postal_code='55581')
+        SubDistrict.objects.create(district=self.sleman, name='Gamping', postal_code='55294')
+        SubDistrict.objects.create(district=self.kota, name='Gondokusuman', postal_code='55225')
+        SubDistrict.objects.create(district=self.kota, name='Mantrijeron', postal_code='55143')
+        SubDistrict.objects.create(district=self.sleman, name='Turi', postal_code='55551',
+                                   deleted_at=timezone.now())
+        run_on_commit()
+
+    def test_normalize(self):
+        self.assertEqual(normalize(' Daerah  Istimewa-Yogyakartá! '), 'daerah istimewa yogyakarta')
+
+    def test_search_ranking(self):
+        results = autocomplete_index.search('yogyakarta')
+        self.assertEqual([(r['type'], r['name']) for r in results],
+                         [('province', 'Yogyakarta'), ('district', 'Kota Yogyakarta')])
+
+        results = autocomplete_index.search('ng')
+        self.assertEqual([r['name'] for r in results], ['Ngaglik'])
+        self.assertEqual(results[0]['path'], 'Ngaglik, Sleman, Yogyakarta, Indonesia')
+        self.assertEqual(results[0]['postal_code'], '55581')
+        self.assertEqual(results[0]['district_id'], self.sleman.pk)
+
+        # infix matches come after the prefix matches.
+        results = autocomplete_index.search('man')
+        self.assertEqual([r['name'] for r in results], ['Mantrijeron', 'Sleman', 'Gondokusuman'])
+
+    def test_search_published_only(self):
+        self.assertEqual(autocomplete_index.search('turi'), [])
+        self.sleman.deleted_at = timezone.now()
+        self.sleman.save()
+        run_on_commit()
+        self.assertEqual(autocomplete_index.search('ngaglik'), [])
+
+    def test_search_types(self):
+        results = autocomplete_index.search('yogya', types=['district'])
+        self.assertEqual([r['name'] for r in results], ['Kota Yogyakarta'])
+
+    def test_view(self):
+        autocomplete_index.load()
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('django_address:autocomplete'),
+                                       {'q': 'gondo', 'limit': 5})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['name'] for r in response.json()['results']], ['Gondokusuman'])
+
+        # the unknown types don't match anything.
+        response = self.client.get(reverse('django_address:autocomplete'),
+                                   {'q': 'gondo', 'types': 'bogus'})
+        self.assertEqual(response.json()['results'], [])
+        response = self.client.get(reverse('django_address:autocomplete'),
+                                   {'q': 'gondo', 'types': 'bogus,sub_district'})
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(autocomplete_index.search('gondo', types=[]), [])
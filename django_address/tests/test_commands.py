@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import csv
+import gzip
+import json
+import shutil
+import tempfile
+from io import StringIO
+
+from django.db import DatabaseError
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from django_address.models import (Country, Province,
+                                   District, SubDistrict, FixtureChecksum)
+from django_address.management.commands.create_address import Command
+from django_address.tests.models import Profile
+from django_address.tests.utils import run_on_commit
+
+ADDRESSES_DATA = {
+    'country': 'Indonesia',
+    'provinces': {
+        '34': {'province_name': 'Yogyakarta'},
+        '16': {'province_name': 'Sumatera Selatan'},
+    },
+    'postals': {
+        '34': [
+            {'city': 'Sleman', 'sub_district': 'Ngaglik', 'postal_code': '55581'},
+            {'city': 'Sleman', 'sub_district': 'Depok', 'postal_code': '55281'},
+            {'city': 'Bantul', 'sub_district': 'Sewon', 'postal_code': '55185'},
+            {'city': 'Sleman', 'sub_district': 'Ngaglik', 'postal_code': '55581'},
+        ],
+        '16': [
+            {'city': 'Ogan Komering Ilir', 'sub_district': 'Kayuagung', 'postal_code': '30611'},
+            {'city': 'Ogan Komering Ilir', 'sub_district': 'Sungai Minang', 'postal_code': '30652'},
+        ],
+    },
+}
+
+
+class AddressFixtureTestCase(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addresses_path = os.path.join(self.tmp_dir, 'addresses.json')
+        with open(self.addresses_path, 'w') as addresses_file:
+            json.dump(ADDRESSES_DATA, addresses_file)
+
+        patcher = mock.patch.object(Command, 'get_addresses_path',
+                                    side_effect=lambda language='id', source=None:
+                                    source or self.addresses_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def get_hierarchy(self):
+        return sorted(SubDistrict.objects.values_list(
+            'district__province__country__name', 'district__province__name',
+            'district__name', 'name', 'postal_code'))
+
+
+class TestCreateAddressCommand(AddressFixtureTestCase):
+
+    def test_create_address(self):
+        call_command('create_address')
+        self.assertEqual(Province.objects.count(), 2)
+        self.assertEqual(District.objects.count(), 3)
+        self.assertEqual(SubDistrict.objects.count(), 5)
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 0)
+
+    def test_bulk_create_address(self):
+        call_command('create_address')
+        expected = self.get_hierarchy()
+        expected_countries = sorted(Country.objects.values_list(
+            'name', 'code', 'phone_code', 'currency_code', 'states'))
+
+        call_command('create_address', bulk='true', batch_size=2)
+        self.assertEqual(self.get_hierarchy(), expected)
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 0)
+        self.assertEqual(sorted(Country.objects.values_list(
+            'name', 'code', 'phone_code', 'currency_code', 'states')), expected_countries)
+        self.assertEqual(Province.objects.count(), 2)
+        self.assertEqual(District.objects.count(), 3)
+
+    def test_bulk_create_address_queries(self):
+        call_command('create_address', bulk='true')
+        Province.objects.all().delete()
+        country = Country.objects.get(name='Indonesia')
+
+        command = Command()
+        # delete provinces, districts, sub districts, resolve country,
+        # then one insert + one id lookup per level.
+        with self.assertNumQueries(9):
+            command.bulk_create_addresses(batch_size=1000)
+        self.assertEqual(Province.objects.filter(country=country).count(), 2)
+        self.assertEqual(SubDistrict.objects.count(), 5)
+
+    def test_bulk_create_address_source(self):
+        source = os.path.join(self.tmp_dir, 'custom.json')
+        data = {'country': 'Malaysia',
+                'provinces': {'01': {'province_name': 'Johor'}},
+                'postals': {'01': [{'city': 'Johor Bahru', 'sub_district': 'Tebrau',
+                                    'postal_code': '81100'}]}}
+        with open(source, 'w') as source_file:
+            json.dump(data, source_file)
+
+        call_command('create_address', bulk='true', source=source)
+        self.assertEqual(self.get_hierarchy(),
+                         [('Malaysia', 'Johor', 'Johor Bahru', 'Tebrau', '81100')])
+
+    def test_bulk_create_address_postals_first(self):
+        source = os.path.join(self.tmp_dir, 'postals-first.json')
+        with open(source, 'w') as source_file:
+            source_file.write('{"country": "Malaysia", "postals": {"01": [{"city": "A"}]}}')
+
+        with self.assertRaises(CommandError):
+            call_command('create_address', bulk='true', source=source)
+
+    def test_sync_create_address(self):
+        call_command('create_address', bulk='true')
+        sub_district = SubDistrict.objects.get(name='Sewon')
+        country_ids = set(Country.objects.values_list('id', flat=True))
+
+        data = json.loads(json.dumps(ADDRESSES_DATA))
+        data['postals']['34'] = [postal for postal in data['postals']['34']
+                                 if postal['sub_district'] != 'Depok']
+        data['postals']['34'].append({'city': 'Sleman', 'sub_district': 'Mlati',
+                                      'postal_code': '55284'})
+        with open(self.addresses_path, 'w') as addresses_file:
+            json.dump(data, addresses_file)
+
+        call_command('create_address', sync='true')
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 0)
+        self.assertEqual(set(Country.objects.values_list('id', flat=True)), country_ids)
+        self.assertEqual(SubDistrict.objects.get(name='Sewon').pk, sub_district.pk)
+        self.assertIsNotNone(SubDistrict.objects.get(name='Depok').deleted_at)
+        self.assertEqual(SubDistrict.objects.published().count(), 5)
+        self.assertEqual(SubDistrict.objects.count(), 6)
+
+        # unchanged fixtures are skipped with the stored checksum.
+        with self.assertNumQueries(2):
+            Command().sync_countries()
+            Command().sync_addresses()
+
+        # the removed sub district comes back.
+        with open(self.addresses_path, 'w') as addresses_file:
+            json.dump(ADDRESSES_DATA, addresses_file)
+        call_command('create_address', sync='true')
+        self.assertIsNone(SubDistrict.objects.get(name='Depok').deleted_at)
+        self.assertIsNotNone(SubDistrict.objects.get(name='Mlati').deleted_at)
+        self.assertEqual(SubDistrict.objects.count(), 6)
+
+        # the replaced tables don't match the synced fixture anymore.
+        call_command('create_address', bulk='true')
+        self.assertFalse(FixtureChecksum.objects.exists())
+        self.assertIsNotNone(Command().sync_addresses())
+
+        # a failed load keeps the checksums and the tables as they were.
+        call_command('create_address', sync='true')
+        checksums = FixtureChecksum.objects.count()
+        sub_districts = SubDistrict.objects.count()
+        with mock.patch.object(Command, 'create_addresses', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                call_command('create_address')
+        self.assertEqual(FixtureChecksum.objects.count(), checksums)
+        self.assertEqual(SubDistrict.objects.count(), sub_districts)
+
+
+class TestExportAddressCommand(AddressFixtureTestCase):
+
+    def setUp(self):
+        super(TestExportAddressCommand, self).setUp()
+        call_command('create_address', bulk='true')
+
+    def test_export_csv(self):
+        output = StringIO()
+        call_command('export_address', model='sub_district', stdout=output)
+        rows = list(csv.DictReader(StringIO(output.getvalue())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(set(rows[0]), {'id', 'district_id', 'name', 'postal_code', 'province_id',
+                                        'country_id', 'path', 'latitude', 'longitude', 'created_at', 'updated_at',
+                                        'deleted_at'})
+        self.assertEqual(sorted(row['postal_code'] for row in rows),
+                         sorted(SubDistrict.objects.values_list('postal_code', flat=True)))
+
+    def test_export_jsonl_gzip(self):
+        path = os.path.join(self.tmp_dir, 'countries.jsonl.gz')
+        call_command('export_address', model='country', format='jsonl', gzip='true',
+                     country='Indonesia', output=path, stderr=StringIO())
+
+        with gzip.open(path, 'rt') as export_file:
+            rows = [json.loads(line) for line in export_file]
+        self.assertEqual([row['name'] for row in rows], ['Indonesia'])
+        self.assertEqual(rows[0]['states'], Country.objects.get(name='Indonesia').states)
+
+    def test_export_fixture(self):
+        expected = self.get_hierarchy()
+        path = os.path.join(self.tmp_dir, 'export.json')
+        call_command('export_address', format='fixture', country='Indonesia',
+                     output=path, stderr=StringIO())
+
+        call_command('create_address', bulk='true', source=path)
+        self.assertEqual(self.get_hierarchy(), expected)
+
+        with self.assertRaises(CommandError):
+            call_command('export_address', format='fixture', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('export_address', model='auth.User', stdout=StringIO())
+
+
+class TestImportAddressCommand(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        Country.objects.create(name='Indonesia', code='ID')
+        Country.objects.create(name='Malaysia', code='MY')
+
+        self.csv_path = os.path.join(self.tmp_dir, 'id.csv')
+        with open(self.csv_path, 'w') as source_file:
+            source_file.write('country,province,city,sub_district,postal_code\n'
+                              'Indonesia,Yogyakarta,Sleman,Ngaglik,55581\n'
+                              'Indonesia, Yogyakarta , Sleman,Ngaglik,55581\n'
+                              'Indonesia,Yogyakarta,Bantul,Sewon,55185\n'
+                              'Indonesia,,Bantul,Sewon,55185\n'
+                              'Malaysia,Johor,Johor Bahru,Tebrau,81100\n')
+
+        self.jsonl_path = os.path.join(self.tmp_dir, 'my.jsonl.gz')
+        with gzip.open(self.jsonl_path, 'wt') as source_file:
+            for row in ({'country': 'Malaysia', 'province': 'Johor', 'district': 'Johor Bahru',
+                         'sub_district': 'Skudai', 'postal_code': '81300'},
+                        {'country': 'Indonesia', 'province': 'Yogyakarta', 'district': 'Sleman',
+                         'sub_district': 'Depok', 'postal_code': '55281'}):
+                source_file.write(json.dumps(row) + '\n')
+
+    def get_hierarchy(self):
+        return sorted(SubDistrict.objects.published().values_list(
+            'country__name', 'province__name', 'district__name', 'name', 'postal_code'))
+
+    def test_import_address(self):
+        stderr = StringIO()
+        call_command('import_address', self.csv_path, self.jsonl_path, workers=2, stderr=stderr)
+        self.assertIn('id.csv:5 missing province', stderr.getvalue())
+
+        expected = [('Indonesia', 'Yogyakarta', 'Bantul', 'Sewon', '55185'),
+                    ('Indonesia', 'Yogyakarta', 'Sleman', 'Depok', '55281'),
+                    ('Indonesia', 'Yogyakarta', 'Sleman', 'Ngaglik', '55581'),
+                    ('Malaysia', 'Johor', 'Johor Bahru', 'Skudai', '81300'),
+                    ('Malaysia', 'Johor', 'Johor Bahru', 'Tebrau', '81100')]
+        self.assertEqual(self.get_hierarchy(), expected)
+        self.assertEqual(Province.objects.count(), 2)
+
+        # synced again without duplicates, the rows gone from the sources are soft-deleted.
+        call_command('import_address', self.csv_path, self.jsonl_path, workers=1, stderr=stderr)
+        self.assertEqual(self.get_hierarchy(), expected)
+        profile = Profile.objects.create(name='Agus', address='Jl. Kaliurang',
+                                         sub_district=SubDistrict.objects.get(name='Depok'))
+        call_command('import_address', self.csv_path, stderr=stderr)
+        self.assertEqual(self.get_hierarchy(), [expected[0], expected[2], expected[4]])
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 0)
+        self.assertTrue(Profile.objects.filter(pk=profile.pk).exists())
+
+        # replaced, the delete cascades to the addresses.
+        call_command('import_address', self.csv_path, replace='true', stderr=stderr)
+        self.assertEqual(self.get_hierarchy(), [expected[0], expected[2], expected[4]])
+        self.assertFalse(Profile.objects.filter(pk=profile.pk).exists())
+
+    def test_validate_address(self):
+        call_command('import_address', self.jsonl_path, workers=1, stderr=StringIO())
+        run_on_commit()
+        stdout, stderr = StringIO(), StringIO()
+        call_command('validate_address', self.csv_path, stdout=stdout, stderr=stderr)
+        self.assertIn('Validated 5 rows, 5 invalid', stderr.getvalue())
+
+        rows = list(csv.reader(StringIO(stdout.getvalue())))
+        self.assertEqual(rows[0], ['source', 'line', 'field', 'code', 'message', 'suggestion'])
+        self.assertEqual([row[1:4] + row[5:] for row in rows[1:]],
+                         [['2', 'sub_district', 'unknown', ''],
+                          ['3', 'sub_district', 'unknown', ''],
+                          ['4', 'district', 'unknown', ''],
+                          ['5', 'province', 'missing', ''],
+                          ['6', 'sub_district', 'unknown', '']])
+
+        with self.assertRaises(CommandError):
+            call_command('validate_address', os.path.join(self.tmp_dir, 'addresses.xml'))
+
+    def test_import_address_errors(self):
+        path = os.path.join(self.tmp_dir, 'unknown.csv')
+        with open(path, 'w') as source_file:
+            source_file.write('country,province,city,sub_district\nSingapore,A,B,C\n')
+
+        with self.assertRaises(CommandError):
+            call_command('import_address', path)
+        with self.assertRaises(CommandError):
+            call_command('import_address', os.path.join(self.tmp_dir, 'addresses.xml'))
+        self.assertEqual(SubDistrict.objects.count(), 0)
+
+        path = os.path.join(self.tmp_dir, 'list.jsonl')
+        with open(path, 'w') as source_file:
+            source_file.write('{"country": "Indonesia"}\n["Indonesia"]\n')
+        for command in ('import_address', 'validate_address'):
+            with self.assertRaisesRegex(CommandError, 'list.jsonl:2 isn\'t a json object'):
+                call_command(command, path, stdout=StringIO(), stderr=StringIO())
+
+    def test_import_address_country_case(self):
+        path = os.path.join(self.tmp_dir, 'lower.csv')
+        with open(path, 'w') as source_file:
+            source_file.write('country,province,city,sub_district,postal_code\n'
+                              'indonesia,Yogyakarta,Sleman,Kalasan,55571\n')
+
+        # one country spelled differently by the sources is synced once.
+        call_command('import_address', self.csv_path, path, workers=1, stderr=StringIO())
+        self.assertEqual(
+            [row[3] for row in self.get_hierarchy() if row[0] == 'Indonesia'],
+            ['Sewon', 'Kalasan', 'Ngaglik'])
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django import forms
+from django.test import (TestCase, override_settings)
+from django.utils import timezone
+
+from django_address.forms import (ChainedSubDistrictWidget, SubDistrictChoiceField)
+from django_address.models import (Country, Province,
+                                   District, SubDistrict)
+from django_address.tests.models import Profile
+
+
+class ProfileForm(forms.ModelForm):
+    class Meta:
+        model = Profile
+        fields = ('name', 'sub_district', 'address')
+        field_classes = {'sub_district': SubDistrictChoiceField}
+
+
+@override_settings(ROOT_URLCONF='django_address.tests.urls')
+class TestChainedSubDistrict(TestCase):
+
+    def setUp(self):
+        self.country = Country.objects.create(name='Indonesia', code='ID')
+        province = Province.objects.create(country=self.country, name='Yogyakarta')
+        district = District.objects.create(province=province, name='Sleman')
+        self.ngaglik = SubDistrict.objects.create(district=district, name='Ngaglik',
+                                                  postal_code='55581')
+        self.turi = SubDistrict.objects.create(district=district, name='Turi', postal_code='55551',
+                                               deleted_at=timezone.now())
+        for index in range(20):
+            SubDistrict.objects.create(district=district, name='Sub District %s' % index)
+
+    def test_render(self):
+        form = ProfileForm()
+        self.assertIsInstance(form.fields['sub_district'].widget, ChainedSubDistrictWidget)
+        with self.assertNumQueries(0):
+            html = str(form['sub_district'])
+        self.assertIn('data-url="/address/countries/"', html)
+        self.assertIn('data-url="/address/districts/{id}/sub-districts/"', html)
+        self.assertIn('name="sub_district"', html)
+        self.assertNotIn('Ngaglik', html)
+        self.assertIn('django_address/js/chained_select.js', str(form.media))
+
+        # only the selected path is rendered.
+        profile = Profile(name='Agus', sub_district=self.ngaglik, address='Jl. Kaliurang')
+        with self.assertNumQueries(1):
+            html = str(ProfileForm(instance=profile)['sub_district'])
+        self.assertIn('<option value="%s" selected>Ngaglik</option>' % self.ngaglik.pk, html)
+        self.assertIn('<option value="%s" selected>Sleman</option>' % self.ngaglik.district_id, html)
+        self.assertEqual(html.count('<option'), 8)
+
+    def test_render_country(self):
+        field = SubDistrictChoiceField(country=self.country.pk)
+        html = field.widget.render('sub_district', None, attrs={'id': 'id_sub_district'})
+        self.assertNotIn('/address/countries/"', html)
+        self.assertIn('data-url="/address/countries/%s/provinces/"' % self.country.pk, html)
+        self.assertIn('id="id_sub_district_province"', html)
+        self.assertEqual(html.count('<select'), 3)
+
+    def test_validate(self):
+        data = {'name': 'Agus', 'address': 'Jl. Kaliurang', 'sub_district': self.ngaglik.pk}
+        field = ProfileForm().fields['sub_district']
+        with self.assertNumQueries(1):
+            self.assertEqual(field.clean(self.ngaglik.pk), self.ngaglik)
+
+        form = ProfileForm(data)
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.save().sub_district, self.ngaglik)
+
+        for value in (self.turi.pk, 0, 'x'):
+            data['sub_district'] = value
+            form = ProfileForm(data)
+            self.assertFalse(form.is_valid())
+            self.assertIn('sub_district', form.errors)
+
+        # the sub districts of a soft-deleted district aren't offered by the selects.
+        district = self.ngaglik.district
+        district.deleted_at = timezone.now()
+        district.save()
+        data['sub_district'] = self.ngaglik.pk
+        self.assertFalse(ProfileForm(data).is_valid())
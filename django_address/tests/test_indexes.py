@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from django_address.models import (Country, Province,
+                                   District, SubDistrict)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans are asserted on SQLite only.')
+class TestIndexes(TestCase):
+
+    def setUp(self):
+        self.country = Country.objects.create(name='Indonesia')
+        self.province = Province.objects.create(country=self.country, name='Yogyakarta')
+        self.district = District.objects.create(province=self.province, name='Sleman')
+        SubDistrict.objects.create(district=self.district, name='Ngaglik', postal_code='55581')
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn('USING INDEX %s ' % index_name, plan)
+
+    def test_name_indexes(self):
+        self.assertUsesIndex(Country.objects.filter(name='Indonesia'), 'da_country_name_idx')
+        self.assertUsesIndex(Province.objects.filter(country=self.country, name='Yogyakarta'),
+                             'da_province_name_idx')
+        self.assertUsesIndex(District.objects.filter(province=self.province, name='Sleman'),
+                             'da_district_name_idx')
+        self.assertUsesIndex(SubDistrict.objects.filter(district=self.district, name='Ngaglik'),
+                             'da_subdistrict_name_idx')
+
+    def test_lower_name_index(self):
+        queryset = Country.objects.by_name('INDONESIA')
+        self.assertUsesIndex(queryset, 'da_country_name_lower_idx')
+        self.assertEqual(queryset.get(), self.country)
+
+    def test_postal_code_index(self):
+        self.assertUsesIndex(SubDistrict.objects.filter(postal_code='55581'),
+                             'da_subdistrict_postal_idx')
+
+    def test_published_indexes(self):
+        self.assertUsesIndex(self.country.provinces.published(), 'da_province_published_idx')
+        self.assertUsesIndex(self.province.get_districts(), 'da_district_published_idx')
+        self.assertUsesIndex(self.district.get_sub_districts(), 'da_subdistrict_published_idx')
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.http import HttpResponse
+from django.test import (TestCase, RequestFactory, override_settings)
+
+from django_address.models import (Country, Province, District, SubDistrict)
+from django_address.loaders import BulkAddressLoader
+from django_address.instrumentation import (AddressInstrumentationMiddleware, MemoryBackend,
+                                            get_backend, measure, reset_backend, set_backend)
+from django_address.tests.models import Profile
+
+
+@override_settings(DJANGO_ADDRESS_INSTRUMENTATION_BACKEND='django_address.instrumentation.MemoryBackend')
+class TestInstrumentation(TestCase):
+
+    def setUp(self):
+        self.country = Country.objects.create(name='Indonesia', code='ID', states=['Yogyakarta'])
+        province = Province.objects.create(country=self.country, name='Yogyakarta')
+        district = District.objects.create(province=province, name='Sleman')
+        sub_district = SubDistrict.objects.create(district=district, name='Ngaglik',
+                                                  postal_code='55581')
+        for index in range(6):
+            Profile.objects.create(name='Agus %s' % index, address='Jl. Sudirman', number=index,
+                                   sub_district=sub_district)
+
+    def test_full_address(self):
+        backend = get_backend()
+        self.assertIsInstance(backend, MemoryBackend)
+
+        profile = Profile.objects.first()
+        profile.get_full_address()
+        profile = Profile.objects.first()
+        profile.get_full_address_json()
+
+        self.assertEqual(len(backend.timings['address.get_full_address']), 1)
+        self.assertEqual(len(backend.timings['address.get_hierarchy']), 2)
+        # the hierarchy is fetched with one query.
+        self.assertEqual(backend.counters['address.get_full_address.queries'], 1)
+        self.assertEqual(backend.counters['address.get_full_address_json.queries'], 1)
+        self.assertEqual(backend.counters['country.get_states.queries'], 0)
+
+        with measure('custom', tags={'source': 'test'}):
+            Country.objects.count()
+        self.assertEqual(backend.counters['custom.queries'], 1)
+
+    def test_loader_stages(self):
+        loader = BulkAddressLoader(self.country)
+        loader.add_province('11', 'Aceh')
+        loader.add_postal('11', 'Aceh Besar', 'Baitussalam', '23373')
+        loader.flush()
+
+        backend = get_backend()
+        for name in ('loader.flush_provinces', 'loader.flush_districts',
+                     'loader.flush_sub_districts'):
+            self.assertEqual(len(backend.timings[name]), 1)
+            self.assertGreaterEqual(backend.counters['%s.queries' % name], 1)
+
+    def test_disabled(self):
+        set_backend(None)
+        self.addCleanup(reset_backend)
+        self.assertIsNone(get_backend())
+        profile = Profile.objects.first()
+        with self.assertNumQueries(1):
+            profile.get_full_address()
+
+    @override_settings(DEBUG=True)
+    def test_middleware(self):
+        def render(request):
+            addresses = [profile.get_full_address() for profile in Profile.objects.all()]
+            return HttpResponse('\n'.join(addresses))
+
+        middleware = AddressInstrumentationMiddleware(render)
+        with self.assertLogs('django_address.instrumentation', 'WARNING') as logs:
+            response = middleware(RequestFactory().get('/profiles/'))
+        self.assertEqual(response['X-Address-Queries'], '6')
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('N+1 queries in /profiles/: 6 x SELECT', logs.output[0])
+        self.assertEqual(get_backend().counters['request.n_plus_one'], 1)
+
+        def render_selected(request):
+            profiles = Profile.objects.select_related('sub_district__district__province')
+            return HttpResponse('\n'.join(profile.get_full_address() for profile in profiles))
+
+        response = AddressInstrumentationMiddleware(render_selected)(RequestFactory().get('/'))
+        self.assertEqual(response['X-Address-Queries'], '0')
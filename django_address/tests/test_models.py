@@ -2,6 +2,7 @@
 from __future__ import unicode_literals
 
 from django.test import TestCase
+from django.core.management import call_command
 from django_address.models import (Country, Province,
                                    District, SubDistrict)
 
@@ -54,3 +55,67 @@ class TestModels(TestCase):
 
         self.assertTrue(isinstance(sub_district, SubDistrict))
         self.assertEqual(sub_district.__str__(), sub_district.name)
+
+    def test_country_states(self):
+        country = Country.objects.create(name='Malaysia', states=['Johor', 'Kedah'])
+        country = Country.objects.get(pk=country.pk)
+
+        self.assertEqual(country.states, ['Johor', 'Kedah'])
+        self.assertIs(country.get_states(), country.get_states())
+        self.assertTrue(country.has_state('johor'))
+        self.assertFalse(country.has_state('Aceh'))
+
+        # old rows may still hold the list as a string.
+        country.states = "['Aceh']"
+        self.assertEqual(country.get_states(), ['Aceh'])
+        self.assertTrue(country.has_state('Aceh'))
+        self.assertFalse(country.has_state('Johor'))
+
+    def test_sub_district_hierarchy(self):
+        self.assertEqual((self.sub_district.province_id, self.sub_district.country_id),
+                         (self.province.pk, self.country.pk))
+        self.assertEqual(self.sub_district.path,
+                         'Sungai Minang, Ogan Komering Ilir, Sumatera Selatan, Indonesia')
+
+        # the loaded ancestors are reused without a query.
+        district = District.objects.select_related('province__country').get(pk=self.district.pk)
+        with self.assertNumQueries(1):
+            SubDistrict.objects.create(name='Kayuagung', district=district)
+
+        # the loaded ancestors which don't agree with the foreign keys are fetched.
+        other = Country.objects.create(name='Malaysia')
+        district.province._state.fields_cache['country'] = other
+        with self.assertNumQueries(2):
+            sub_district = SubDistrict.objects.create(name='Lempuing', district=district)
+        self.assertEqual(sub_district.country_id, self.country.pk)
+        self.assertEqual(sub_district.path,
+                         'Lempuing, Ogan Komering Ilir, Sumatera Selatan, Indonesia')
+
+        province = Province.objects.create(name='Sumatera Utara', country=self.country)
+        self.district.name = 'OKI'
+        self.district.province = province
+        self.district.save()
+        self.country.name = 'Republic of Indonesia'
+        self.country.save()
+
+        self.sub_district.refresh_from_db()
+        self.assertEqual(self.sub_district.province_id, province.pk)
+        self.assertEqual(self.sub_district.path,
+                         'Sungai Minang, OKI, Sumatera Utara, Republic of Indonesia')
+        self.assertEqual(list(SubDistrict.objects.filter(province=self.province)), [])
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 0)
+
+        # saving without any change of the copied fields doesn't update the sub districts.
+        with self.assertNumQueries(2):
+            province.save()
+
+    def test_repair_address(self):
+        SubDistrict.objects.update(province=None, path='')
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 1)
+
+        call_command('repair_address')
+        self.sub_district.refresh_from_db()
+        self.assertEqual(self.sub_district.province_id, self.province.pk)
+        self.assertEqual(self.sub_district.path,
+                         'Sungai Minang, Ogan Komering Ilir, Sumatera Selatan, Indonesia')
+        self.assertEqual(SubDistrict.objects.stale_hierarchy().count(), 0)
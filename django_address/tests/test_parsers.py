@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.test import TestCase
+
+from django_address.models import (Country, Province, District, SubDistrict)
+from django_address.parsers import (address_parser, parse_address, parse_addresses)
+from django_address.tests.models import Profile
+
+
+class TestAddressParser(TestCase):
+
+    def setUp(self):
+        country = Country.objects.create(name='Indonesia', code='ID')
+        yogyakarta = Province.objects.create(country=country, name='Yogyakarta')
+        sleman = District.objects.create(province=yogyakarta, name='Sleman')
+        bantul = District.objects.create(province=yogyakarta, name='Bantul')
+        self.ngaglik = SubDistrict.objects.create(district=sleman, name='Ngaglik',
+                                                  postal_code='55581')
+        self.depok = SubDistrict.objects.create(district=sleman, name='Depok',
+                                                postal_code='55281')
+        self.sleman = SubDistrict.objects.create(district=sleman, name='Sleman',
+                                                 postal_code='55511')
+        self.sewon = SubDistrict.objects.create(district=bantul, name='Sewon',
+                                                postal_code='55185')
+        west_java = Province.objects.create(country=country, name='Jawa Barat')
+        self.depok_city = SubDistrict.objects.create(
+            district=District.objects.create(province=west_java, name='Kota Depok'),
+            name='Pancoran Mas', postal_code='16431')
+        address_parser.invalidate()
+
+    def test_parse_address(self):
+        parsed = parse_address('Jl. Karto Dimejo 35, RT 3/RW 34, Sinduarjo, Ngaglik, Sleman')
+        self.assertEqual(parsed.get_model_fields(),
+                         {'address': 'Jl. Karto Dimejo', 'number': 35, 'na': 3, 'ca': 34,
+                          'village': 'Sinduarjo', 'sub_district_id': self.ngaglik.pk})
+        self.assertEqual(parsed.postal_code, '55581')
+        self.assertAlmostEqual(parsed.confidence, 0.65)
+
+        # the village with the same name of another sub district.
+        parsed = parse_address('Jl. Kaliurang, Depok, Kec. Ngaglik, Kab. Sleman, 55581')
+        self.assertEqual((parsed.village, parsed.sub_district_id), ('Depok', self.ngaglik.pk))
+        self.assertAlmostEqual(parsed.confidence, 0.8)
+
+        parsed = parse_address('Jl. Magelang, Sleman, Sleman, Yogyakarta')
+        self.assertEqual(parsed.sub_district_id, self.sleman.pk)
+
+        parsed = parse_address('Jl. Margonda Raya No 12 Pancoran Mas Depok')
+        self.assertEqual((parsed.address, parsed.number, parsed.sub_district_id),
+                         ('Jl. Margonda Raya', 12, self.depok_city.pk))
+
+        parsed = parse_address('Jl. Entah, Atlantis')
+        self.assertEqual((parsed.sub_district_id, parsed.confidence), (None, 0.0))
+
+    def test_parse_without_street(self):
+        parsed = parse_address('Ngaglik, Sleman')
+        self.assertEqual((parsed.address, parsed.village, parsed.sub_district_id),
+                         (None, None, self.ngaglik.pk))
+        self.assertAlmostEqual(parsed.confidence, 0.65)
+
+        parsed = parse_address('Ngaglik Sleman 55581')
+        self.assertEqual((parsed.address, parsed.sub_district_id), (None, self.ngaglik.pk))
+
+        # the street with the name of a district is still the street.
+        parsed = parse_address('Sleman, Depok, Sleman')
+        self.assertEqual((parsed.address, parsed.sub_district_id), ('Sleman', self.depok.pk))
+
+    def test_parse_kilometer(self):
+        for text in ('Jl. Kaliurang KM 10, Ngaglik, Sleman',
+                     'Jl. Kaliurang Km. 10, Ngaglik, Sleman'):
+            parsed = parse_address(text)
+            self.assertEqual((parsed.address, parsed.number, parsed.sub_district_id),
+                             (text.split(',')[0], None, self.ngaglik.pk))
+
+        parsed = parse_address('Jl. Kaliurang KM 10 No. 5, Ngaglik, Sleman')
+        self.assertEqual((parsed.address, parsed.number), ('Jl. Kaliurang KM 10', 5))
+
+    def test_parse_full_address(self):
+        Profile.objects.create(name='Agus', address='Jl. Karto Dimejo', number=35, na=3,
+                               ca=34, village='Sinduarjo', sub_district=self.ngaglik)
+        Profile.objects.create(name='Budi', address='Jl. Parangtritis', number=None, na=None,
+                               ca=2, village=None, sub_district=self.sewon)
+        # the null na and ca are formatted as '-'.
+        Profile.objects.create(name='Citra', address='Jl. Kaliurang', number=7, na=None,
+                               ca=None, village='Sinduarjo', sub_district=self.ngaglik)
+        Profile.objects.create(name='Dewi', address='Jl. Kaliurang', number=7, na=4,
+                               ca=None, village='Sinduarjo', sub_district=self.ngaglik)
+
+        for profile in Profile.objects.all():
+            for format_address in ('id', 'en'):
+                parsed = parse_address(profile.get_full_address(
+                    format_address=format_address, include_country=True))
+                self.assertEqual(parsed.get_model_fields(), {
+                    'address': profile.address, 'number': profile.number, 'na': profile.na,
+                    'ca': profile.ca, 'village': profile.village,
+                    'sub_district_id': profile.sub_district_id})
+                self.assertAlmostEqual(parsed.confidence, 1.0)
+
+    def test_parse_addresses(self):
+        texts = ['Jl. Kaliurang %s, Ngaglik, Sleman' % number for number in range(1, 100)]
+        texts.append('Jl. Bantul 5, Sewon, Bantul - 55185')
+
+        with self.assertNumQueries(1):
+            results = parse_addresses(texts)
+        self.assertEqual({parsed.sub_district_id for parsed in results[:-1]}, {self.ngaglik.pk})
+        self.assertEqual([parsed.number for parsed in results[:3]], [1, 2, 3])
+        self.assertEqual(results[-1].sub_district_id, self.sewon.pk)
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import hashlib
+
+from django.test import (TestCase, override_settings)
+from django.urls import reverse
+from django.utils import timezone
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from django_address.models import (Country, Province,
+                                   District, SubDistrict)
+from django_address.payloads import hierarchy_payloads
+from django_address.tests.utils import run_on_commit
+
+
+@override_settings(ROOT_URLCONF='django_address.tests.urls',
+                   DJANGO_ADDRESS_HIERARCHY_MAX_AGE=600)
+class TestHierarchyPayloads(TestCase):
+
+    def setUp(self):
+        self.country = Country.objects.create(name='Indonesia', code='ID')
+        self.province = Province.objects.create(country=self.country, name='Yogyakarta')
+        Province.objects.create(country=self.country, name='Bali', deleted_at=timezone.now())
+        self.sleman = District.objects.create(province=self.province, name='Sleman')
+        self.bantul = District.objects.create(province=self.province, name='Bantul')
+        self.ngaglik = SubDistrict.objects.create(district=self.sleman, name='Ngaglik',
+                                                  postal_code='55581')
+        SubDistrict.objects.create(district=self.sleman, name='Turi', postal_code='55551',
+                                   deleted_at=timezone.now())
+        run_on_commit()
+
+    def test_get(self):
+        etag, body = hierarchy_payloads.get('provinces', self.country.pk)
+        self.assertEqual(etag, hashlib.sha256(body).hexdigest())
+        self.assertEqual(body.decode('utf-8'), '{"results": [{"id": %s, "name": "Yogyakarta"}]}'
+                         % self.province.pk)
+
+        # the encoded payload is reused until the hierarchy changes.
+        self.assertIs(hierarchy_payloads.get('provinces', self.country.pk)[1], body)
+        self.assertIsNone(hierarchy_payloads.get('districts', 0))
+
+        _, body = hierarchy_payloads.get('sub_districts', self.bantul.pk)
+        self.assertEqual(body, b'{"results": []}')
+
+    def test_views(self):
+        url = reverse('django_address:districts', args=[self.province.pk])
+        hierarchy_payloads.load()
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r['name'] for r in response.json()['results']], ['Bantul', 'Sleman'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertIn('max-age=600', response['Cache-Control'])
+        etag = response['ETag']
+        self.assertFalse(etag.startswith('W/'))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('max-age=600', response['Cache-Control'])
+
+        response = self.client.get(reverse('django_address:sub_districts', args=[self.sleman.pk]))
+        self.assertEqual(response.json()['results'],
+                         [{'id': self.ngaglik.pk, 'name': 'Ngaglik', 'postal_code': '55581'}])
+
+        response = self.client.get(reverse('django_address:countries'))
+        self.assertEqual(response.json()['results'],
+                         [{'id': self.country.pk, 'name': 'Indonesia', 'code': 'ID'}])
+
+        self.assertEqual(self.client.post(url).status_code, 405)
+        self.assertEqual(self.client.get(
+            reverse('django_address:sub_districts', args=[0])).status_code, 404)
+
+        # any change of the hierarchy makes a new etag.
+        District.objects.create(province=self.province, name='Gunung Kidul')
+        run_on_commit()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_views_other_process(self):
+        url = reverse('django_address:districts', args=[self.province.pk])
+        etag = self.client.get(url)['ETag']
+
+        # another process builds the same payload with its own hierarchy version.
+        hierarchy_payloads.invalidate()
+        with mock.patch('django_address.cache.get_hierarchy_version', return_value=1):
+            hierarchy_payloads.load()
+        self.assertEqual(hierarchy_payloads.version, 1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_views_unpublished(self):
+        self.province.deleted_at = timezone.now()
+        self.province.save()
+        run_on_commit()
+        response = self.client.get(reverse('django_address:districts', args=[self.province.pk]))
+        self.assertEqual(response.status_code, 404)
+        response = self.client.get(reverse('django_address:sub_districts', args=[self.sleman.pk]))
+        self.assertEqual(response.status_code, 404)
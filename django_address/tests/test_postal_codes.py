@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.test import (TestCase, override_settings)
+from django.utils import timezone
+
+from django_address.models import (Country, Province,
+                                   District, SubDistrict)
+from django_address.cache import (VERSION_KEY, get_cache)
+from django_address.postal_codes import postal_code_index
+from django_address.tests.utils import run_on_commit
+
+
+class TestPostalCodeIndex(TestCase):
+
+    def setUp(self):
+        country = Country.objects.create(name='Indonesia')
+        province = Province.objects.create(country=country, name='Yogyakarta')
+        self.district = District.objects.create(province=province, name='Sleman')
+        self.ngaglik = SubDistrict.objects.create(district=self.district, name='Ngaglik',
+                                                  postal_code='55581')
+        SubDistrict.objects.create(district=self.district, name='Depok', postal_code='55281')
+        SubDistrict.objects.create(district=self.district, name='Mlati', postal_code='55284')
+        SubDistrict.objects.create(district=self.district, name='Turi', postal_code='55551',
+                                   deleted_at=timezone.now())
+        run_on_commit()
+
+    def test_get(self):
+        entries = postal_code_index.get('55581')
+        self.assertEqual(len(entries), 1)
+        entry = entries[0]
+        self.assertEqual(entry.sub_district_id, self.ngaglik.pk)
+        self.assertEqual((entry.sub_district, entry.district, entry.province, entry.country),
+                         ('Ngaglik', 'Sleman', 'Yogyakarta', 'Indonesia'))
+        self.assertEqual(postal_code_index.get('00000'), ())
+        self.assertNotIn('55551', postal_code_index)
+
+        with self.assertNumQueries(0):
+            postal_code_index.get('55281')
+
+    def test_startswith(self):
+        codes = [entry.postal_code for entry in postal_code_index.startswith('552')]
+        self.assertEqual(codes, ['55281', '55284'])
+        self.assertEqual(len(postal_code_index.startswith('55', limit=2)), 2)
+        self.assertEqual(postal_code_index.startswith('9'), [])
+
+    def test_rebuild_after_changes(self):
+        self.assertTrue(postal_code_index.get('55581'))
+        self.ngaglik.postal_code = '55582'
+        self.ngaglik.save()
+        run_on_commit()
+
+        self.assertEqual(postal_code_index.get('55581'), ())
+        self.assertEqual(postal_code_index.get('55582')[0].sub_district, 'Ngaglik')
+
+    @override_settings(DJANGO_ADDRESS_VERSION_CHECK_INTERVAL=0.000001)
+    def test_rebuild_after_changes_in_other_process(self):
+        self.assertTrue(postal_code_index.get('55581'))
+        SubDistrict.objects.filter(pk=self.ngaglik.pk).update(postal_code='55582')
+        self.assertTrue(postal_code_index.get('55581'))
+
+        # another process bumps the shared version.
+        get_cache().incr(VERSION_KEY)
+        self.assertEqual(postal_code_index.get('55581'), ())
+        self.assertTrue(postal_code_index.get('55582'))
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import io
+import os
+import json
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+
+from django_address.readers import (JSONStreamReader, iter_addresses,
+                                    iter_countries)
+from django_address.tests.test_commands import ADDRESSES_DATA
+
+
+class TestReaders(SimpleTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def dump(self, data, name='addresses.json'):
+        path = os.path.join(self.tmp_dir, name)
+        with open(path, 'w') as json_file:
+            json.dump(data, json_file, indent=2)
+        return path
+
+    def test_stream_reader_small_chunks(self):
+        data = {'a': [1, 23456, -7.5e3, True, None, 'x"y'], 'b': {}, 'c': []}
+        reader = JSONStreamReader(io.StringIO(json.dumps(data)), chunk_size=3)
+
+        output = {}
+        for key in reader.iter_keys():
+            if key == 'a':
+                output[key] = list(reader.iter_array())
+            else:
+                output[key] = reader.read_value()
+        self.assertEqual(output, data)
+
+    def test_iter_addresses(self):
+        path = self.dump(ADDRESSES_DATA)
+        records = list(iter_addresses(path, chunk_size=16))
+
+        self.assertEqual(records[0], ('country', None, 'Indonesia'))
+        provinces = [r for r in records if r[0] == 'province']
+        postals = [r for r in records if r[0] == 'postal']
+        self.assertEqual(len(provinces), 2)
+        self.assertEqual(postals[0], ('postal', '34', ADDRESSES_DATA['postals']['34'][0]))
+        self.assertEqual(len(postals), 6)
+
+    def test_iter_countries(self):
+        path = self.dump({'source': 'test', 'countries': [
+            {'country': 'Indonesia', 'states': ['Aceh', 'Bali']},
+            {'country': 'Malaysia', 'states': []},
+        ]}, name='countries.json')
+        names = [c['country'] for c in iter_countries(path, chunk_size=8)]
+        self.assertEqual(names, ['Indonesia', 'Malaysia'])
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.test import TestCase
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from django_address.models import (Country, Province, District, SubDistrict)
+from django_address.snapshots import (GeographySnapshot, SnapshotError, get_snapshot)
+
+
+class TestGeographySnapshot(TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'address.snapshot')
+
+        self.indonesia = Country.objects.create(name='Indonesia', code='ID')
+        Country.objects.create(name='Malaysia', code='MY')
+        self.yogyakarta = Province.objects.create(country=self.indonesia, name='Yogyakarta')
+        self.sleman = District.objects.create(province=self.yogyakarta, name='Sleman')
+        bantul = District.objects.create(province=self.yogyakarta, name='Bantul')
+        self.ngaglik = SubDistrict.objects.create(district=self.sleman, name='Ngaglik',
+                                                  postal_code='55581')
+        SubDistrict.objects.create(district=self.sleman, name='Depok', postal_code='55281')
+        SubDistrict.objects.create(district=bantul, name='Sewon', postal_code='55185')
+        SubDistrict.objects.create(district=bantul, name='Kasihan', postal_code='55185')
+        jakarta = Province.objects.create(country=self.indonesia, name='DKI Jakarta')
+        District.objects.create(province=jakarta, name='Jakarta Selatan')
+        deleted = Province.objects.create(country=self.indonesia, name='Timor Timur')
+        deleted.delete()
+
+    def test_snapshot(self):
+        stdout = StringIO()
+        call_command('snapshot_address', output=self.path, stdout=stdout)
+        self.assertIn('Written 11 nodes', stdout.getvalue())
+
+        with self.assertNumQueries(0), GeographySnapshot(self.path) as snapshot:
+            self.assertEqual(len(snapshot), 11)
+            node = snapshot.get('sub_district', self.ngaglik.pk)
+            self.assertEqual((node.level, node.id, node.name, node.postal_code),
+                             ('sub_district', self.ngaglik.pk, 'Ngaglik', '55581'))
+            self.assertEqual([(item.level, item.name) for item in snapshot.get_ancestors(node.index)],
+                             [('district', 'Sleman'), ('province', 'Yogyakarta'),
+                              ('country', 'Indonesia')])
+            self.assertEqual(snapshot.get_parent(node.index).id, self.sleman.pk)
+            self.assertIsNone(snapshot.get('sub_district', 0))
+            self.assertIsNone(snapshot.get('province', self.ngaglik.pk + 100))
+
+            province = snapshot.get('province', self.yogyakarta.pk)
+            self.assertEqual([item.name for item in snapshot.get_children(province.index)],
+                             ['Bantul', 'Sleman'])
+            sleman = snapshot.get('district', self.sleman.pk)
+            self.assertEqual([item.name for item in snapshot.get_children(sleman.index)],
+                             ['Depok', 'Ngaglik'])
+            self.assertEqual([item.name for item in snapshot.get_children(node.index)], [])
+            country = snapshot.get('country', self.indonesia.pk)
+            self.assertEqual([item.name for item in snapshot.get_children(country.index)],
+                             ['DKI Jakarta', 'Yogyakarta'])
+
+            self.assertEqual([item.id for item in snapshot.find(' NGAGLIK ')], [self.ngaglik.pk])
+            self.assertEqual(snapshot.find('Sleman', level='sub_district'), [])
+            self.assertEqual([item.name for item in snapshot.search('jakarta')],
+                             ['Jakarta Selatan'])
+            self.assertEqual([item.name for item in snapshot.search('d', level='province')],
+                             ['DKI Jakarta'])
+            self.assertEqual(sorted(item.name for item in snapshot.find_postal_code('55185')),
+                             ['Kasihan', 'Sewon'])
+            self.assertEqual(snapshot.find('Timor Timur'), [])
+
+    def test_get_snapshot(self):
+        call_command('snapshot_address', output=self.path, stdout=StringIO())
+        with self.settings(DJANGO_ADDRESS_SNAPSHOT_PATH=self.path):
+            snapshot = get_snapshot()
+            self.assertIs(get_snapshot(), snapshot)
+
+            # re-opened after the file was replaced.
+            self.ngaglik.name = 'Ngaglik Baru'
+            self.ngaglik.save()
+            call_command('snapshot_address', stdout=StringIO())
+            os.utime(self.path, ns=(0, 0))
+            snapshot = get_snapshot()
+            self.assertEqual(snapshot.get('sub_district', self.ngaglik.pk).name, 'Ngaglik Baru')
+
+        with self.settings(DJANGO_ADDRESS_SNAPSHOT_PATH=None):
+            with self.assertRaises(SnapshotError):
+                get_snapshot()
+            with self.assertRaises(CommandError):
+                call_command('snapshot_address', stdout=StringIO())
+
+        invalid_path = os.path.join(self.tmp_dir, 'invalid.snapshot')
+        with open(invalid_path, 'wb') as invalid_file:
+            invalid_file.write(b'not a snapshot' * 10)
+        with self.assertRaises(SnapshotError):
+            GeographySnapshot(invalid_path)
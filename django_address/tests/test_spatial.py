@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import random
+
+from django.test import (TestCase, override_settings)
+
+try:
+    from unittest import mock
+except ImportError:  # pragma: no cover
+    import mock
+
+from django_address.models import (Country, Province, District, SubDistrict)
+from django_address.spatial import (haversine, spatial_index)
+from django_address.tests.utils import run_on_commit
+
+
+@override_settings(DJANGO_ADDRESS_VERSION_CHECK_INTERVAL=0)
+class TestSpatialIndex(TestCase):
+
+    def setUp(self):
+        country = Country.objects.create(name='Indonesia', code='ID')
+        province = Province.objects.create(country=country, name='Yogyakarta')
+        district = District.objects.create(province=province, name='Sleman')
+
+        self.random = random.Random(7)
+        SubDistrict.objects.bulk_create([
+            SubDistrict(district=district, name='Sub District %s' % index,
+                        latitude=self.random.uniform(-11, 6),
+                        longitude=self.random.uniform(95, 141))
+            for index in range(500)
+        ] + [
+            # around the antimeridian.
+            SubDistrict(district=district, name='East', latitude=0, longitude=179.95),
+            SubDistrict(district=district, name='West', latitude=0, longitude=-179.95),
+            SubDistrict(district=district, name='Unknown'),
+        ])
+        spatial_index.invalidate()
+
+    def get_expected(self, latitude, longitude):
+        return sorted(
+            (haversine(latitude, longitude, item.latitude, item.longitude), item.pk)
+            for item in SubDistrict.objects.exclude(latitude__isnull=True))
+
+    def test_nearest(self):
+        for index in range(30):
+            latitude = self.random.uniform(-12, 7)
+            longitude = self.random.uniform(94, 142)
+            expected = self.get_expected(latitude, longitude)[:5]
+            results = spatial_index.nearest(latitude, longitude, k=5)
+            self.assertEqual([entry.sub_district_id for entry, distance in results],
+                             [pk for distance, pk in expected])
+            self.assertAlmostEqual(results[0][1], expected[0][0])
+
+        results = spatial_index.nearest(0, 179.99, k=2)
+        self.assertEqual([entry.sub_district for entry, distance in results], ['East', 'West'])
+
+    def test_nearest_far(self):
+        # far from all the data, and near a pole.
+        for latitude, longitude in ((40.7, -74.0), (89.9, 0), (-89.9, 110)):
+            expected = self.get_expected(latitude, longitude)[:3]
+            results = spatial_index.nearest(latitude, longitude, k=3)
+            self.assertEqual([entry.sub_district_id for entry, distance in results],
+                             [pk for distance, pk in expected])
+
+        # more than the geocoded sub districts.
+        expected = self.get_expected(-7.7, 110.4)
+        results = spatial_index.nearest(-7.7, 110.4, k=1000)
+        self.assertEqual([entry.sub_district_id for entry, distance in results],
+                         [pk for distance, pk in expected])
+        self.assertEqual(len(spatial_index.nearest(40.7, -74.0, k=None)), 502)
+
+    def test_nearest_far_cost(self):
+        # far from the data, the rings don't cost more than a scan of the populated cells.
+        cells = spatial_index.load()[0]
+        iter_ring = spatial_index.iter_ring
+        iterated = []
+
+        def counted_iter_ring(*args):
+            for key in iter_ring(*args):
+                iterated.append(key)
+                yield key
+
+        with mock.patch.object(spatial_index, 'iter_ring', counted_iter_ring):
+            for latitude, longitude in ((50, 0), (-80, -100), (8, 118), (-14, 90)):
+                del iterated[:]
+                expected = self.get_expected(latitude, longitude)[:2]
+                results = spatial_index.nearest(latitude, longitude, k=2)
+                self.assertEqual([entry.sub_district_id for entry, distance in results],
+                                 [pk for distance, pk in expected])
+                self.assertLessEqual(len(iterated), len(cells))
+
+    def test_radius(self):
+        latitude, longitude = -7.7, 110.4
+        expected = [pk for distance, pk in self.get_expected(latitude, longitude)
+                    if distance <= 300]
+        results = spatial_index.radius(latitude, longitude, 300)
+        self.assertTrue(expected)
+        self.assertEqual([entry.sub_district_id for entry, distance in results], expected)
+        self.assertEqual(len(spatial_index.radius(latitude, longitude, 300, limit=2)), 2)
+
+    def test_invalidate(self):
+        self.assertEqual(spatial_index.nearest(50, 50, max_distance=10), [])
+        sub_district = SubDistrict.objects.get(name='Unknown')
+        sub_district.latitude, sub_district.longitude = 50, 50.01
+        sub_district.save()
+        run_on_commit()
+        self.assertEqual(spatial_index.nearest(50, 50, max_distance=10)[0][0].sub_district,
+                         'Unknown')
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.test import TestCase
+
+from django_address.models import (Country, Province, District, SubDistrict)
+from django_address.validation import (AddressError, address_validator, validate_addresses)
+
+
+class TestAddressValidator(TestCase):
+
+    def setUp(self):
+        country = Country.objects.create(name='Indonesia', code='ID')
+        yogyakarta = Province.objects.create(country=country, name='Yogyakarta')
+        sleman = District.objects.create(province=yogyakarta, name='Sleman')
+        SubDistrict.objects.create(district=sleman, name='Ngaglik', postal_code='55581')
+        SubDistrict.objects.create(district=sleman, name='Depok', postal_code='55281')
+        SubDistrict.objects.create(district=sleman, name='Depok', postal_code='55283')
+        bantul = District.objects.create(province=yogyakarta, name='Bantul')
+        SubDistrict.objects.create(district=bantul, name='Sewon', postal_code='55185')
+        west_java = Province.objects.create(country=country, name='Jawa Barat')
+        SubDistrict.objects.create(
+            district=District.objects.create(province=west_java, name='Kota Depok'),
+            name='Pancoran Mas', postal_code='16431')
+        address_validator.invalidate()
+
+    def test_validate(self):
+        self.assertEqual(address_validator.validate(('55581', 'Ngaglik', 'Sleman', 'Yogyakarta')), [])
+        self.assertEqual(address_validator.validate((55283, ' depok ', 'SLEMAN', 'yogyakarta')), [])
+
+        errors = address_validator.validate(('55000', 'Ngaglik', 'Sleman', 'Yogyakarta'))
+        self.assertEqual([error[:2] + error[3:] for error in errors],
+                         [('postal_code', 'mismatch', '55581')])
+        self.assertIsInstance(errors[0], AddressError)
+
+        errors = address_validator.validate(('', 'Ngaglik', 'Sleman', 'Yogyakarta'))
+        self.assertEqual((errors[0].code, errors[0].suggestion), ('missing', '55581'))
+
+        # the suggestion from the postal code, then from the closest name.
+        errors = address_validator.validate(('55185', 'Sewonn', 'Bantul', 'Yogyakarta'))
+        self.assertEqual((errors[0].field, errors[0].suggestion), ('sub_district', 'Sewon'))
+        errors = address_validator.validate(('55185', 'Bangunharjo', 'Bantul', 'Yogyakarta'))
+        self.assertEqual(errors[0].suggestion, 'Sewon')
+        errors = address_validator.validate(('', 'Ngaglk', 'Sleman', 'Yogyakarta'))
+        self.assertEqual(errors[0].suggestion, 'Ngaglik')
+
+        errors = address_validator.validate(('16431', 'Pancoran Mas', 'Depok', 'Jawa Barat'))
+        self.assertEqual((errors[0].field, errors[0].suggestion), ('district', 'Kota Depok'))
+        errors = address_validator.validate(('55581', 'Ngaglik', 'Sleman', 'DIY'))
+        self.assertEqual((errors[0].field, errors[0].suggestion), ('province', 'Yogyakarta'))
+        errors = address_validator.validate(('', 'Ngaglik', 'Sleman', 'Atlantis'))
+        self.assertEqual((errors[0].field, errors[0].suggestion), ('province', None))
+
+    def test_validate_addresses(self):
+        rows = [('55581', 'Ngaglik', 'Sleman', 'Yogyakarta'),
+                ('55581', 'Sewon', 'Bantul', 'Yogyakarta'),
+                ('55185', 'Sewon', 'Bantul', 'Yogyakarta')] * 100
+        with self.assertNumQueries(1):
+            results = list(validate_addresses(iter(rows)))
+        self.assertEqual([index for index, errors in results], list(range(1, 300, 3)))
+        self.assertEqual({errors[0].suggestion for index, errors in results}, {'55185'})
+
+        # the snapshot follows the changes of the hierarchy.
+        SubDistrict.objects.filter(name='Sewon').update(postal_code='55581')
+        address_validator.invalidate()
+        results = list(validate_addresses(rows[:3]))
+        self.assertEqual([(index, errors[0].suggestion) for index, errors in results], [(2, '55581')])
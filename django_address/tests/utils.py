@@ -0,0 +1,15 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import (DEFAULT_DB_ALIAS, connections)
+
+
+def run_on_commit(using=DEFAULT_DB_ALIAS):
+    """
+    function to run the `transaction.on_commit()` callbacks queued
+    in the transaction of a `TestCase`, which is never committed.
+    """
+    connection = connections[using]
+    callbacks, connection.run_on_commit = connection.run_on_commit, []
+    for savepoint_ids, callback in callbacks:
+        callback()
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.urls import path
+
+from . import views
+
+app_name = 'django_address'
+
+urlpatterns = [
+    path('autocomplete/', views.autocomplete, name='autocomplete'),
+    path('countries/', views.countries, name='countries'),
+    path('countries/<int:pk>/provinces/', views.provinces, name='provinces'),
+    path('provinces/<int:pk>/districts/', views.districts, name='districts'),
+    path('districts/<int:pk>/sub-districts/', views.sub_districts, name='sub_districts'),
+]
@@ -3,6 +3,13 @@ from __future__ import unicode_literals
 
 import ast
 import json
+import time
+import hashlib
+import threading
+
+from django.conf import settings
+
+DEFAULT_VERSION_CHECK_INTERVAL = 30
 
 
 def parse_json_string(text, default={}):
@@ -35,3 +42,82 @@ def parse_json_string(text, default={}):
         return output
 
     return default
+
+
+def get_file_checksum(*paths):
+    """
+    function to get the sha256 checksum of files,
+    the files are read by chunks to keep the memory flat.
+
+    :param `paths` is string paths of the files.
+    :return string hex digest.
+    """
+    checksum = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as source:
+            for chunk in iter(lambda: source.read(64 * 1024), b''):
+                checksum.update(chunk)
+    return checksum.hexdigest()
+
+
+class LazyIndex(object):
+    """
+    Base class of the in-process indexes which are built on the first
+    lookup and dropped by `invalidate()`, eg: when `hierarchy_changed`
+    is sent. The subclasses should implement `build()`.
+
+    The changes made by the other processes are noticed by checking the
+    shared hierarchy version, at most once per
+    `DJANGO_ADDRESS_VERSION_CHECK_INTERVAL` seconds (0 to disable).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.data = None
+        self.version = None
+        self.checked_at = 0
+
+    def is_outdated(self):
+        """ function to check the shared hierarchy version periodically. """
+        interval = getattr(settings, 'DJANGO_ADDRESS_VERSION_CHECK_INTERVAL',
+                           DEFAULT_VERSION_CHECK_INTERVAL)
+        now = time.time()
+        if not interval or now - self.checked_at < interval:
+            return False
+
+        from .cache import get_hierarchy_version
+
+        self.checked_at = now
+        return get_hierarchy_version() != self.version
+
+    def build(self):
+        """ function to build the index data. """
+        raise NotImplementedError
+
+    def load(self):
+        """ function to get the index data, build it when needed. """
+        data = self.data
+        if data is not None and self.is_outdated():
+            self.invalidate()
+            data = None
+
+        if data is None:
+            with self.lock:
+                data = self.data
+                if data is None:
+                    from .cache import get_hierarchy_version
+
+                    generation = self.generation
+                    self.version = get_hierarchy_version()
+                    self.checked_at = time.time()
+                    data = self.build()
+                    # keep it only when nothing changed while building.
+                    if generation == self.generation:
+                        self.data = data
+        return data
+
+    def invalidate(self, **kwargs):
+        """ function to drop the index, it will be rebuilt on the next lookup. """
+        self.generation += 1
+        self.data = None
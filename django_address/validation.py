@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+import difflib
+from collections import namedtuple
+
+from django.utils.translation import ugettext_lazy as _
+
+from .models import SubDistrict
+from .signals import hierarchy_changed
+from .utils import LazyIndex
+from .autocomplete import normalize
+
+SUGGESTION_CUTOFF = 0.6
+
+AddressError = namedtuple('AddressError', ['field', 'code', 'message', 'suggestion'])
+
+
+class AddressValidator(LazyIndex):
+    """
+    Validator of the (postal_code, sub_district, district, province) rows
+    against a snapshot of the published hierarchy, loaded with one query.
+    Each row is checked with a few dict lookups, and each error has
+    a suggestion, eg: the right postal code of the sub district.
+
+    >>> address_validator.validate(('55581', 'Ngaglik', 'Sleman', 'Yogyakarta'))
+    []
+    >>> address_validator.validate(('55000', 'Ngaglik', 'Sleman', 'Yogyakarta'))
+    [AddressError(field='postal_code', code='mismatch',
+                  message='Postal code 55000 doesn't belong to Ngaglik', suggestion='55581')]
+    >>> for index, errors in address_validator.validate_many(rows):
+    ...     print(index, errors)
+    """
+
+    def get_queryset(self):
+        return SubDistrict.objects.published()\
+                                  .filter(district__deleted_at__isnull=True,
+                                          province__deleted_at__isnull=True)
+
+    def build(self):
+        """
+        function to load the snapshot with one query, keyed by the normalized names.
+        :return tuple of ({province: name},
+                          {province: {district: name}},
+                          {(province, district): {sub district: (name, postal codes)}},
+                          {postal code: [(province, district, sub district)]})
+        """
+        provinces = {}
+        districts = {}
+        sub_districts = {}
+        postal_codes = {}
+        queryset = self.get_queryset().order_by('id').values_list(
+            'province__name', 'district__name', 'name', 'postal_code')
+
+        for province, district, name, postal_code in queryset.iterator():
+            keys = (normalize(province), normalize(district), normalize(name))
+            provinces.setdefault(keys[0], province)
+            districts.setdefault(keys[0], {}).setdefault(keys[1], district)
+
+            names = sub_districts.setdefault(keys[:2], {})
+            entry = names.get(keys[2])
+            if entry is None:
+                entry = names[keys[2]] = (name, [])
+
+            postal_code = (postal_code or '').strip()
+            if postal_code and postal_code not in entry[1]:
+                entry[1].append(postal_code)
+                postal_codes.setdefault(postal_code, []).append(keys)
+        return (provinces, districts, sub_districts, postal_codes)
+
+    def suggest(self, key, choices, memo):
+        """
+        function to get the closest name of the choices.
+
+        :param `key` is string normalized name.
+        :param `choices` is dict of {normalized name: name}
+        :return string name or None.
+        """
+        memo_key = (id(choices), key)
+        if memo_key not in memo:
+            matches = difflib.get_close_matches(key, list(choices), n=1, cutoff=SUGGESTION_CUTOFF)
+            value = choices[matches[0]] if matches else None
+            memo[memo_key] = value[0] if isinstance(value, tuple) else value
+        return memo[memo_key]
+
+    def get_unknown_error(self, field, key, message, suggestion):
+        """ function to get the error of an unknown place, or of an empty one. """
+        if not key:
+            return AddressError(field, 'missing', _('Missing %(field)s') % {'field': field},
+                                suggestion)
+        return AddressError(field, 'unknown', message, suggestion)
+
+    def validate_with(self, data, row, memo):
+        provinces, districts, sub_districts, postal_codes = data
+        postal_code, sub_district, district, province = row
+        postal_code = str(postal_code or '').strip()
+
+        names = memo.get('names')
+        if names is None:
+            names = memo['names'] = {}
+
+        keys = []
+        for value in (province, district, sub_district):
+            value = value or ''
+            key = names.get(value)
+            if key is None:
+                key = names[value] = normalize(value)
+            keys.append(key)
+        province_key, district_key, sub_district_key = keys
+
+        # the hierarchy of the postal code, used as the first suggestion.
+        by_postal_code = postal_codes.get(postal_code, ())
+        expected = by_postal_code[0] if len(by_postal_code) == 1 else None
+
+        if province_key not in provinces:
+            suggestion = provinces[expected[0]] if expected else \
+                self.suggest(province_key, provinces, memo)
+            return [self.get_unknown_error(
+                'province', province_key,
+                _('Unknown province %(name)s') % {'name': province}, suggestion)]
+
+        province_districts = districts[province_key]
+        if district_key not in province_districts:
+            if expected and expected[0] == province_key:
+                suggestion = province_districts[expected[1]]
+            else:
+                suggestion = self.suggest(district_key, province_districts, memo)
+            return [self.get_unknown_error(
+                'district', district_key,
+                _('Unknown district %(name)s in %(parent)s')
+                % {'name': district, 'parent': provinces[province_key]}, suggestion)]
+
+        district_sub_districts = sub_districts.get((province_key, district_key), {})
+        entry = district_sub_districts.get(sub_district_key)
+        if entry is None:
+            matches = [keys for keys in by_postal_code if keys[:2] == (province_key, district_key)]
+            if matches:
+                suggestion = district_sub_districts[matches[0][2]][0]
+            else:
+                suggestion = self.suggest(sub_district_key, district_sub_districts, memo)
+            return [self.get_unknown_error(
+                'sub_district', sub_district_key,
+                _('Unknown sub district %(name)s in %(parent)s')
+                % {'name': sub_district, 'parent': province_districts[district_key]}, suggestion)]
+
+        name, entry_postal_codes = entry
+        if not postal_code:
+            if entry_postal_codes:
+                return [AddressError('postal_code', 'missing',
+                                     _('Missing postal code of %(name)s') % {'name': name},
+                                     entry_postal_codes[0])]
+        elif postal_code not in entry_postal_codes:
+            return [AddressError('postal_code', 'mismatch',
+                                 _('Postal code %(postal_code)s doesn\'t belong to %(name)s')
+                                 % {'postal_code': postal_code, 'name': name},
+                                 entry_postal_codes[0] if entry_postal_codes else None)]
+        return []
+
+    def validate(self, row):
+        """
+        function to validate one row.
+
+        :param `row` is tuple of (postal_code, sub_district, district, province)
+        :return list of `AddressError`, empty when the row is valid.
+        """
+        return self.validate_with(self.load(), row, {})
+
+    def validate_many(self, rows):
+        """
+        function to validate many rows against the same snapshot,
+        the normalized names and suggestions are memoized.
+
+        :param `rows` is iterable of tuples (postal_code, sub_district, district, province)
+        :return generator of tuple (row index, list of `AddressError`) for the invalid rows.
+        """
+        data = self.load()
+        memo = {}
+        for index, row in enumerate(rows):
+            errors = self.validate_with(data, row, memo)
+            if errors:
+                yield index, errors
+
+
+address_validator = AddressValidator()
+hierarchy_changed.connect(address_validator.invalidate,
+                          dispatch_uid='django_address_address_validator')
+
+
+def validate_addresses(rows):
+    """
+    function to validate many rows with the shared `address_validator`.
+    :return generator of tuple (row index, list of `AddressError`) for the invalid rows.
+    """
+    return address_validator.validate_many(rows)
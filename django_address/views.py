@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.conf import settings
+from django.http import (Http404, HttpResponse, JsonResponse)
+from django.utils.cache import (get_conditional_response, patch_cache_control)
+from django.utils.http import quote_etag
+from django.views.decorators.http import (require_GET, require_safe)
+
+from .autocomplete import (TYPES, autocomplete_index)
+from .payloads import hierarchy_payloads
+
+AUTOCOMPLETE_LIMIT = 10
+AUTOCOMPLETE_MAX_LIMIT = 50
+DEFAULT_MAX_AGE = 60 * 60
+
+
+@require_GET
+def autocomplete(request):
+    """
+    view to search the provinces, districts and sub districts by name.
+
+    GET /autocomplete/?q=ngag&types=district,sub_district&limit=10
+    {"results": [{"type": "sub_district", "id": 1, "name": "Ngaglik", ...}]}
+    """
+    query = request.GET.get('q', '')
+
+    try:
+        limit = int(request.GET.get('limit', AUTOCOMPLETE_LIMIT))
+    except ValueError:
+        limit = AUTOCOMPLETE_LIMIT
+    limit = max(1, min(limit, AUTOCOMPLETE_MAX_LIMIT))
+
+    types = request.GET.get('types')
+    if types:
+        # none of the unknown types match, instead of all the types.
+        types = [kind for kind in types.split(',') if kind in TYPES]
+    else:
+        types = None
+
+    results = autocomplete_index.search(query, limit=limit, types=types)
+    return JsonResponse({'results': results})
+
+
+def hierarchy_response(request, kind, parent_id=None):
+    """
+    function to respond with a precomputed payload, with its strong ETag
+    and `Cache-Control: public`, or with 304 when the client has it already.
+
+    settings:
+        DJANGO_ADDRESS_HIERARCHY_MAX_AGE = 3600     # seconds
+    """
+    payload = hierarchy_payloads.get(kind, parent_id)
+    if payload is None:
+        raise Http404('The parent doesn\'t exist')
+
+    max_age = getattr(settings, 'DJANGO_ADDRESS_HIERARCHY_MAX_AGE', DEFAULT_MAX_AGE)
+    etag = quote_etag(payload[0])
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(payload[1], content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=max_age)
+    return response
+
+
+@require_safe
+def countries(request):
+    """
+    view to list the countries.
+
+    GET /countries/
+    {"results": [{"id": 1, "name": "Indonesia", "code": "ID"}, ...]}
+    """
+    return hierarchy_response(request, 'countries')
+
+
+@require_safe
+def provinces(request, pk):
+    """
+    view to list the published provinces of a country.
+
+    GET /countries/1/provinces/
+    {"results": [{"id": 1, "name": "Yogyakarta"}, ...]}
+    """
+    return hierarchy_response(request, 'provinces', pk)
+
+
+@require_safe
+def districts(request, pk):
+    """
+    view to list the published districts of a province.
+
+    GET /provinces/1/districts/
+    {"results": [{"id": 1, "name": "Sleman"}, ...]}
+    """
+    return hierarchy_response(request, 'districts', pk)
+
+
+@require_safe
+def sub_districts(request, pk):
+    """
+    view to list the published sub districts of a district.
+
+    GET /districts/1/sub-districts/
+    {"results": [{"id": 1, "name": "Ngaglik", "postal_code": "55581"}, ...]}
+    """
+    return hierarchy_response(request, 'sub_districts', pk)
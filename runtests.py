@@ -45,18 +45,24 @@ settings.configure(
                     'django.contrib.sessions',
                     'django.contrib.messages',
                     'django.contrib.staticfiles',
-                    'django_address'])
+                    'django_address',
+                    'django_address.tests'])
 
-try:
-    # Django <= 1.8
-    from django.test.simple import DjangoTestSuiteRunner
-    test_runner = DjangoTestSuiteRunner(verbosity=1)
-except ImportError:
-    # Django >= 1.8
-    django.setup()
-    from django.test.runner import DiscoverRunner
+# python runtests.py --benchmark [--save-baselines]
+benchmark = '--benchmark' in sys.argv
+if '--save-baselines' in sys.argv:
+    os.environ['DJANGO_ADDRESS_BENCHMARK_SAVE'] = '1'
+
+django.setup()
+from django.test.runner import DiscoverRunner
+if benchmark:
+    test_runner = DiscoverRunner(verbosity=1, pattern='bench*.py')
+else:
     test_runner = DiscoverRunner(verbosity=1)
 
-failures = test_runner.run_tests(['django_address'])
+if benchmark:
+    failures = test_runner.run_tests(['django_address.benchmarks'])
+else:
+    failures = test_runner.run_tests(['django_address'])
 if failures:
     sys.exit(failures)